@@ -0,0 +1,96 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+from typing import Any, Dict
+from backend.app.schemas.news import NewsQuery
+from backend.app.db.job_store import QueueFullError, get_job_store
+from backend.app.api import news_router
+from backend.app.llm_clients.scheduler import set_llm_lane
+from backend.app.telemetry import REQUEST_SECONDS, REQUESTS, current_trace
+import logging
+import time
+
+router = APIRouter()
+
+
+async def run_query_job(job: Dict[str, Any]) -> dict:
+    """
+    Job handler: answer the stored query with the stored pipeline options.
+
+    Args:
+        job (Dict[str, Any]): Job as returned by `JobStore.claim`
+
+    Returns:
+        dict: The /api/query response for the job
+    """
+    params = job["params"]
+    mode = params.get("mode", "thread")
+    outcome = "ok"
+    # Background jobs yield to interactive queries for LLM capacity
+    set_llm_lane("batch")
+    try:
+        return await news_router.answer_query(NewsQuery(**job["request"]), **params)
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        trace = current_trace()
+        if trace is not None:
+            REQUEST_SECONDS.observe(time.perf_counter() - trace.started, endpoint="job", mode=mode)
+        REQUESTS.inc(endpoint="job", mode=mode, outcome=outcome)
+
+
+@router.post("/jobs", status_code=202)
+async def create_job(request: NewsQuery,
+                     http_request: Request,
+                     mode: str = "thread",
+                     batch_size: int = 5,
+                     retrieval: str = "article"):
+    """
+    Queue a query to be answered in the background.
+
+    The job is stored durably, so it survives a restart of the server. Poll
+    GET /api/jobs/{job_id} for its progress and result.
+
+    Args:
+        request (NewsQuery): The request body, as for /api/query
+        http_request (Request): Incoming request, used to wake the worker pool
+        mode (str, optional): Scoring mode (see /api/query). Defaults to 'thread'.
+        batch_size (int, optional): Articles per scoring call in 'batch' mode. Defaults to 5.
+        retrieval (str, optional): 'article' or 'chunk' (see /api/query). Defaults to 'article'.
+
+    Returns:
+        dict: `job_id` and `status` ('queued'); 429 with Retry-After if the queue is full
+    """
+    store = get_job_store()
+    params = {"mode": mode, "batch_size": batch_size, "retrieval": retrieval}
+    try:
+        job_id = store.enqueue(request.model_dump(mode="json"), params)
+    except QueueFullError as e:
+        logging.warning(f"⚠️ Rejected job for {request.query!r}: {str(e)}")
+        return JSONResponse(status_code=429, content={"detail": str(e)}, headers={"Retry-After": "5"})
+
+    pool = getattr(http_request.app.state, "job_pool", None)
+    if pool is not None:
+        pool.notify()
+    logging.info(f"📥 Queued job {job_id} for {request.query!r}")
+    return {"job_id": job_id, "status": "queued"}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Return the status of a job.
+
+    Args:
+        job_id (str): Id returned by POST /api/jobs
+
+    Returns:
+        dict: status ('queued', 'running', 'done' or 'failed'), the current stage, progress per
+        stage, attempts, timestamps, queue_position while queued, and the result or error once
+        finished; 404 if the job is unknown or has expired
+    """
+    job = get_job_store().get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"detail": f"Job {job_id} not found"})
+    job.pop("params")
+    return job
@@ -1,20 +1,197 @@
-from fastapi import APIRouter
-from backend.app.schemas.news import NewsQuery
-from backend.app.db.chroma_connector import get_chroma_db, query_chroma
-from backend.app.db.mongo_connector import get_full_article
-from backend.app.services.embedding_service import initialize_embedding
-from backend.app.services.CoT_service import score_articles_with_thread_pool, score_articles_sync
-from backend.app.services.generation_service import generated_news_with_CoT
+from fastapi import APIRouter, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import Any, Dict, Tuple
+from backend.app.schemas.news import NewsBatchQuery, NewsQuery
+from backend.app.db.chroma_connector import get_retriever
+from backend.app.db.mongo_connector import get_full_article_async
+from backend.app.llm_clients.scheduler import set_llm_lane
+from backend.app.services.CoT_service import (
+    score_articles_with_thread_pool, score_articles_sync, score_articles_async, score_articles_batched,
+    score_articles_adaptive, iter_scored_articles_async
+)
+from backend.app.services.cascade_service import (
+    best_similarity_per_article, load_cascade_calibration, apply_similarity_cascade,
+    build_cascade_results, record_similarity_scores, start_cascade_log
+)
+from backend.app.services.response_cache import get_response_cache
+from backend.app.services.single_flight import AsyncSingleFlight, normalize_query
+from backend.app.telemetry import REQUEST_SECONDS, REQUESTS, current_trace, span, start_trace
+from backend.app.services.generation_service import (
+    generated_news_with_CoT, generated_news_with_CoT_async, stream_generated_news_with_CoT
+)
+import asyncio
+import json
 import logging
+import time
 
 router = APIRouter()
 
-# Initialize embedding model and vector database
-embedding = initialize_embedding()
-db = get_chroma_db()
+# Answers being computed, shared by concurrent identical queries
+query_flight = AsyncSingleFlight()
+
+
+def format_reference(article: dict) -> dict:
+    """
+    Select the fields of a scored article that are returned to the client.
+
+    Args:
+        article (dict): Scored article from one of the CoT scorers
+
+    Returns:
+        dict: Reference with id, title, date, score and generated_summary, plus samples_used
+        for articles scored in 'adaptive' mode
+    """
+    reference = {
+        "id": article["id"],
+        "title": article["title"],
+        "date": article["date"],
+        "score": article["score"],
+        "generated_summary": article["generated_summary"]
+    }
+    if "samples_used" in article:
+        reference["samples_used"] = article["samples_used"]
+    return reference
+
+
+def format_sse(event: str, data: dict) -> str:
+    """
+    Encode one Server-Sent Event.
+
+    Args:
+        event (str): Event name
+        data (dict): JSON-serializable payload
+
+    Returns:
+        str: The event in SSE wire format
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+async def retrieve_documents(request: NewsQuery, retrieval: str = "article") -> list:
+    """
+    Retrieve (document, relevance score) pairs for a query off the event loop.
+
+    Args:
+        request (NewsQuery): The query, top_k and optional date range
+        retrieval (str, optional): 'article' returns top_k distinct articles with their best
+            chunk; 'chunk' returns the top_k chunks, which may repeat articles. Defaults to 'article'.
+
+    Returns:
+        list: (Document, relevance score) pairs
+    """
+    retriever = get_retriever()
+    search = retriever.similarity_search_with_relevance_scores if retrieval == "chunk" else retriever.search_articles
+    with span("retrieval"):
+        return await run_in_threadpool(
+            search, request.query, k=request.top_k, start_date=request.start_date, end_date=request.end_date
+        )
+
+
+async def answer_query(request: NewsQuery, mode: str = "thread", batch_size: int = 5, retrieval: str = "article") -> dict:
+    """
+    Run retrieval, scoring, summarization and generation for one query.
+
+    Args:
+        request (NewsQuery): The request body containing the query, top_k and optional
+            start_date/end_date
+        mode (str, optional): Scoring mode (see `query_news`). Defaults to 'thread'.
+        batch_size (int, optional): Articles per scoring call in 'batch' mode. Defaults to 5.
+        retrieval (str, optional): 'article' or 'chunk' (see `retrieve_documents`). Defaults to 'article'.
+
+    Returns:
+        dict: Contains the query, generated article, and a list of reference articles; in
+        'adaptive' mode also samples_used per scored article
+    """
+    query = request.query
+    top_k = request.top_k
+    logging.info(f"🔍 Received query request: {query} (top_k={top_k}, mode={mode})")
+
+    # Retrieve similar documents (with their similarity) from the vector database
+    docs_and_scores = await retrieve_documents(request, retrieval)
+    docs = [doc for doc, _ in docs_and_scores]
+    ids = [doc.metadata["news_id"] for doc in docs]
+    dates = [doc.metadata["date"] for doc in docs]
+    with span("mongo"):
+        articles = await get_full_article_async(ids, dates)
+
+    # Cascade: settle clear-cut articles by similarity, send the ambiguous band to the LLM
+    with span("cascade"):
+        similarities = best_similarity_per_article(docs_and_scores)
+        decisions = start_cascade_log()
+        to_score, accepted = apply_similarity_cascade(articles, similarities, load_cascade_calibration(), decisions)
+
+    # Score articles and generate summaries
+    score_log, samples_log = {}, {}
+    with span("scoring"):
+        if mode == "sync":
+            results = await run_in_threadpool(
+                score_articles_sync, to_score, query=query, n=1, threshold=20, score_log=score_log
+            )
+        elif mode == "thread":
+            results = await run_in_threadpool(
+                score_articles_with_thread_pool, to_score, query=query, n=1, threshold=20, score_log=score_log
+            )
+        elif mode == "adaptive":
+            results = await run_in_threadpool(
+                score_articles_adaptive, to_score, query=query, n=3, threshold=20, max_samples=5,
+                score_log=score_log, samples_log=samples_log
+            )
+        elif mode == "batch":
+            results = await run_in_threadpool(
+                score_articles_batched, to_score, query=query, n=1, threshold=20, batch_size=batch_size,
+                score_log=score_log
+            )
+        else:
+            results = await score_articles_async(to_score, query=query, n=1, threshold=20, score_log=score_log)
+
+    if accepted:
+        results += await run_in_threadpool(build_cascade_results, articles, accepted)
+        results.sort(key=lambda x: x["score"], reverse=True)
+    await run_in_threadpool(record_similarity_scores, query, similarities, score_log, decisions)
+
+    # Generate a comprehensive news article from the scored references
+    with span("generation"):
+        if mode in ("sync", "thread", "batch", "adaptive"):
+            generated_article = await run_in_threadpool(generated_news_with_CoT, query, results)
+        else:
+            generated_article = await generated_news_with_CoT_async(query, results)
+    logging.info(f"🔎 Number of full articles extracted: {len(articles)}")
+    logging.info(f"✅ Number of reference articles passing the threshold: {len(results)}")
+
+    response = {
+        "query": query,
+        "generated_article": generated_article,
+        "references": [format_reference(article) for article in results]
+    }
+    if mode == "adaptive":
+        # Samples spent on every scored article, including those below the threshold
+        response["samples_used"] = {str(news_id): used for news_id, used in samples_log.items()}
+    return response
+
+
+def response_cache_namespace(request: NewsQuery, mode: str, batch_size: int, retrieval: str) -> tuple:
+    """
+    Return the request parameters a cached response must match exactly.
+
+    Args:
+        request (NewsQuery): The request body
+        mode (str): Scoring mode
+        batch_size (int): Articles per scoring call in 'batch' mode
+        retrieval (str): Retrieval mode
+
+    Returns:
+        tuple: Hashable namespace for the semantic response cache
+    """
+    return (request.top_k, request.start_date, request.end_date, mode, batch_size if mode == "batch" else None, retrieval)
+
 
 @router.post("/query")
-def query_news(request: NewsQuery, mode: str = "thread"):
+async def query_news(request: NewsQuery,
+                     response: Response,
+                     mode: str = "thread",
+                     batch_size: int = 5,
+                     retrieval: str = "article",
+                     timings: bool = False):
     """
     Endpoint for querying news articles, scoring their relevance, and generating a summary article.
 
@@ -22,58 +199,337 @@ def query_news(request: NewsQuery, mode: str = "thread"):
     - A generated news article based on the query and reference articles
     - A list of reference articles with their scores and summaries
 
+    Responses are cached by query embedding: a query whose embedding is close enough
+    to a recent one with the same parameters is answered from the cache. The
+    `X-Cache` header reports HIT, MISS or BYPASS (cache disabled).
+
+    Concurrent requests with the same normalized query and parameters share one
+    in-flight computation; requests that joined another one get `X-Coalesced: 1`.
+
     Args:
-        request (NewsQuery): The request body containing the query and top_k
-        mode (str, optional): Scoring mode, either 'thread' (default) or 'sync'
+        request (NewsQuery): The request body containing the query, top_k and optional
+            start_date/end_date
+        response (Response): Outgoing response, used to set the cache and coalescing headers
+        mode (str, optional): Scoring mode, one of 'thread' (default), 'async', 'sync', 'batch'
+            or 'adaptive'.
+            'async' runs scoring, summarization and generation on the event loop;
+            the blocking modes are offloaded to the threadpool. 'batch' scores
+            `batch_size` articles per LLM call. 'adaptive' budgets three consistency
+            samples per article (five for borderline ones) but stops early once
+            the samples agree or the decision is clear.
+        batch_size (int, optional): Articles per scoring call in 'batch' mode. Defaults to 5.
+        retrieval (str, optional): 'article' (default) retrieves top_k distinct articles;
+            'chunk' retrieves top_k chunks as before.
+        timings (bool, optional): Add a `timings` breakdown (per-stage milliseconds and LLM
+            calls, tokens and time per provider/model) to the response. Defaults to False.
 
     Returns:
         dict: Contains the query, generated article, and a list of reference articles
     """
+    trace = start_trace()
+    set_llm_lane("interactive")
+    outcome = "ok"
     try:
-        query = request.query
-        top_k = request.top_k
-        logging.info(f"🔍 Received query request: {query} (top_k={top_k}, mode={mode})")
-
-        # Retrieve similar documents from the vector database
-        docs = query_chroma(db, query=query, k=top_k)
-        ids = [doc.metadata["news_id"] for doc in docs]
-        dates = [doc.metadata["date"] for doc in docs]
-        articles = get_full_article(ids, dates)
+        cache = get_response_cache()
+        response.headers["X-Cache"] = "BYPASS"
+        hit = None
+        if cache.enabled:
+            namespace = response_cache_namespace(request, mode, batch_size, retrieval)
+            with span("cache_lookup"):
+                vector = await run_in_threadpool(get_retriever().embed_query, request.query)
+                hit = await run_in_threadpool(cache.lookup, vector, namespace)
+            response.headers["X-Cache"] = "HIT" if hit else "MISS"
 
-        # Score articles and generate summaries
-        if mode == "sync":
-            results = score_articles_sync(articles, query=query, n=1, threshold=20)
+        if hit:
+            cached, similarity = hit
+            logging.info(f"⚡ Response cache hit for {request.query!r} (similarity {similarity:.3f})")
+            response.headers["X-Cache-Similarity"] = f"{similarity:.4f}"
+            outcome = "cache_hit"
+            body = {**cached, "query": request.query}
         else:
-            results = score_articles_with_thread_pool(
-                articles, query=query, n=1, threshold=20, max_workers=5
-            )
+            async def compute():
+                result = await answer_query(request, mode, batch_size, retrieval)
+                if cache.enabled:
+                    await run_in_threadpool(cache.store, vector, namespace, result)
+                return result
 
-        # Generate a comprehensive news article and format references
-        generated_article, reference_articles = generated_news_with_CoT(query, results)
-        logging.info(f"🔎 Number of full articles extracted: {len(articles)}")
-        logging.info(f"✅ Number of reference articles passing the threshold: {len(results)}")
-
-        formatted_references = [
-            {
-                "id": article["id"],
-                "title": article["title"],
-                "date": article["date"],
-                "score": article["score"],
-                "generated_summary": article["generated_summary"]
-            }
-            for article in reference_articles
-        ]
-
-        return {
-            "query": query,
-            "generated_article": generated_article,
-            "references": formatted_references
-        }
+            key = (normalize_query(request.query),) + response_cache_namespace(request, mode, batch_size, retrieval)
+            result, shared = await query_flight.do(key, compute)
+            if shared:
+                logging.info(f"🔗 Joined in-flight query {request.query!r}")
+                response.headers["X-Coalesced"] = "1"
+                outcome = "coalesced"
+            body = {**result, "query": request.query}
 
     except Exception as e:
         logging.error(f"❌ Query error: {str(e)}")
-        return {
+        outcome = "error"
+        body = {
             "query": request.query,
             "generated_article": "❌ Generation failed",
             "references": []
-        }
\ No newline at end of file
+        }
+
+    REQUEST_SECONDS.observe(time.perf_counter() - trace.started, endpoint="query", mode=mode)
+    REQUESTS.inc(endpoint="query", mode=mode, outcome=outcome)
+    if timings:
+        body["timings"] = trace.as_dict()
+    return body
+
+
+async def answer_batch_item(query: str,
+                            docs_and_scores: list,
+                            articles: Dict[int, Dict[str, Any]],
+                            calibration: Any,
+                            generation_slots: asyncio.Semaphore) -> Tuple[dict, int]:
+    """
+    Score, summarize and generate for one query of a batch, using articles fetched for the whole batch.
+
+    Args:
+        query (str): The query text
+        docs_and_scores (list): (Document, relevance score) pairs retrieved for this query
+        articles (Dict[int, Dict[str, Any]]): Full articles fetched for every query in the batch
+        calibration (Any): Cascade calibration from `load_cascade_calibration`
+        generation_slots (asyncio.Semaphore): Bounds the generation calls running at once
+
+    Returns:
+        Tuple[dict, int]: The response for this query, and the LLM calls the same query would
+        have made on its own through /query with cold caches
+    """
+    similarities = best_similarity_per_article(docs_and_scores)
+    retrieved_ids = dict.fromkeys(int(doc.metadata["news_id"]) for doc, _ in docs_and_scores)
+    own = {news_id: articles[news_id] for news_id in retrieved_ids if news_id in articles}
+    decisions = start_cascade_log()
+    with span("cascade"):
+        to_score, accepted = apply_similarity_cascade(own, similarities, calibration, decisions)
+
+    score_log = {}
+    with span("scoring"):
+        results = await score_articles_async(to_score, query=query, n=1, threshold=20, score_log=score_log)
+    if accepted:
+        results += await run_in_threadpool(build_cascade_results, own, accepted)
+        results.sort(key=lambda x: x["score"], reverse=True)
+    await run_in_threadpool(record_similarity_scores, query, similarities, score_log, decisions)
+
+    async with generation_slots:
+        with span("generation"):
+            generated_article = await generated_news_with_CoT_async(query, results)
+
+    # One scoring call per article sent to the LLM, one summary per reference, one generation
+    separate_calls = len(to_score) + len(results) + 1
+    return {
+        "query": query,
+        "generated_article": generated_article,
+        "references": [format_reference(article) for article in results]
+    }, separate_calls
+
+
+async def answer_query_batch(request: NewsBatchQuery, generation_concurrency: int = 4) -> dict:
+    """
+    Answer several queries together, sharing the work they have in common.
+
+    1. Identical queries (after normalization) are answered once
+    2. All queries are embedded in one encode call; retrieval then reuses the cached vectors
+    3. The union of retrieved articles is fetched from MongoDB once
+    4. Scoring runs per query; graded summaries are shared per (article, length bucket)
+    5. At most `generation_concurrency` generation calls run at once
+
+    Args:
+        request (NewsBatchQuery): The queries, top_k and optional date range
+        generation_concurrency (int, optional): Maximum concurrent generation calls. Defaults to 4.
+
+    Returns:
+        dict: `results` in request order, each shaped like a /query response, and `stats` with
+        the articles retrieved and fetched and the LLM calls made versus answering each query
+        separately
+    """
+    trace = current_trace() or start_trace()
+    calls_before = trace.llm_calls()
+
+    # First spelling of each normalized query is the one sent to the LLM
+    texts = {}
+    for query in request.queries:
+        texts.setdefault(normalize_query(query), query)
+    unique = list(texts.values())
+    logging.info(f"📚 Received batch of {len(request.queries)} queries ({len(unique)} unique)")
+
+    retriever = get_retriever()
+    with span("embedding"):
+        await run_in_threadpool(retriever.embed_queries, unique)
+    searches = await asyncio.gather(*(
+        retrieve_documents(NewsQuery(query=query, top_k=request.top_k,
+                                     start_date=request.start_date, end_date=request.end_date))
+        for query in unique
+    ))
+
+    union: Dict[str, str] = {}
+    for docs_and_scores in searches:
+        for doc, _ in docs_and_scores:
+            union.setdefault(str(doc.metadata["news_id"]), doc.metadata["date"])
+    with span("mongo"):
+        articles = await get_full_article_async(list(union), list(union.values()))
+
+    calibration = load_cascade_calibration()
+    generation_slots = asyncio.Semaphore(max(1, generation_concurrency))
+    outcomes = await asyncio.gather(*(
+        answer_batch_item(query, docs_and_scores, articles, calibration, generation_slots)
+        for query, docs_and_scores in zip(unique, searches)
+    ), return_exceptions=True)
+
+    answers: Dict[str, Tuple[dict, int]] = {}
+    for key, query, outcome in zip(texts, unique, outcomes):
+        if isinstance(outcome, BaseException):
+            logging.error(f"❌ Batch query error for {query!r}: {str(outcome)}")
+            outcome = ({"query": query, "generated_article": "❌ Generation failed", "references": []}, 0)
+        answers[key] = outcome
+
+    retrieved_per_query = {
+        key: len({str(doc.metadata["news_id"]) for doc, _ in docs_and_scores})
+        for key, docs_and_scores in zip(texts, searches)
+    }
+    keys = [normalize_query(query) for query in request.queries]
+    llm_calls = trace.llm_calls() - calls_before
+    separate_calls = sum(answers[key][1] for key in keys)
+    return {
+        "results": [{**answers[key][0], "query": query} for key, query in zip(keys, request.queries)],
+        "stats": {
+            "queries": len(request.queries),
+            "unique_queries": len(unique),
+            "articles_retrieved": sum(retrieved_per_query[key] for key in keys),
+            "articles_fetched": len(articles),
+            "llm_calls": llm_calls,
+            "llm_calls_separate": separate_calls,
+            "llm_calls_saved": max(0, separate_calls - llm_calls),
+        }
+    }
+
+
+@router.post("/query/batch")
+async def query_news_batch(request: NewsBatchQuery, generation_concurrency: int = 4):
+    """
+    Endpoint answering many related queries at once, e.g. for a daily briefing.
+
+    Work shared between the queries (embedding, article fetches, graded summaries,
+    duplicate queries) is done once; see `answer_query_batch`.
+
+    Args:
+        request (NewsBatchQuery): The request body containing the queries, top_k and optional
+            start_date/end_date
+        generation_concurrency (int, optional): Maximum concurrent generation calls. Defaults to 4.
+
+    Returns:
+        dict: `results` (one /query-shaped response per query, in request order) and `stats`
+        (queries, unique_queries, articles_retrieved, articles_fetched, llm_calls,
+        llm_calls_separate, llm_calls_saved)
+    """
+    trace = start_trace()
+    set_llm_lane("batch")
+    outcome = "ok"
+    try:
+        body = await answer_query_batch(request, generation_concurrency)
+    except Exception as e:
+        logging.error(f"❌ Batch query error: {str(e)}")
+        outcome = "error"
+        body = {
+            "results": [
+                {"query": query, "generated_article": "❌ Generation failed", "references": []}
+                for query in request.queries
+            ],
+            "stats": {}
+        }
+
+    REQUEST_SECONDS.observe(time.perf_counter() - trace.started, endpoint="query_batch", mode="async")
+    REQUESTS.inc(endpoint="query_batch", mode="async", outcome=outcome)
+    return body
+
+
+@router.post("/query/stream")
+async def query_news_stream(request: NewsQuery, retrieval: str = "article"):
+    """
+    Streaming variant of /query that reports progress as Server-Sent Events.
+
+    Events are emitted in this order:
+    - retrieval: the retrieved articles (id, title, date, similarity), before any LLM call
+    - reference: each scored reference as soon as its score and summary are done
+    - token: pieces of the generated article as the LLM streams them
+    - done: the final payload in the same shape as /query, with references sorted by score
+    - error: emitted instead of the remaining events if the pipeline fails
+
+    Args:
+        request (NewsQuery): The request body containing the query and top_k
+        retrieval (str, optional): 'article' (default) or 'chunk', as for /query
+
+    Returns:
+        StreamingResponse: A text/event-stream response
+    """
+    async def event_stream():
+        query = request.query
+        started = time.perf_counter()
+        set_llm_lane("interactive")
+        outcome = "ok"
+        try:
+            logging.info(f"📡 Received streaming query request: {query} (top_k={request.top_k})")
+            docs_and_scores = await retrieve_documents(request, retrieval)
+            similarities = best_similarity_per_article(docs_and_scores)
+            retrieved = {}
+            for doc, _ in docs_and_scores:
+                news_id = int(doc.metadata["news_id"])
+                retrieved.setdefault(news_id, {
+                    "id": news_id,
+                    "title": doc.metadata.get("news_title"),
+                    "date": doc.metadata["date"],
+                    "similarity": similarities[news_id]
+                })
+            yield format_sse("retrieval", {"articles": list(retrieved.values())})
+
+            docs = [doc for doc, _ in docs_and_scores]
+            with span("mongo"):
+                articles = await get_full_article_async(
+                    [doc.metadata["news_id"] for doc in docs], [doc.metadata["date"] for doc in docs]
+                )
+            decisions = start_cascade_log()
+            to_score, accepted = apply_similarity_cascade(articles, similarities, load_cascade_calibration(), decisions)
+
+            results = []
+            if accepted:
+                for result in await run_in_threadpool(build_cascade_results, articles, accepted):
+                    results.append(result)
+                    yield format_sse("reference", format_reference(result))
+
+            score_log = {}
+            async for result in iter_scored_articles_async(to_score, query=query, n=1, threshold=20,
+                                                           score_log=score_log):
+                results.append(result)
+                yield format_sse("reference", format_reference(result))
+            results.sort(key=lambda x: x["score"], reverse=True)
+            await run_in_threadpool(record_similarity_scores, query, similarities, score_log, decisions)
+
+            parts = []
+            async for delta in stream_generated_news_with_CoT(query, results):
+                parts.append(delta)
+                yield format_sse("token", {"text": delta})
+
+            yield format_sse("done", {
+                "query": query,
+                "generated_article": "".join(parts),
+                "references": [format_reference(article) for article in results]
+            })
+
+        except (GeneratorExit, asyncio.CancelledError):
+            # The client disconnected; pending LLM calls are closed and recorded as cancelled
+            logging.info(f"🔌 Streaming client went away: {query}")
+            outcome = "cancelled"
+            raise
+        except Exception as e:
+            logging.error(f"❌ Streaming query error: {str(e)}")
+            outcome = "error"
+            yield format_sse("error", {"query": query, "generated_article": "❌ Generation failed"})
+        finally:
+            REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint="query_stream", mode="async")
+            REQUESTS.inc(endpoint="query_stream", mode="async", outcome=outcome)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
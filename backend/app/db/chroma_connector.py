@@ -1,7 +1,25 @@
 import os
-import chromadb
-from langchain_chroma import Chroma
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+from backend.app.db.partitions import date_filter, partition_bounds, plan_partition_search
+from backend.app.services.embedding_backends import (
+    CachedQueryEmbeddings, embed_queries, embedding_identity, embedding_mismatch
+)
 from backend.app.services.embedding_service import initialize_embedding
+from backend.app.telemetry import span
+
+# Chunks fetched per requested article in article-level retrieval
+ARTICLE_OVERFETCH = int(os.getenv("ARTICLE_OVERFETCH", "4"))
+
+# Query embeddings kept in the retriever's LRU cache
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+
+# How often the list of monthly partitions is re-read, so newly ingested months show up
+PARTITION_REFRESH_SECONDS = float(os.getenv("PARTITION_REFRESH_SECONDS", "60"))
 
 
 def get_chroma_db(persist_directory: str = "./backend/storage/chromadb"):
@@ -15,6 +33,9 @@ def get_chroma_db(persist_directory: str = "./backend/storage/chromadb"):
     Returns:
         Chroma: Initialized ChromaDB instance
     """
+    import chromadb
+    from langchain_chroma import Chroma
+
     # Create directory if it doesn't exist
     os.makedirs(persist_directory, exist_ok=True)
     
@@ -29,7 +50,394 @@ def get_chroma_db(persist_directory: str = "./backend/storage/chromadb"):
     except Exception as e:
         raise ConnectionError(f"無法連接到 ChromaDB: {str(e)}")
 
-def query_chroma(query: str, k: int = 5, persist_directory: str = "./backend/storage/chromadb"):
+
+def aggregate_chunks_by_article(docs_and_scores: List[Tuple[Any, float]],
+                                k: Optional[int] = None,
+                                method: str = "max",
+                                top_m: int = 3) -> List[Tuple[Any, float]]:
+    """
+    Collapse chunk hits into one hit per article, ranked by an article-level score.
+
+    Args:
+        docs_and_scores (List[Tuple[Any, float]]): (chunk Document, relevance score) pairs
+        k (Optional[int], optional): Number of articles to keep. Defaults to all.
+        method (str, optional): 'max' ranks by the best chunk, 'sum' by the sum of the
+            `top_m` best chunks (rewarding articles that match in several places). Defaults to 'max'.
+        top_m (int, optional): Chunks summed per article in 'sum' mode. Defaults to 3.
+
+    Returns:
+        List[Tuple[Document, float]]: The best-matching chunk of each article with that chunk's
+        relevance score, ordered by article score; the article score is stored in the
+        chunk's `article_score` metadata
+    """
+    if method not in ("max", "sum"):
+        raise ValueError(f"Unknown aggregation method: {method}")
+
+    chunks: Dict[int, List[Tuple[Any, float]]] = {}
+    for doc, score in docs_and_scores:
+        chunks.setdefault(int(doc.metadata["news_id"]), []).append((doc, score))
+
+    ranked = []
+    for hits in chunks.values():
+        hits.sort(key=lambda hit: hit[1], reverse=True)
+        best_doc, best_score = hits[0]
+        article_score = best_score if method == "max" else sum(score for _, score in hits[:top_m])
+        best_doc.metadata["article_score"] = article_score
+        ranked.append((best_doc, best_score))
+    ranked.sort(key=lambda hit: hit[0].metadata["article_score"], reverse=True)
+    return ranked[:k] if k is not None else ranked
+
+
+class NewsRetriever:
+    """
+    Process-wide retriever that owns the embedding model and the Chroma collections.
+
+    The model and the `PersistentClient` are loaded once by `ensure_ready` (normally
+    during FastAPI lifespan startup) and reused by every query afterwards.
+
+    When ingestion has written monthly partitions (news_YYYY_MM), a query only
+    searches the partitions overlapping its date range, plus the `collection_name`
+    collection (which keeps undated and pre-partitioning articles), and merges
+    their results; otherwise the single `collection_name` collection is searched.
+
+    Collections whose recorded embedding identity differs from the configured model
+    are refused: their vectors live in another space and cannot be compared.
+    """
+
+    def __init__(self,
+                 persist_directory: str = "./backend/storage/chromadb",
+                 collection_name: str = "news_collection"):
+        self.persist_directory = persist_directory
+        self.collection_name = collection_name
+        self.embedding = None
+        self.client = None
+        self.db = None
+        self.ready = False
+        self.error: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stores: Dict[str, Any] = {}
+        self._partitions: Optional[List[str]] = None
+        self._partitions_at = 0.0
+        self._has_default = False
+
+    def ensure_ready(self) -> "NewsRetriever":
+        """
+        Load the embedding model and collection and run a warm-up embedding, once.
+
+        Concurrent callers block until the first one has finished loading.
+
+        Returns:
+            NewsRetriever: This retriever, ready to search
+
+        Raises:
+            ConnectionError: If the model or ChromaDB cannot be loaded, or a collection
+                holds vectors of another embedding model
+        """
+        if self.ready:
+            return self
+        with self._lock:
+            if self.ready:
+                return self
+            # Deferred so that importing the API does not pull in chromadb
+            import chromadb
+            from langchain_chroma import Chroma
+
+            try:
+                start = time.perf_counter()
+                os.makedirs(self.persist_directory, exist_ok=True)
+                self.embedding = CachedQueryEmbeddings(initialize_embedding(), QUERY_EMBEDDING_CACHE_SIZE)
+                self.timings["model_load_seconds"] = time.perf_counter() - start
+
+                start = time.perf_counter()
+                self.client = chromadb.PersistentClient(path=self.persist_directory)
+                self.db = Chroma(
+                    client=self.client,
+                    embedding_function=self.embedding,
+                    collection_name=self.collection_name
+                )
+                self.timings["collection_open_seconds"] = time.perf_counter() - start
+                self._check_embedding(self.client.list_collections())
+
+                # The first encode pays for lazy initialisation inside the model; do it now
+                start = time.perf_counter()
+                self.embedding.embed_query("warm-up")
+                self.timings["warmup_seconds"] = time.perf_counter() - start
+            except Exception as e:
+                self.error = str(e)
+                raise ConnectionError(f"無法連接到 ChromaDB: {str(e)}")
+            self.error = None
+            self.ready = True
+            logging.info(f"🔥 Retriever ready: {self.timings}")
+        return self
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Report whether the model and collection are warm.
+
+        Returns:
+            Dict[str, Any]: ready flag, collection name, document count, load timings and last error
+        """
+        status = {
+            "ready": self.ready,
+            "collection": self.collection_name,
+            "timings": self.timings,
+            "error": self.error,
+        }
+        if self.ready:
+            partitions = self.partitions()
+            status["partitions"] = len(partitions)
+            names = partitions + [self.collection_name] if self._has_default or not partitions else partitions
+            status["documents"] = sum(self.client.get_collection(name).count() for name in names)
+        return status
+
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Embed a query with the shared model (cached per query string).
+
+        Args:
+            query (str): The search query
+
+        Returns:
+            List[float]: Query embedding
+        """
+        return self.ensure_ready().embedding.embed_query(query)
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Embed several queries in one encode call and keep them in the query cache.
+
+        Later searches for these queries reuse the cached vectors instead of encoding again.
+
+        Args:
+            queries (List[str]): Search queries
+
+        Returns:
+            List[List[float]]: One embedding per query
+        """
+        return embed_queries(self.ensure_ready().embedding, queries)
+
+    def partitions(self) -> List[str]:
+        """
+        List the monthly partitions, re-reading them every PARTITION_REFRESH_SECONDS.
+
+        Returns:
+            List[str]: Partition collection names, oldest first
+        """
+        if self.client is None:
+            return []
+        now = time.monotonic()
+        if self._partitions is None or now - self._partitions_at > PARTITION_REFRESH_SECONDS:
+            names = [c if isinstance(c, str) else c.name for c in self.client.list_collections()]
+            self._partitions = sorted(name for name in names if partition_bounds(name))
+            self._has_default = self.collection_name in names
+            self._partitions_at = now
+        return self._partitions
+
+    def _check_embedding(self, collections: List[Any]) -> None:
+        identity = embedding_identity(self.embedding)
+        for collection in collections:
+            if isinstance(collection, str):
+                collection = self.client.get_collection(collection)
+            if collection.name != self.collection_name and not partition_bounds(collection.name):
+                continue
+            mismatch = embedding_mismatch(collection.metadata, identity)
+            if mismatch:
+                logging.error(f"❌ Collection {collection.name} was embedded with another model: {mismatch}")
+                raise ValueError(f"Collection {collection.name} holds vectors of another embedding "
+                                 f"{mismatch} (recorded, configured); re-ingest it or configure that model")
+
+    def _store(self, name: str) -> Any:
+        from langchain_chroma import Chroma
+
+        if name not in self._stores:
+            # Partitions ingested after startup are checked when first searched
+            self._check_embedding([name])
+            self._stores[name] = Chroma(client=self.client, embedding_function=self.embedding, collection_name=name)
+        return self._stores[name]
+
+    def _search_dated(self,
+                      store: Any,
+                      vector: List[float],
+                      k: int,
+                      start_date: Optional[date],
+                      end_date: Optional[date]) -> List[Tuple[Any, float]]:
+        relevance = store._select_relevance_score_fn()
+        if start_date and end_date:
+            hits = store.similarity_search_by_vector_with_relevance_scores(
+                vector, k=k, filter=date_filter(start_date, end_date)
+            )
+            return [(doc, relevance(distance)) for doc, distance in hits]
+        # Open-ended range: Chroma cannot compare date strings, so filter afterwards and
+        # widen the fetch until k chunks are in range or the collection is exhausted
+        start, end = (start_date or date.min).isoformat(), (end_date or date.max).isoformat()
+        fetch = k * ARTICLE_OVERFETCH
+        while True:
+            hits = store.similarity_search_by_vector_with_relevance_scores(vector, k=fetch)
+            matched = [(doc, relevance(distance)) for doc, distance in hits
+                       if start <= str(doc.metadata.get("date") or "")[:10] <= end]
+            if len(matched) >= k or len(hits) < fetch:
+                return matched[:k]
+            fetch *= 2
+
+    def _search_partitions(self,
+                           query: str,
+                           k: int,
+                           start_date: Optional[date],
+                           end_date: Optional[date]) -> List[Tuple[Any, float]]:
+        plan = plan_partition_search(self.partitions(), start_date, end_date)
+        if self._has_default:
+            # Undated articles (and anything ingested before partitioning) stay in the default collection
+            plan.append((self.collection_name, None))
+        if not plan:
+            return []
+        # Embed once and reuse the vector for every partition
+        with span("embedding"):
+            vector = self.embedding.embed_query(query)
+
+        def search(item):
+            name, where = item
+            if name == self.collection_name and (start_date or end_date):
+                return self._search_dated(self._store(name), vector, k, start_date, end_date)
+            store = self._store(name)
+            relevance = store._select_relevance_score_fn()
+            hits = store.similarity_search_by_vector_with_relevance_scores(vector, k=k, filter=where)
+            return [(doc, relevance(distance)) for doc, distance in hits]
+
+        with span("chroma"):
+            if len(plan) == 1:
+                results = search(plan[0])
+            else:
+                with ThreadPoolExecutor(max_workers=min(len(plan), 8)) as executor:
+                    results = [hit for hits in executor.map(search, plan) for hit in hits]
+        logging.info(f"🗂️ Searched {len(plan)} partitions for {query!r}")
+        return sorted(results, key=lambda hit: hit[1], reverse=True)[:k]
+
+    def similarity_search(self,
+                          query: str,
+                          k: int = 5,
+                          start_date: Optional[date] = None,
+                          end_date: Optional[date] = None) -> List[Any]:
+        """
+        Return the k chunks most similar to the query.
+
+        Args:
+            query (str): The search query
+            k (int, optional): Number of results to return. Defaults to 5.
+            start_date (date, optional): Only return chunks dated on or after this day.
+            end_date (date, optional): Only return chunks dated on or before this day.
+
+        Returns:
+            list: List of similar documents
+        """
+        return [doc for doc, _ in self.similarity_search_with_relevance_scores(query, k, start_date, end_date)]
+
+    def similarity_search_with_relevance_scores(self,
+                                                query: str,
+                                                k: int = 5,
+                                                start_date: Optional[date] = None,
+                                                end_date: Optional[date] = None) -> List[Tuple[Any, float]]:
+        """
+        Return the k chunks most similar to the query with their relevance scores.
+
+        With monthly partitions only the months overlapping [start_date, end_date] are
+        searched, together with the default collection. In an unpartitioned collection a
+        bounded range is filtered by Chroma, and an open-ended one afterwards, fetching
+        more chunks until k of them are in range.
+
+        Args:
+            query (str): The search query
+            k (int, optional): Number of results to return. Defaults to 5.
+            start_date (date, optional): Only return chunks dated on or after this day.
+            end_date (date, optional): Only return chunks dated on or before this day.
+
+        Returns:
+            List[Tuple[Document, float]]: (document, relevance score) pairs
+        """
+        self.ensure_ready()
+        if self.partitions():
+            return self._search_partitions(query, k, start_date, end_date)
+        if not start_date and not end_date:
+            with span("chroma"):
+                return self.db.similarity_search_with_relevance_scores(query, k=k)
+        with span("embedding"):
+            vector = self.embedding.embed_query(query)
+        with span("chroma"):
+            return self._search_dated(self.db, vector, k, start_date, end_date)
+
+    def search_articles(self,
+                        query: str,
+                        k: int = 5,
+                        overfetch: int = ARTICLE_OVERFETCH,
+                        method: str = "max",
+                        top_m: int = 3,
+                        max_rounds: int = 3,
+                        start_date: Optional[date] = None,
+                        end_date: Optional[date] = None) -> List[Tuple[Any, float]]:
+        """
+        Return the k most relevant distinct articles, each with its best-matching chunk.
+
+        Fetches `k * overfetch` chunks and aggregates them per news_id. If that yields
+        fewer than k articles while the collection still has more chunks, the fetch is
+        doubled, up to `max_rounds` times.
+
+        Args:
+            query (str): The search query
+            k (int, optional): Number of distinct articles to return. Defaults to 5.
+            overfetch (int, optional): Chunks fetched per requested article. Defaults to ARTICLE_OVERFETCH.
+            method (str, optional): Aggregation, 'max' or 'sum' (see `aggregate_chunks_by_article`).
+            top_m (int, optional): Chunks summed per article in 'sum' mode. Defaults to 3.
+            max_rounds (int, optional): Maximum number of fetches. Defaults to 3.
+            start_date (date, optional): Only consider chunks dated on or after this day.
+            end_date (date, optional): Only consider chunks dated on or before this day.
+
+        Returns:
+            List[Tuple[Document, float]]: (best chunk, its relevance score) per article
+        """
+        fetch = k * max(overfetch, 1)
+        for _ in range(max_rounds):
+            docs_and_scores = self.similarity_search_with_relevance_scores(query, fetch, start_date, end_date)
+            articles = aggregate_chunks_by_article(docs_and_scores, k, method=method, top_m=top_m)
+            if len(articles) >= k or len(docs_and_scores) < fetch:
+                break
+            fetch *= 2
+        return articles
+
+
+_retriever: Optional[NewsRetriever] = None
+_retriever_lock = threading.Lock()
+
+
+def get_retriever() -> NewsRetriever:
+    """
+    Return the process-wide retriever, creating it (unloaded) on first use.
+
+    Environment variables:
+        CHROMA_DIR: Directory of the persisted ChromaDB. Defaults to './backend/storage/chromadb'.
+
+    Returns:
+        NewsRetriever: Shared retriever instance
+    """
+    global _retriever
+    with _retriever_lock:
+        if _retriever is None:
+            _retriever = NewsRetriever(os.getenv("CHROMA_DIR", "./backend/storage/chromadb"))
+        return _retriever
+
+
+def set_retriever(retriever: NewsRetriever) -> None:
+    """
+    Replace the process-wide retriever, e.g. with one backed by a test collection.
+
+    Args:
+        retriever (NewsRetriever): Retriever to use from now on
+    """
+    global _retriever
+    with _retriever_lock:
+        _retriever = retriever
+
+
+def query_chroma(query: str, k: int = 5, persist_directory: Optional[str] = None):
     """
     Query the ChromaDB for similar documents.
     
@@ -37,10 +445,12 @@ def query_chroma(query: str, k: int = 5, persist_directory: str = "./backend/sto
         query (str): The search query
         k (int, optional): Number of results to return. Defaults to 5.
         persist_directory (str, optional): Directory where the database is persisted.
-                                         Defaults to "./backend/storage/chromadb".
+                                         Defaults to the shared retriever's directory.
     
     Returns:
         list: List of similar documents
     """
-    db = get_chroma_db(persist_directory)
-    return db.similarity_search(query, k=k)
+    retriever = get_retriever()
+    if persist_directory and persist_directory != retriever.persist_directory:
+        retriever = NewsRetriever(persist_directory)
+    return retriever.similarity_search(query, k=k)
@@ -0,0 +1,117 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class IngestManifest:
+    """
+    SQLite record of what has been ingested into the vector store, one row per article.
+
+    Each row holds a hash of the article's indexed fields, the ids of the chunks
+    written for it and the collection they were written to, so re-ingestion can skip
+    unchanged articles and delete chunks that an edited article no longer produces.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "news_id TEXT PRIMARY KEY, article_hash TEXT NOT NULL, chunk_ids TEXT NOT NULL, updated_at REAL NOT NULL, "
+            "collection TEXT NOT NULL DEFAULT 'news_collection')"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(articles)")}
+        if "collection" not in columns:
+            self._conn.execute("ALTER TABLE articles ADD COLUMN collection TEXT NOT NULL DEFAULT 'news_collection'")
+        self._conn.commit()
+
+    def get(self, news_id: str) -> Optional[Tuple[str, List[str], str]]:
+        """
+        Look up an article.
+
+        Args:
+            news_id (str): News ID of the article
+
+        Returns:
+            Optional[Tuple[str, List[str], str]]: (article hash, chunk ids, collection), or None if never ingested
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT article_hash, chunk_ids, collection FROM articles WHERE news_id = ?", (str(news_id),)
+            ).fetchone()
+        return (row[0], json.loads(row[1]), row[2]) if row else None
+
+    def get_many(self, news_ids: Iterable[str]) -> Dict[str, Tuple[str, List[str], str]]:
+        """
+        Look up several articles at once.
+
+        Args:
+            news_ids (Iterable[str]): News IDs to look up
+
+        Returns:
+            Dict[str, Tuple[str, List[str], str]]: (article hash, chunk ids, collection) per ingested news_id
+        """
+        ids = [str(news_id) for news_id in news_ids]
+        if not ids:
+            return {}
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT news_id, article_hash, chunk_ids, collection FROM articles "
+                f"WHERE news_id IN ({','.join('?' * len(ids))})",
+                ids
+            ).fetchall()
+        return {row[0]: (row[1], json.loads(row[2]), row[3]) for row in rows}
+
+    def put_many(self, entries: Iterable[Tuple[str, str, List[str], str]]) -> None:
+        """
+        Record (or replace) ingested articles.
+
+        Args:
+            entries (Iterable[Tuple[str, str, List[str], str]]): (news_id, article hash, chunk ids, collection)
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO articles (news_id, article_hash, chunk_ids, updated_at, collection) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(str(news_id), article_hash, json.dumps(chunk_ids), now, collection)
+                 for news_id, article_hash, chunk_ids, collection in entries]
+            )
+            self._conn.commit()
+
+    def count(self) -> int:
+        """
+        Return the number of articles recorded.
+
+        Returns:
+            int: Number of rows
+        """
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def manifest_path_for(persist_directory: str) -> str:
+    """
+    Return the manifest path for a ChromaDB directory.
+
+    The manifest lives next to the collection it describes, so deleting the
+    ChromaDB directory also forgets what was ingested into it.
+
+    Args:
+        persist_directory (str): Directory of the ChromaDB
+
+    Returns:
+        str: Path of the manifest SQLite file
+    """
+    return os.path.join(persist_directory, "ingest_manifest.sqlite3")
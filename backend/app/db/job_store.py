@@ -0,0 +1,300 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+
+class QueueFullError(Exception):
+    """Raised by `JobStore.enqueue` when the queue already holds `max_queued` jobs."""
+
+
+class JobStore:
+    """
+    Durable SQLite queue of query jobs, shared by every worker on the host.
+
+    A job moves from queued to running when a worker claims it, and to done or failed
+    when it finishes. Running jobs hold a lease the worker keeps renewing; a job whose
+    lease expires (its worker crashed or was killed) is put back in the queue by the
+    next claim, until it has been attempted `max_attempts` times.
+    """
+
+    def __init__(self,
+                 path: str = "./backend/storage/jobs.sqlite3",
+                 max_queued: int = 100,
+                 max_attempts: int = 3,
+                 retention: float = 24 * 3600):
+        self.path = path
+        self.max_queued = max_queued
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, request TEXT NOT NULL, params TEXT NOT NULL, "
+            "stage TEXT, progress TEXT, result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0, "
+            "lease_until REAL, created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at)")
+        self._conn.commit()
+
+    def enqueue(self, request: Dict[str, Any], params: Dict[str, Any]) -> str:
+        """
+        Add a job to the queue.
+
+        Args:
+            request (Dict[str, Any]): Query request body
+            params (Dict[str, Any]): Pipeline options such as mode and retrieval
+
+        Returns:
+            str: Job id
+
+        Raises:
+            QueueFullError: If `max_queued` jobs are already waiting
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            (queued,) = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()
+            if queued >= self.max_queued:
+                raise QueueFullError(f"Job queue is full ({queued} queued)")
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, request, params, created_at) VALUES (?, 'queued', ?, ?, ?)",
+                (job_id, json.dumps(request, ensure_ascii=False, default=str), json.dumps(params), time.time())
+            )
+            self._conn.commit()
+        return job_id
+
+    def claim(self, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        """
+        Take the oldest queued job and mark it running, first re-queuing jobs with expired leases.
+
+        Args:
+            lease_seconds (float): How long the job stays claimed without a `renew`
+
+        Returns:
+            Optional[Dict[str, Any]]: The claimed job (see `get`), or None if the queue is empty
+        """
+        now = time.time()
+        with self._lock:
+            self._recover(now)
+            while True:
+                row = self._conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    self._conn.commit()
+                    return None
+                # Another process may have claimed the same row since the SELECT
+                claimed = self._conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_until = ?, "
+                    "started_at = ?, stage = NULL, progress = NULL WHERE id = ? AND status = 'queued'",
+                    (now + lease_seconds, now, row[0])
+                ).rowcount
+                self._conn.commit()
+                if claimed:
+                    break
+        return self.get(row[0])
+
+    def release(self, job_id: str) -> None:
+        """
+        Put a running job back in the queue without counting the attempt, e.g. on shutdown.
+
+        Args:
+            job_id (str): Job id
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = MAX(attempts - 1, 0), lease_until = NULL "
+                "WHERE id = ? AND status = 'running'", (job_id,)
+            )
+            self._conn.commit()
+
+    def _recover(self, now: float) -> None:
+        expired = self._conn.execute(
+            "SELECT id, attempts FROM jobs WHERE status = 'running' AND lease_until < ?", (now,)
+        ).fetchall()
+        for job_id, attempts in expired:
+            if attempts >= self.max_attempts:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, finished_at = ?, lease_until = NULL WHERE id = ?",
+                    (f"Worker lost the job {attempts} times", now, job_id)
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'queued', lease_until = NULL WHERE id = ?", (job_id,)
+                )
+        if self.retention:
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (now - self.retention,)
+            )
+
+    def renew(self, job_id: str, lease_seconds: float) -> None:
+        """
+        Extend the lease of a running job.
+
+        Args:
+            job_id (str): Job id
+            lease_seconds (float): New lease length from now
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND status = 'running'",
+                (time.time() + lease_seconds, job_id)
+            )
+            self._conn.commit()
+
+    def update_progress(self, job_id: str, stage: Optional[str], progress: Dict[str, Any]) -> None:
+        """
+        Record the stage a running job is in and the time spent in finished stages.
+
+        Args:
+            job_id (str): Job id
+            stage (Optional[str]): Current stage, or None to keep the recorded one
+            progress (Dict[str, Any]): Progress details, e.g. milliseconds per finished stage
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET stage = COALESCE(?, stage), progress = ? WHERE id = ? AND status = 'running'",
+                (stage, json.dumps(progress), job_id)
+            )
+            self._conn.commit()
+
+    def complete(self, job_id: str, result: Dict[str, Any], progress: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Store the result of a job and mark it done.
+
+        Args:
+            job_id (str): Job id
+            result (Dict[str, Any]): Query response
+            progress (Optional[Dict[str, Any]], optional): Final progress details. Defaults to None.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'done', stage = 'done', result = ?, progress = COALESCE(?, progress), "
+                "finished_at = ?, lease_until = NULL WHERE id = ?",
+                (json.dumps(result, ensure_ascii=False, default=str),
+                 json.dumps(progress) if progress is not None else None, time.time(), job_id)
+            )
+            self._conn.commit()
+
+    def fail(self, job_id: str, error: str) -> None:
+        """
+        Mark a job failed.
+
+        Args:
+            job_id (str): Job id
+            error (str): Error message shown to the client
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ?, lease_until = NULL WHERE id = ?",
+                (error, time.time(), job_id)
+            )
+            self._conn.commit()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a job.
+
+        Args:
+            job_id (str): Job id
+
+        Returns:
+            Optional[Dict[str, Any]]: id, status, request, params, stage, progress, result, error,
+            attempts, created_at, started_at, finished_at and, for queued jobs, queue_position;
+            None if the job does not exist
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, request, params, stage, progress, result, error, attempts, "
+                "created_at, started_at, finished_at FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            job = {
+                "id": row[0],
+                "status": row[1],
+                "request": json.loads(row[2]),
+                "params": json.loads(row[3]),
+                "stage": row[4],
+                "progress": json.loads(row[5]) if row[5] else {},
+                "result": json.loads(row[6]) if row[6] else None,
+                "error": row[7],
+                "attempts": row[8],
+                "created_at": row[9],
+                "started_at": row[10],
+                "finished_at": row[11],
+            }
+            if job["status"] == "queued":
+                (ahead,) = self._conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created_at < ?", (job["created_at"],)
+                ).fetchone()
+                job["queue_position"] = ahead
+        return job
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Return the number of jobs per status.
+
+        Returns:
+            Dict[str, int]: Count for each of queued, running, done and failed
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {"queued": 0, "running": 0, "done": 0, "failed": 0, **dict(rows)}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+_store: Optional[JobStore] = None
+_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    """
+    Return the process-wide job store configured from the environment.
+
+    Environment variables:
+        JOBS_DB_PATH: SQLite file path. Defaults to './backend/storage/jobs.sqlite3'.
+        JOBS_MAX_QUEUED: Queued jobs accepted before POST /api/jobs answers 429. Defaults to 100.
+        JOBS_MAX_ATTEMPTS: Times a job is retried after its worker died. Defaults to 3.
+        JOBS_RETENTION_SECONDS: How long finished jobs are kept. Defaults to one day.
+
+    Returns:
+        JobStore: Shared store instance
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = JobStore(
+                path=os.getenv("JOBS_DB_PATH", "./backend/storage/jobs.sqlite3"),
+                max_queued=int(os.getenv("JOBS_MAX_QUEUED", "100")),
+                max_attempts=int(os.getenv("JOBS_MAX_ATTEMPTS", "3")),
+                retention=float(os.getenv("JOBS_RETENTION_SECONDS", str(24 * 3600))),
+            )
+        return _store
+
+
+def set_job_store(store: Optional[JobStore]) -> None:
+    """
+    Replace the process-wide job store, e.g. with one in a temporary directory.
+
+    Args:
+        store (Optional[JobStore]): Store to use, or None to recreate it from the environment
+    """
+    global _store
+    with _store_lock:
+        _store = store
@@ -0,0 +1,90 @@
+import calendar
+import re
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+PARTITION_PREFIX = "news_"
+_PARTITION_RE = re.compile(r"^news_(\d{4})_(\d{2})$")
+
+
+def partition_name(news_date: Any) -> Optional[str]:
+    """
+    Return the monthly Chroma collection an article belongs to.
+
+    Args:
+        news_date (Any): Article date as 'YYYY-MM-DD' (or a date)
+
+    Returns:
+        Optional[str]: e.g. 'news_2024_05', or None if the date cannot be parsed
+    """
+    match = re.match(r"^(\d{4})-(\d{2})", str(news_date or ""))
+    if not match or not 1 <= int(match.group(2)) <= 12:
+        return None
+    return f"{PARTITION_PREFIX}{match.group(1)}_{match.group(2)}"
+
+
+def partition_bounds(name: str) -> Optional[Tuple[date, date]]:
+    """
+    Return the first and last day covered by a monthly partition.
+
+    Args:
+        name (str): Collection name
+
+    Returns:
+        Optional[Tuple[date, date]]: (first day, last day), or None if `name` is not a partition
+    """
+    match = _PARTITION_RE.match(name)
+    if not match:
+        return None
+    year, month = int(match.group(1)), int(match.group(2))
+    if not 1 <= month <= 12:
+        return None
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def date_filter(start: date, end: date) -> Dict[str, Any]:
+    """
+    Build a Chroma metadata filter matching chunks dated within [start, end].
+
+    Dates are stored as 'YYYY-MM-DD' strings, which Chroma can only compare for
+    equality, so the filter lists the days of the range.
+
+    Args:
+        start (date): First day, inclusive
+        end (date): Last day, inclusive
+
+    Returns:
+        Dict[str, Any]: Chroma `where` filter
+    """
+    days = [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+    return {"date": {"$in": days}}
+
+
+def plan_partition_search(names: Iterable[str],
+                          start: Optional[date] = None,
+                          end: Optional[date] = None) -> List[Tuple[str, Optional[Dict[str, Any]]]]:
+    """
+    Pick the partitions overlapping a date range and the filter each one needs.
+
+    Partitions entirely inside the range are searched without a filter; only the
+    partial months at either end of the range are filtered by day.
+
+    Args:
+        names (Iterable[str]): Existing collection names; non-partition names are ignored
+        start (Optional[date], optional): First day of the range. Defaults to unbounded.
+        end (Optional[date], optional): Last day of the range. Defaults to unbounded.
+
+    Returns:
+        List[Tuple[str, Optional[Dict[str, Any]]]]: (partition, filter or None), newest first
+    """
+    plan = []
+    for name in names:
+        bounds = partition_bounds(name)
+        if bounds is None:
+            continue
+        first, last = bounds
+        if (start and last < start) or (end and first > end):
+            continue
+        lo, hi = max(first, start or first), min(last, end or last)
+        plan.append((name, None if (lo, hi) == (first, last) else date_filter(lo, hi)))
+    return sorted(plan, reverse=True, key=lambda item: item[0])
@@ -0,0 +1,105 @@
+from typing import Any, Dict, Optional
+from pymongo import ASCENDING
+from backend.app.db.mongo_connector import connect_db
+
+
+class GradedSummaryStore:
+    """
+    MongoDB-backed store of graded summaries, one per (news_id, length bucket).
+
+    Graded summaries depend only on the article and the length bucket its score
+    falls in, so they can be generated once and reused by every query. Each one
+    records the hash of the article content it was generated from, and lookups
+    with a different hash miss, so edited articles are summarized again.
+    """
+
+    def __init__(self, collection: Any):
+        self.collection = collection
+        # Created on the first write, so building the store never waits on the server
+        self._indexed = False
+
+    def _ensure_index(self) -> None:
+        if not self._indexed:
+            self.collection.create_index([("news_id", ASCENDING), ("bucket", ASCENDING)], unique=True)
+            self._indexed = True
+
+    def get(self, news_id: int, bucket: int, content_hash: str) -> Optional[str]:
+        """
+        Look up the stored summary for an article and bucket.
+
+        Args:
+            news_id (int): News ID of the article
+            bucket (int): Lower bound of the score bucket (20, 30, 50 or 70)
+            content_hash (str): Hash of the current article content
+
+        Returns:
+            Optional[str]: The stored summary, or None if it has not been generated yet
+                or was generated from other content
+        """
+        doc = self.collection.find_one({"news_id": int(news_id), "bucket": bucket},
+                                       {"summary": 1, "content_hash": 1})
+        return doc["summary"] if doc and doc.get("content_hash") == content_hash else None
+
+    def get_many(self, content_hashes: Dict[int, str]) -> Dict[int, Dict[int, str]]:
+        """
+        Fetch all stored buckets for several articles in one query.
+
+        Args:
+            content_hashes (Dict[int, str]): Mapping of news_id to the hash of its current content
+
+        Returns:
+            Dict[int, Dict[int, str]]: Mapping of news_id to {bucket: summary}, without
+                summaries generated from other content
+        """
+        wanted = {int(news_id): content_hash for news_id, content_hash in content_hashes.items()}
+        summaries: Dict[int, Dict[int, str]] = {}
+        cursor = self.collection.find({"news_id": {"$in": list(wanted)}},
+                                      {"news_id": 1, "bucket": 1, "summary": 1, "content_hash": 1})
+        for doc in cursor:
+            if doc.get("content_hash") == wanted[doc["news_id"]]:
+                summaries.setdefault(doc["news_id"], {})[doc["bucket"]] = doc["summary"]
+        return summaries
+
+    def put(self, news_id: int, bucket: int, summary: str, content_hash: str) -> None:
+        """
+        Store (or replace) the summary for an article and bucket.
+
+        Args:
+            news_id (int): News ID of the article
+            bucket (int): Lower bound of the score bucket
+            summary (str): Generated summary text
+            content_hash (str): Hash of the article content the summary was generated from
+        """
+        self._ensure_index()
+        self.collection.update_one(
+            {"news_id": int(news_id), "bucket": bucket},
+            {"$set": {"summary": summary, "content_hash": content_hash}},
+            upsert=True
+        )
+
+
+_store: Optional[GradedSummaryStore] = None
+
+
+def get_summary_store() -> GradedSummaryStore:
+    """
+    Return the shared graded summary store backed by news_db.graded_summaries.
+
+    Returns:
+        GradedSummaryStore: Shared store instance
+    """
+    global _store
+    if _store is None:
+        _store = GradedSummaryStore(connect_db()["graded_summaries"])
+    return _store
+
+
+def set_summary_store(store: Optional[GradedSummaryStore]) -> None:
+    """
+    Replace the shared graded summary store, e.g. with one backed by mongomock.
+
+    Args:
+        store (Optional[GradedSummaryStore]): Store to use, or None to reconnect lazily
+    """
+    global _store
+    _store = store
@@ -0,0 +1,248 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+
+class LLMCache:
+    """
+    Two-tier, content-addressed cache for LLM responses.
+
+    Entries are keyed on (provider, model, temperature, prompt hash). Lookups hit an
+    in-memory LRU first and fall back to a SQLite file, so responses survive restarts
+    and are shared between worker processes on the same host. Both tiers expire
+    entries after `ttl` seconds; the disk tier evicts least recently used rows once it
+    holds more than `max_disk_entries`.
+
+    Disk hits do not write: their access times are batched and flushed every
+    `touch_batch` hits or with the next `set`. Async callers use `get_async` and
+    `set_async`, which run the SQLite work in a thread instead of on the event loop.
+    """
+
+    def __init__(self,
+                 path: str = "./backend/storage/llm_cache.sqlite3",
+                 memory_size: int = 1024,
+                 max_disk_entries: int = 100_000,
+                 ttl: float = 7 * 24 * 3600,
+                 enabled: bool = True,
+                 touch_batch: int = 64):
+        self.path = path
+        self.memory_size = memory_size
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self.touch_batch = touch_batch
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._writes_since_evict = 0
+        # Access times of disk hits not yet written back
+        self._touched: Dict[str, float] = {}
+
+    @staticmethod
+    def make_key(provider: str, model: str, temperature: Optional[float], prompt: str) -> str:
+        """
+        Build the cache key for one LLM call.
+
+        Args:
+            provider (str): Provider name, e.g. 'groq'
+            model (str): Model name
+            temperature (Optional[float]): Sampling temperature, None for the provider default
+            prompt (str): Full prompt text
+
+        Returns:
+            str: Hex digest identifying the call
+        """
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        raw = json.dumps([provider, model, temperature, prompt_hash])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _get_conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at)")
+            self._conn = conn
+        return self._conn
+
+    def _remember(self, key: str, value: str, created_at: float) -> None:
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Args:
+            key (str): Key from `make_key`
+
+        Returns:
+            Optional[str]: The cached response, or None on a miss or expired entry
+        """
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[1] < self.ttl:
+                self._memory.move_to_end(key)
+                self.hits_memory += 1
+                return entry[0]
+            self._memory.pop(key, None)
+
+            conn = self._get_conn()
+            row = conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] < self.ttl:
+                self._touched[key] = now
+                if len(self._touched) >= self.touch_batch:
+                    self._flush_touched(conn)
+                    conn.commit()
+                self._remember(key, row[0], row[1])
+                self.hits_disk += 1
+                return row[0]
+            if row:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                conn.commit()
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        """
+        Store a response in both tiers.
+
+        Args:
+            key (str): Key from `make_key`
+            value (str): Response text to cache
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            conn = self._get_conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            self._writes_since_evict += 1
+            self._flush_touched(conn)
+            # Eviction scans the table, so only run it every so often
+            if self._writes_since_evict >= 100:
+                self._evict(conn, now)
+            conn.commit()
+
+    async def get_async(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response without blocking the event loop (see `get`).
+
+        Args:
+            key (str): Key from `make_key`
+
+        Returns:
+            Optional[str]: The cached response, or None on a miss or expired entry
+        """
+        if not self.enabled:
+            return None
+        return await asyncio.to_thread(self.get, key)
+
+    async def set_async(self, key: str, value: str) -> None:
+        """
+        Store a response without blocking the event loop (see `set`).
+
+        Args:
+            key (str): Key from `make_key`
+            value (str): Response text to cache
+        """
+        if self.enabled:
+            await asyncio.to_thread(self.set, key, value)
+
+    def _flush_touched(self, conn: sqlite3.Connection) -> None:
+        if self._touched:
+            conn.executemany("UPDATE llm_cache SET accessed_at = ? WHERE key = ?",
+                             [(accessed_at, key) for key, accessed_at in self._touched.items()])
+            self._touched.clear()
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        self._writes_since_evict = 0
+        conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+        (count,) = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        if count > self.max_disk_entries:
+            conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_disk_entries,)
+            )
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return hit/miss counters since the cache was created.
+
+        Returns:
+            Dict[str, int]: hits_memory, hits_disk, misses and current memory entries
+        """
+        return {
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "memory_entries": len(self._memory),
+        }
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """
+    Return the process-wide LLM response cache configured from the environment.
+
+    Environment variables:
+        LLM_CACHE_ENABLED: '0' disables caching. Defaults to '1'.
+        LLM_CACHE_PATH: SQLite file path. Defaults to './backend/storage/llm_cache.sqlite3'.
+        LLM_CACHE_TTL: Entry lifetime in seconds. Defaults to one week.
+        LLM_CACHE_MAX_ENTRIES: Maximum rows kept on disk. Defaults to 100000.
+
+    Returns:
+        LLMCache: Shared cache instance
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache(
+                path=os.getenv("LLM_CACHE_PATH", "./backend/storage/llm_cache.sqlite3"),
+                ttl=float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600))),
+                max_disk_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "100000")),
+                enabled=os.getenv("LLM_CACHE_ENABLED", "1") != "0",
+            )
+        return _cache
+
+
+def set_llm_cache(cache: Optional[LLMCache]) -> None:
+    """
+    Replace the process-wide LLM response cache.
+
+    Args:
+        cache (Optional[LLMCache]): Cache to use from now on, or None to recreate it from the environment
+    """
+    global _cache
+    with _cache_lock:
+        _cache = cache
@@ -1,20 +1,73 @@
-import os
-import requests
-from dotenv import load_dotenv
+from typing import Optional
+from backend.app.llm_clients.cache import LLMCache, get_llm_cache
+from backend.app.llm_clients.scheduler import get_scheduler
+from backend.app.llm_clients.transport import get_transport
+from backend.app.telemetry import llm_call
 
-# Load environment variables from .env file
-load_dotenv()
 
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+def _build_groq_payload(prompt: str, model_name: str, temperature: Optional[float] = None,
+                        max_tokens: Optional[int] = None) -> dict:
+    """
+    Build the JSON body for a Groq chat completion request.
+
+    Args:
+        prompt (str): The input prompt to send to the model
+        model_name (str): The name of the Groq model to use
+        temperature (Optional[float], optional): Sampling temperature. Defaults to the provider default.
+        max_tokens (Optional[int], optional): Reply length cap. Defaults to none.
+
+    Returns:
+        dict: Request body
+    """
+    payload = {
+        "model": model_name,
+        "messages": [{"role": "user", "content": prompt}]
+    }
+    if temperature is not None:
+        payload["temperature"] = temperature
+    if max_tokens is not None:
+        payload["max_tokens"] = max_tokens
+    return payload
+
 
-def call_groq(prompt: str, model_name: str = "llama-3.3-70b-versatile") -> str:
+def groq_cache_key(prompt: str, model_name: str = "llama-3.3-70b-versatile",
+                   temperature: Optional[float] = None) -> str:
+    """
+    Return the LLM response cache key of a Groq call.
+
+    Args:
+        prompt (str): The input prompt
+        model_name (str, optional): The Groq model. Defaults to 'llama-3.3-70b-versatile'.
+        temperature (Optional[float], optional): Sampling temperature. Defaults to the provider default.
+
+    Returns:
+        str: Cache key
+    """
+    return LLMCache.make_key("groq", model_name, temperature, prompt)
+
+
+def call_groq(prompt: str, model_name: str = "llama-3.3-70b-versatile", timeout: Optional[float] = None,
+              use_cache: bool = True, temperature: Optional[float] = None,
+              max_tokens: Optional[int] = None) -> str:
     """
     Call Groq API to generate a response based on the given prompt.
+
+    The request waits for a slot from the LLM scheduler, then goes through the shared
+    Groq transport, which pools connections, applies the provider rate limits and
+    retries 429/5xx responses with backoff.
+    Latency, outcome and token usage are recorded in the LLM call metrics.
+    Identical prompts are answered from the LLM response cache unless `use_cache` is False.
     
     Args:
         prompt (str): The input prompt to send to the model
         model_name (str, optional): The name of the Groq model to use. 
                                   Defaults to 'llama-3.3-70b-versatile'.
+        timeout (Optional[float], optional): Per-call timeout in seconds.
+                                  Defaults to the provider timeout.
+        use_cache (bool, optional): Read and write the LLM response cache. Pass False when
+                                  repeated calls must return independent samples. Defaults to True.
+        temperature (Optional[float], optional): Sampling temperature. Defaults to the provider default.
+        max_tokens (Optional[int], optional): Reply length cap. Defaults to none.
     
     Returns:
         str: The generated response from the model
@@ -22,19 +75,60 @@ def call_groq(prompt: str, model_name: str = "llama-3.3-70b-versatile") -> str:
     Raises:
         Exception: If the API call fails, if API key is not set, or if the response is not successful
     """
-    if not GROQ_API_KEY:
-        raise Exception("GROQ_API_KEY environment variable is not set")
-        
-    url = "https://api.groq.com/openai/v1/chat/completions"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {GROQ_API_KEY}"
-    }
-    data = {
-        "model": model_name,
-        "messages": [{"role": "user", "content": prompt}]
-    }
-    res = requests.post(url, headers=headers, json=data)
-    if res.status_code == 200:
-        return res.json()["choices"][0]["message"]["content"]
-    raise Exception(f"Groq API Error {res.status_code}: {res.text}")
+    payload = _build_groq_payload(prompt, model_name, temperature, max_tokens)
+    key = groq_cache_key(prompt, model_name, temperature)
+    if use_cache:
+        cached = get_llm_cache().get(key)
+        if cached is not None:
+            return cached
+
+    with get_scheduler().slot("groq"), llm_call("groq", model_name) as call:
+        res = get_transport("groq").post(payload, timeout=timeout)
+        call.record_usage(res)
+    content = res["choices"][0]["message"]["content"]
+    if use_cache:
+        get_llm_cache().set(key, content)
+    return content
+
+
+async def call_groq_async(prompt: str, model_name: str = "llama-3.3-70b-versatile",
+                          timeout: Optional[float] = None, use_cache: bool = True,
+                          temperature: Optional[float] = None, max_tokens: Optional[int] = None) -> str:
+    """
+    Asynchronously call Groq API to generate a response based on the given prompt.
+
+    Non-blocking counterpart of `call_groq`, used by the async scoring pipeline so
+    many scoring and summary calls can be in flight on a single event loop.
+
+    Args:
+        prompt (str): The input prompt to send to the model
+        model_name (str, optional): The name of the Groq model to use.
+                                  Defaults to 'llama-3.3-70b-versatile'.
+        timeout (Optional[float], optional): Per-call timeout in seconds.
+                                  Defaults to the provider timeout.
+        use_cache (bool, optional): Read and write the LLM response cache. Pass False when
+                                  repeated calls must return independent samples. Defaults to True.
+        temperature (Optional[float], optional): Sampling temperature. Defaults to the provider default.
+        max_tokens (Optional[int], optional): Reply length cap. Defaults to none.
+
+    Returns:
+        str: The generated response from the model
+
+    Raises:
+        Exception: If the API call fails, if API key is not set, or if the response is not successful
+    """
+    payload = _build_groq_payload(prompt, model_name, temperature, max_tokens)
+    key = groq_cache_key(prompt, model_name, temperature)
+    if use_cache:
+        cached = await get_llm_cache().get_async(key)
+        if cached is not None:
+            return cached
+
+    async with get_scheduler().slot_async("groq"):
+        with llm_call("groq", model_name) as call:
+            res = await get_transport("groq").post_async(payload, timeout=timeout)
+            call.record_usage(res)
+    content = res["choices"][0]["message"]["content"]
+    if use_cache:
+        await get_llm_cache().set_async(key, content)
+    return content
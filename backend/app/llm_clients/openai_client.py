@@ -1,16 +1,62 @@
-from openai import OpenAI
-from dotenv import load_dotenv
-import os
+from typing import AsyncIterator, Optional
+from backend.app.llm_clients.cache import LLMCache, get_llm_cache
+from backend.app.llm_clients.scheduler import get_scheduler
+from backend.app.llm_clients.transport import get_transport
+from backend.app.telemetry import llm_call
 
-# Load environment variables from .env file
-load_dotenv()
+def _build_openai_payload(prompt: str, model_name: str = "gpt-4o-mini", temperature: float = 0.7,
+                          max_tokens: int = 2000) -> dict:
+    """
+    Build the JSON body for an OpenAI chat completion request.
+
+    Args:
+        prompt (str): The prompt to send to OpenAI
+        model_name (str, optional): The name of the OpenAI model to use. Defaults to 'gpt-4o-mini'.
+        temperature (float, optional): Sampling temperature. Defaults to 0.7.
+        max_tokens (int, optional): Reply length cap. Defaults to 2000.
+
+    Returns:
+        dict: Request body
+    """
+    return {
+        "model": model_name,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": temperature,
+        "max_tokens": max_tokens
+    }
 
-def call_openai(prompt: str) -> str:
+def openai_cache_key(prompt: str, model_name: str = "gpt-4o-mini", temperature: float = 0.7) -> str:
+    """
+    Return the LLM response cache key of an OpenAI call.
+
+    Args:
+        prompt (str): The prompt
+        model_name (str, optional): The OpenAI model. Defaults to 'gpt-4o-mini'.
+        temperature (float, optional): Sampling temperature. Defaults to 0.7.
+
+    Returns:
+        str: Cache key
+    """
+    return LLMCache.make_key("openai", model_name, temperature, prompt)
+
+def call_openai(prompt: str, model_name: str = "gpt-4o-mini", timeout: Optional[float] = None,
+                use_cache: bool = True, temperature: float = 0.7, max_tokens: int = 2000) -> str:
     """
     Call OpenAI API to generate a response.
+
+    The request waits for a slot from the LLM scheduler, then goes through the shared
+    OpenAI transport instead of a new client per call, so connections are reused and
+    429/5xx responses are retried.
+    Identical prompts are answered from the LLM response cache unless `use_cache` is False.
     
     Args:
         prompt (str): The prompt to send to OpenAI
+        model_name (str, optional): The name of the OpenAI model to use. Defaults to 'gpt-4o-mini'.
+        timeout (Optional[float], optional): Per-call timeout in seconds.
+                                  Defaults to the provider timeout.
+        use_cache (bool, optional): Read and write the LLM response cache. Defaults to True.
+        temperature (float, optional): Sampling temperature. Defaults to 0.7.
+        max_tokens (int, optional): Reply length cap. Defaults to 2000.
         
     Returns:
         str: The generated response
@@ -18,19 +64,104 @@ def call_openai(prompt: str) -> str:
     Raises:
         Exception: If OPENAI_API_KEY is not set or API call fails
     """
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise Exception("OPENAI_API_KEY environment variable is not set")
-    
-    client = OpenAI(api_key=api_key)
-    
+    payload = _build_openai_payload(prompt, model_name, temperature, max_tokens)
+    key = openai_cache_key(prompt, model_name, temperature)
+    if use_cache:
+        cached = get_llm_cache().get(key)
+        if cached is not None:
+            return cached
+
+    try:
+        with get_scheduler().slot("openai"), llm_call("openai", payload["model"]) as call:
+            response = get_transport("openai").post(payload, timeout=timeout)
+            call.record_usage(response)
+        content = response["choices"][0]["message"]["content"]
+    except Exception as e:
+        raise Exception(f"OpenAI API call failed: {str(e)}")
+    if use_cache:
+        get_llm_cache().set(key, content)
+    return content
+
+async def call_openai_async(prompt: str, model_name: str = "gpt-4o-mini", timeout: Optional[float] = None,
+                            use_cache: bool = True, temperature: float = 0.7, max_tokens: int = 2000) -> str:
+    """
+    Asynchronously call OpenAI API to generate a response.
+
+    Args:
+        prompt (str): The prompt to send to OpenAI
+        model_name (str, optional): The name of the OpenAI model to use. Defaults to 'gpt-4o-mini'.
+        timeout (Optional[float], optional): Per-call timeout in seconds.
+                                  Defaults to the provider timeout.
+        use_cache (bool, optional): Read and write the LLM response cache. Defaults to True.
+        temperature (float, optional): Sampling temperature. Defaults to 0.7.
+        max_tokens (int, optional): Reply length cap. Defaults to 2000.
+
+    Returns:
+        str: The generated response
+
+    Raises:
+        Exception: If OPENAI_API_KEY is not set or API call fails
+    """
+    payload = _build_openai_payload(prompt, model_name, temperature, max_tokens)
+    key = openai_cache_key(prompt, model_name, temperature)
+    if use_cache:
+        cached = await get_llm_cache().get_async(key)
+        if cached is not None:
+            return cached
+
+    try:
+        async with get_scheduler().slot_async("openai"):
+            with llm_call("openai", payload["model"]) as call:
+                response = await get_transport("openai").post_async(payload, timeout=timeout)
+                call.record_usage(response)
+        content = response["choices"][0]["message"]["content"]
+    except Exception as e:
+        raise Exception(f"OpenAI API call failed: {str(e)}")
+    if use_cache:
+        await get_llm_cache().set_async(key, content)
+    return content
+
+async def stream_openai_async(prompt: str, model_name: str = "gpt-4o-mini", timeout: Optional[float] = None,
+                              use_cache: bool = True, temperature: float = 0.7,
+                              max_tokens: int = 2000) -> AsyncIterator[str]:
+    """
+    Stream an OpenAI response, yielding text deltas as they are generated.
+
+    A cached response is yielded in one piece; a fully streamed response is
+    written to the cache once the stream completes.
+
+    Args:
+        prompt (str): The prompt to send to OpenAI
+        model_name (str, optional): The name of the OpenAI model to use. Defaults to 'gpt-4o-mini'.
+        timeout (Optional[float], optional): Per-call timeout in seconds.
+                                  Defaults to the provider timeout.
+        use_cache (bool, optional): Read and write the LLM response cache. Defaults to True.
+        temperature (float, optional): Sampling temperature. Defaults to 0.7.
+        max_tokens (int, optional): Reply length cap. Defaults to 2000.
+
+    Yields:
+        str: The next piece of the generated response
+
+    Raises:
+        Exception: If OPENAI_API_KEY is not set or API call fails
+    """
+    payload = _build_openai_payload(prompt, model_name, temperature, max_tokens)
+    key = openai_cache_key(prompt, model_name, temperature)
+    if use_cache:
+        cached = await get_llm_cache().get_async(key)
+        if cached is not None:
+            yield cached
+            return
+
+    parts = []
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=2000
-        )
-        return response.choices[0].message.content
+        # Streamed responses carry no usage, so only latency and outcome are recorded
+        async with get_scheduler().slot_async("openai"):
+            with llm_call("openai", payload["model"]):
+                async for delta in get_transport("openai").stream_async(payload, timeout=timeout):
+                    parts.append(delta)
+                    yield delta
     except Exception as e:
         raise Exception(f"OpenAI API call failed: {str(e)}")
+    if use_cache:
+        await get_llm_cache().set_async(key, "".join(parts))
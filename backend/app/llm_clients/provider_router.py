@@ -0,0 +1,573 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterable, List, Optional
+
+from dotenv import load_dotenv
+from backend.app.llm_clients.cache import get_llm_cache
+from backend.app.llm_clients.groq_client import call_groq, call_groq_async, groq_cache_key
+from backend.app.llm_clients.openai_client import (
+    call_openai, call_openai_async, openai_cache_key, stream_openai_async
+)
+from backend.app.telemetry import LLM_FALLBACKS, LLM_HEDGES, LLM_PROVIDER_HEALTHY
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Provider/model order per task, overridable with LLM_ROUTE_<TASK>
+DEFAULT_ROUTES = {
+    "scoring": "groq:llama-3.3-70b-versatile,openai:gpt-4o-mini",
+    "summary": "groq:llama-3.3-70b-versatile,openai:gpt-4o-mini",
+    "generation": "openai:gpt-4o-mini,groq:llama-3.3-70b-versatile",
+}
+
+
+@dataclass(frozen=True)
+class TaskSettings:
+    """
+    Sampling settings of a task, sent to whichever target answers it.
+
+    Attributes:
+        temperature (Optional[float]): Sampling temperature, None for the provider default
+        max_tokens (Optional[int]): Reply length cap, None for the provider default
+    """
+    temperature: Optional[float] = None
+    max_tokens: Optional[int] = None
+
+    def kwargs(self) -> Dict[str, Any]:
+        return {name: value for name, value in (("temperature", self.temperature), ("max_tokens", self.max_tokens))
+                if value is not None}
+
+
+# Scores and summaries keep the sampling they had on Groq when they fall back to another provider.
+# They are not length-capped, so a reasoning reply is never cut off before its final score.
+TASK_SETTINGS = {
+    "scoring": TaskSettings(temperature=1.0),
+    "summary": TaskSettings(temperature=1.0),
+    "generation": TaskSettings(temperature=0.7, max_tokens=2000),
+}
+
+# Tasks whose replies go to the LLM response cache; generated articles are sampled fresh every time
+DEFAULT_CACHE_TASKS = ("scoring", "summary")
+
+
+@dataclass(frozen=True)
+class LLMTarget:
+    """
+    One provider/model a task can be sent to.
+
+    Attributes:
+        provider (str): Backend name, e.g. 'groq'
+        model (str): Model name passed to the backend
+    """
+    provider: str
+    model: str
+
+    @property
+    def name(self) -> str:
+        return f"{self.provider}/{self.model}"
+
+
+@dataclass
+class LLMBackend:
+    """
+    Calls of one provider, all taking (prompt, model_name=, timeout=, use_cache=, temperature=, max_tokens=).
+
+    Attributes:
+        call (Callable[..., str]): Blocking call returning the reply
+        call_async (Callable[..., Awaitable[str]]): Non-blocking call returning the reply
+        stream_async (Optional[Callable[..., AsyncIterator[str]]]): Streaming call yielding
+            deltas; providers without one answer streams in a single piece
+        cache_key (Optional[Callable[[str, str, Optional[float]], str]]): LLM response cache key of
+            (prompt, model, temperature); the router reads and writes the cache itself, so hits are
+            not mistaken for fast provider replies
+    """
+    call: Callable[..., str]
+    call_async: Callable[..., Awaitable[str]]
+    stream_async: Optional[Callable[..., AsyncIterator[str]]] = None
+    cache_key: Optional[Callable[[str, str], str]] = None
+
+
+BACKENDS = {
+    "groq": LLMBackend(call_groq, call_groq_async, cache_key=groq_cache_key),
+    "openai": LLMBackend(call_openai, call_openai_async, stream_openai_async, cache_key=openai_cache_key),
+}
+
+
+def parse_route(spec: str) -> List[LLMTarget]:
+    """
+    Parse a route such as 'groq:llama-3.3-70b-versatile,openai:gpt-4o-mini'.
+
+    Args:
+        spec (str): Comma-separated provider:model pairs, in order of preference
+
+    Returns:
+        List[LLMTarget]: Targets in the same order
+    """
+    targets = []
+    for item in spec.split(","):
+        if item.strip():
+            provider, _, model = item.strip().partition(":")
+            targets.append(LLMTarget(provider.strip(), model.strip()))
+    return targets
+
+
+class ProviderHealth:
+    """
+    Recent latency and failures of one provider/model.
+
+    After `failure_threshold` consecutive failures the target is unhealthy for
+    `cooldown` seconds: routes try it last. The first call after the cooldown
+    probes it again, and one more failure makes it unhealthy again.
+    """
+
+    def __init__(self, target: LLMTarget, failure_threshold: int = 3, cooldown: float = 30.0, window: int = 200):
+        self.target = target
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.window = window
+        self.calls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+        # Latencies of successful calls per task, since tasks differ a lot in reply length
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        LLM_PROVIDER_HEALTHY.set(1, provider=target.provider, model=target.model)
+
+    def record_success(self, task: str, seconds: Optional[float] = None) -> None:
+        with self._lock:
+            self.calls += 1
+            self.consecutive_failures = 0
+            self.unhealthy_until = 0.0
+            if seconds is not None:
+                self._latencies.setdefault(task, deque(maxlen=self.window)).append(seconds)
+        LLM_PROVIDER_HEALTHY.set(1, provider=self.target.provider, model=self.target.model)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.calls += 1
+            self.failures += 1
+            self.consecutive_failures += 1
+            tripped = self.consecutive_failures >= self.failure_threshold
+            if tripped:
+                self.unhealthy_until = time.monotonic() + self.cooldown
+        if tripped:
+            logging.warning(f"🩺 {self.target.name} marked unhealthy for {self.cooldown:.0f}s "
+                            f"after {self.consecutive_failures} failures in a row")
+            LLM_PROVIDER_HEALTHY.set(0, provider=self.target.provider, model=self.target.model)
+
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    def p95(self, task: str, min_samples: int = 20) -> Optional[float]:
+        """
+        Return the 95th percentile latency of recent successful calls for a task.
+
+        Args:
+            task (str): Task name
+            min_samples (int, optional): Samples needed before the estimate is trusted. Defaults to 20.
+
+        Returns:
+            Optional[float]: Seconds, or None with fewer than `min_samples` samples
+        """
+        with self._lock:
+            latencies = sorted(self._latencies.get(task, ()))
+        if len(latencies) < max(1, min_samples):
+            return None
+        return latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            tasks = list(self._latencies)
+        return {
+            "healthy": self.healthy(),
+            "calls": self.calls,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "p95_seconds": {task: self.p95(task, min_samples=1) for task in tasks},
+        }
+
+
+class ProviderRouter:
+    """
+    Sends each LLM task to an ordered list of provider/models.
+
+    - Fallback: when a call fails, the next target of the route is tried.
+    - Hedging (async calls): when the first call has not answered within its
+      target's observed p95 for the task, a backup call goes to the next target
+      (or the same one if the route has only one), if that target is healthy and
+      has not failed in this call; the first reply wins and the other call is cancelled.
+    - Health: targets that keep failing are tried last until they recover.
+
+    Every target of a task gets the same `settings`. The LLM response cache is read
+    and written here, once per call and off the event loop for async calls, only for
+    `cache_tasks`; backends are always called with use_cache=False.
+    """
+
+    def __init__(self,
+                 routes: Dict[str, List[LLMTarget]],
+                 backends: Optional[Dict[str, LLMBackend]] = None,
+                 settings: Optional[Dict[str, TaskSettings]] = None,
+                 cache_tasks: Iterable[str] = DEFAULT_CACHE_TASKS,
+                 hedge: bool = True,
+                 hedge_min_samples: int = 20,
+                 failure_threshold: int = 3,
+                 cooldown: float = 30.0):
+        self.backends = BACKENDS if backends is None else backends
+        for task, targets in routes.items():
+            if not targets:
+                raise ValueError(f"Route for {task!r} has no targets")
+            for target in targets:
+                if target.provider not in self.backends:
+                    raise ValueError(f"Unknown LLM provider {target.provider!r} in route for {task!r}")
+        self.routes = routes
+        self.settings = TASK_SETTINGS if settings is None else settings
+        self.cache_tasks = frozenset(cache_tasks)
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self._health = {
+            target: ProviderHealth(target, failure_threshold, cooldown)
+            for targets in routes.values() for target in targets
+        }
+
+    def health(self, target: LLMTarget) -> ProviderHealth:
+        return self._health[target]
+
+    def targets(self, task: str) -> List[LLMTarget]:
+        """
+        Return the targets of a task in the order they will be tried: healthy ones first.
+
+        Args:
+            task (str): Task name, a key of the routes
+
+        Returns:
+            List[LLMTarget]: Ordered targets
+        """
+        route = self.routes[task]
+        return [t for t in route if self._health[t].healthy()] + [t for t in route if not self._health[t].healthy()]
+
+    def _cache_key(self, task: str, target: LLMTarget, prompt: str, use_cache: bool) -> Optional[str]:
+        backend = self.backends[target.provider]
+        if not use_cache or task not in self.cache_tasks or backend.cache_key is None:
+            return None
+        return backend.cache_key(prompt, target.model, self.task_settings(task).temperature)
+
+    def task_settings(self, task: str) -> TaskSettings:
+        return self.settings.get(task, TaskSettings())
+
+    def _attempt(self, task: str, target: LLMTarget, prompt: str, use_cache: bool, timeout: Optional[float]) -> str:
+        key = self._cache_key(task, target, prompt, use_cache)
+        if key is not None:
+            cached = get_llm_cache().get(key)
+            if cached is not None:
+                return cached
+        started = time.perf_counter()
+        try:
+            reply = self.backends[target.provider].call(prompt, model_name=target.model, timeout=timeout,
+                                                        use_cache=False, **self.task_settings(task).kwargs())
+        except Exception:
+            self._health[target].record_failure()
+            raise
+        self._health[target].record_success(task, time.perf_counter() - started)
+        if key is not None:
+            get_llm_cache().set(key, reply)
+        return reply
+
+    async def _attempt_async(self, task: str, target: LLMTarget, prompt: str, use_cache: bool,
+                             timeout: Optional[float]) -> str:
+        key = self._cache_key(task, target, prompt, use_cache)
+        if key is not None:
+            cached = await get_llm_cache().get_async(key)
+            if cached is not None:
+                return cached
+        started = time.perf_counter()
+        try:
+            backend = self.backends[target.provider]
+            reply = await backend.call_async(prompt, model_name=target.model, timeout=timeout, use_cache=False,
+                                             **self.task_settings(task).kwargs())
+        except Exception:
+            self._health[target].record_failure()
+            raise
+        self._health[target].record_success(task, time.perf_counter() - started)
+        if key is not None:
+            await get_llm_cache().set_async(key, reply)
+        return reply
+
+    def _fallback(self, task: str, target: LLMTarget, error: BaseException) -> None:
+        logging.warning(f"↪️ {task}: falling back to {target.name} after: {error}")
+        LLM_FALLBACKS.inc(task=task, provider=target.provider, model=target.model)
+
+    def call(self, task: str, prompt: str, use_cache: bool = True, timeout: Optional[float] = None) -> str:
+        """
+        Run a task on the first target that answers, falling back in route order.
+
+        Blocking calls are not hedged: a thread cannot be cancelled, so the losing
+        call would keep its connection and scheduler slot until it finished.
+
+        Args:
+            task (str): Task name, e.g. 'scoring'
+            prompt (str): The prompt
+            use_cache (bool, optional): Read and write the LLM response cache. Defaults to True.
+            timeout (Optional[float], optional): Per-call timeout in seconds. Defaults to the provider timeout.
+
+        Returns:
+            str: The reply
+
+        Raises:
+            Exception: The error of the last target if every target failed
+        """
+        error = None
+        for index, target in enumerate(self.targets(task)):
+            if index:
+                self._fallback(task, target, error)
+            try:
+                return self._attempt(task, target, prompt, use_cache, timeout)
+            except Exception as e:
+                error = e
+        raise error
+
+    async def call_async(self, task: str, prompt: str, use_cache: bool = True,
+                         timeout: Optional[float] = None) -> str:
+        """
+        Run a task with hedging and fallback, returning the first successful reply.
+
+        Args:
+            task (str): Task name, e.g. 'scoring'
+            prompt (str): The prompt
+            use_cache (bool, optional): Read and write the LLM response cache. Defaults to True.
+            timeout (Optional[float], optional): Per-call timeout in seconds. Defaults to the provider timeout.
+
+        Returns:
+            str: The reply
+
+        Raises:
+            Exception: The error of the last call if every call failed
+        """
+        targets = self.targets(task)
+        running: Dict[asyncio.Future, LLMTarget] = {}
+        hedged = False
+        error = None
+
+        def launch(target: LLMTarget) -> asyncio.Future:
+            call = asyncio.ensure_future(self._attempt_async(task, target, prompt, use_cache, timeout))
+            running[call] = target
+            return call
+
+        primary = launch(targets[0])
+        launched = 1
+        try:
+            while True:
+                delay = None
+                if self.hedge and not hedged and len(running) == 1:
+                    delay = self._health[next(iter(running.values()))].p95(task, self.hedge_min_samples)
+                done, _ = await asyncio.wait(running, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # Slower than usual for this target: race a backup call against a healthy
+                    # target that has not been tried yet (or the only one of a one-target route)
+                    hedged = True
+                    backup = None
+                    if launched < len(targets):
+                        if self._health[targets[launched]].healthy():
+                            backup = targets[launched]
+                            launched += 1
+                    elif len(targets) == 1 and self._health[targets[0]].healthy():
+                        backup = targets[0]
+                    if backup is None:
+                        continue
+                    logging.info(f"🏁 {task}: hedging with {backup.name} after {delay:.2f}s")
+                    LLM_HEDGES.inc(task=task, outcome="fired")
+                    launch(backup)
+                    continue
+
+                failed = [call for call in done if call.exception() is not None]
+                for call in done:
+                    running.pop(call)
+                winners = [call for call in done if call not in failed]
+                if winners:
+                    if hedged and winners[0] is not primary:
+                        LLM_HEDGES.inc(task=task, outcome="won")
+                    return winners[0].result()
+                error = failed[-1].exception()
+
+                if not running:
+                    if launched >= len(targets):
+                        raise error
+                    fallback = targets[launched]
+                    launched += 1
+                    self._fallback(task, fallback, error)
+                    launch(fallback)
+        finally:
+            for call in running:
+                call.cancel()
+
+    async def stream_async(self, task: str, prompt: str, use_cache: bool = True,
+                           timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        Stream a task's reply, falling back in route order until the first delta arrives.
+
+        Streams are not hedged; once output has been yielded, errors are raised.
+
+        Args:
+            task (str): Task name, e.g. 'generation'
+            prompt (str): The prompt
+            use_cache (bool, optional): Read and write the LLM response cache. Defaults to True.
+            timeout (Optional[float], optional): Per-call timeout in seconds. Defaults to the provider timeout.
+
+        Yields:
+            str: The next piece of the reply
+
+        Raises:
+            Exception: The error of the last target if every target failed before answering
+        """
+        error = None
+        for index, target in enumerate(self.targets(task)):
+            if index:
+                self._fallback(task, target, error)
+            stream = self.backends[target.provider].stream_async
+            if stream is None:
+                try:
+                    reply = await self._attempt_async(task, target, prompt, use_cache, timeout)
+                except Exception as e:
+                    error = e
+                    continue
+                yield reply
+                return
+
+            key = self._cache_key(task, target, prompt, use_cache)
+            if key is not None:
+                cached = await get_llm_cache().get_async(key)
+                if cached is not None:
+                    yield cached
+                    return
+            parts = []
+            try:
+                async for delta in stream(prompt, model_name=target.model, timeout=timeout, use_cache=False,
+                                          **self.task_settings(task).kwargs()):
+                    parts.append(delta)
+                    yield delta
+            except Exception as e:
+                self._health[target].record_failure()
+                if parts:
+                    raise
+                error = e
+                continue
+            self._health[target].record_success(task)
+            if key is not None:
+                await get_llm_cache().set_async(key, "".join(parts))
+            return
+        raise error
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the health of every target.
+
+        Returns:
+            Dict[str, Any]: healthy, calls, failures, consecutive_failures and p95 per task, by target name
+        """
+        return {target.name: health.as_dict() for target, health in self._health.items()}
+
+
+_router: Optional[ProviderRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_provider_router() -> ProviderRouter:
+    """
+    Return the process-wide provider router configured from the environment.
+
+    Environment variables:
+        LLM_ROUTE_SCORING, LLM_ROUTE_SUMMARY, LLM_ROUTE_GENERATION: provider:model pairs in order
+            of preference (see DEFAULT_ROUTES).
+        LLM_HEDGE_ENABLED: Set to 0 to disable hedged requests. Defaults to 1.
+        LLM_HEDGE_MIN_SAMPLES: Replies observed per target and task before hedging starts. Defaults to 20.
+        LLM_FAILURE_THRESHOLD: Consecutive failures that mark a target unhealthy. Defaults to 3.
+        LLM_UNHEALTHY_SECONDS: How long an unhealthy target is tried last. Defaults to 30.
+        LLM_CACHE_TASKS: Tasks whose replies use the LLM response cache. Defaults to 'scoring,summary'.
+
+    Returns:
+        ProviderRouter: Shared router instance
+    """
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ProviderRouter(
+                routes={task: parse_route(os.getenv(f"LLM_ROUTE_{task.upper()}", spec))
+                        for task, spec in DEFAULT_ROUTES.items()},
+                hedge=os.getenv("LLM_HEDGE_ENABLED", "1") != "0",
+                hedge_min_samples=int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20")),
+                failure_threshold=int(os.getenv("LLM_FAILURE_THRESHOLD", "3")),
+                cooldown=float(os.getenv("LLM_UNHEALTHY_SECONDS", "30")),
+                cache_tasks=[task.strip() for task in os.getenv("LLM_CACHE_TASKS", ",".join(DEFAULT_CACHE_TASKS))
+                             .split(",") if task.strip()],
+            )
+        return _router
+
+
+def set_provider_router(router: Optional[ProviderRouter]) -> None:
+    """
+    Replace the process-wide provider router, e.g. with stub backends in tests.
+
+    Args:
+        router (Optional[ProviderRouter]): Router to use, or None to recreate it from the environment
+    """
+    global _router
+    with _router_lock:
+        _router = router
+
+
+def call_llm(task: str, prompt: str, use_cache: bool = True, timeout: Optional[float] = None) -> str:
+    """
+    Run an LLM task through the shared provider router (see `ProviderRouter.call`).
+
+    Args:
+        task (str): 'scoring', 'summary' or 'generation'
+        prompt (str): The prompt
+        use_cache (bool, optional): Read and write the LLM response cache. Pass False when
+            repeated calls must return independent samples. Defaults to True.
+        timeout (Optional[float], optional): Per-call timeout in seconds. Defaults to the provider timeout.
+
+    Returns:
+        str: The reply
+    """
+    return get_provider_router().call(task, prompt, use_cache=use_cache, timeout=timeout)
+
+
+async def call_llm_async(task: str, prompt: str, use_cache: bool = True, timeout: Optional[float] = None) -> str:
+    """
+    Run an LLM task through the shared provider router with hedging (see `ProviderRouter.call_async`).
+
+    Args:
+        task (str): 'scoring', 'summary' or 'generation'
+        prompt (str): The prompt
+        use_cache (bool, optional): Read and write the LLM response cache. Pass False when
+            repeated calls must return independent samples. Defaults to True.
+        timeout (Optional[float], optional): Per-call timeout in seconds. Defaults to the provider timeout.
+
+    Returns:
+        str: The reply
+    """
+    return await get_provider_router().call_async(task, prompt, use_cache=use_cache, timeout=timeout)
+
+
+async def stream_llm_async(task: str, prompt: str, use_cache: bool = True,
+                           timeout: Optional[float] = None) -> AsyncIterator[str]:
+    """
+    Stream an LLM task through the shared provider router (see `ProviderRouter.stream_async`).
+
+    Args:
+        task (str): 'scoring', 'summary' or 'generation'
+        prompt (str): The prompt
+        use_cache (bool, optional): Read and write the LLM response cache. Defaults to True.
+        timeout (Optional[float], optional): Per-call timeout in seconds. Defaults to the provider timeout.
+
+    Yields:
+        str: The next piece of the reply
+    """
+    async for delta in get_provider_router().stream_async(task, prompt, use_cache=use_cache, timeout=timeout):
+        yield delta
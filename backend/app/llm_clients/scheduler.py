@@ -0,0 +1,250 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, Optional
+
+from dotenv import load_dotenv
+from backend.app.llm_clients.transport import PROVIDERS
+from backend.app.telemetry import LLM_IN_FLIGHT, LLM_QUEUE_DEPTH, LLM_QUEUE_WAIT_SECONDS
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Priority lanes, highest first: interactive API requests go ahead of batch work
+LANES = ("interactive", "batch")
+
+_lane: contextvars.ContextVar[str] = contextvars.ContextVar("llm_lane", default="batch")
+_owner: contextvars.ContextVar[Optional[object]] = contextvars.ContextVar("llm_owner", default=None)
+
+
+def set_llm_lane(lane: str) -> None:
+    """
+    Put the LLM calls of the current request (and the tasks and threads it starts) in a lane.
+
+    Each call starts a new fair-share group: waiting calls of different requests in
+    the same lane are granted slots in turn, so one large request cannot starve the
+    others. Calls made outside any request (scripts, ingestion) use the 'batch' lane.
+
+    Args:
+        lane (str): One of LANES
+    """
+    if lane not in LANES:
+        raise ValueError(f"Unknown LLM lane {lane!r}, expected one of {LANES}")
+    _lane.set(lane)
+    _owner.set(object())
+
+
+class _Waiter:
+    __slots__ = ("provider", "lane", "owner", "enqueued", "granted", "event", "future", "loop")
+
+    def __init__(self, provider: str, event: Optional[threading.Event] = None,
+                 future: Optional[asyncio.Future] = None, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.provider = provider
+        self.lane = _lane.get()
+        self.owner = _owner.get()
+        self.enqueued = time.perf_counter()
+        self.granted = False
+        self.event = event
+        self.future = future
+        self.loop = loop
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class LLMScheduler:
+    """
+    Process-wide admission control for LLM calls from threads and event loops alike.
+
+    A call takes a slot before it is sent and gives it back when it finishes. At
+    most `max_concurrency` calls are in flight overall and at most
+    `provider_limits[provider]` per provider (0 means unlimited). Waiting calls are
+    granted slots lane by lane in priority order, and round-robin between the
+    requests within a lane.
+    """
+
+    def __init__(self, max_concurrency: int = 64, provider_limits: Optional[Dict[str, int]] = None):
+        self.max_concurrency = max_concurrency
+        self.provider_limits = dict(provider_limits or {})
+        self.in_flight = 0
+        self.in_flight_by_provider: Dict[str, int] = {}
+        # lane -> fair-share group -> waiting calls in arrival order
+        self._queues: Dict[str, "OrderedDict[Any, Deque[_Waiter]]"] = {lane: OrderedDict() for lane in LANES}
+        self._lock = threading.Lock()
+
+    def _has_capacity(self, provider: str) -> bool:
+        if self.max_concurrency and self.in_flight >= self.max_concurrency:
+            return False
+        limit = self.provider_limits.get(provider, 0)
+        return not limit or self.in_flight_by_provider.get(provider, 0) < limit
+
+    def _grant(self, waiter: _Waiter) -> None:
+        waiter.granted = True
+        self.in_flight += 1
+        self.in_flight_by_provider[waiter.provider] = self.in_flight_by_provider.get(waiter.provider, 0) + 1
+        LLM_IN_FLIGHT.inc(provider=waiter.provider)
+        LLM_QUEUE_DEPTH.dec(provider=waiter.provider, lane=waiter.lane)
+        LLM_QUEUE_WAIT_SECONDS.observe(time.perf_counter() - waiter.enqueued, provider=waiter.provider,
+                                       lane=waiter.lane)
+        if waiter.event is not None:
+            waiter.event.set()
+        else:
+            waiter.loop.call_soon_threadsafe(_resolve, waiter.future)
+
+    def _dispatch(self) -> None:
+        # Called with the lock held: grant slots until no waiting call can start
+        for lane in LANES:
+            groups = self._queues[lane]
+            granted = True
+            while granted and groups:
+                granted = False
+                for owner in list(groups):
+                    waiters = groups[owner]
+                    waiter = next((w for w in waiters if self._has_capacity(w.provider)), None)
+                    if waiter is None:
+                        continue
+                    waiters.remove(waiter)
+                    if waiters:
+                        groups.move_to_end(owner)
+                    else:
+                        del groups[owner]
+                    self._grant(waiter)
+                    granted = True
+                    if self.max_concurrency and self.in_flight >= self.max_concurrency:
+                        return
+
+    def _enqueue(self, waiter: _Waiter) -> None:
+        with self._lock:
+            self._queues[waiter.lane].setdefault(waiter.owner, deque()).append(waiter)
+            LLM_QUEUE_DEPTH.inc(provider=waiter.provider, lane=waiter.lane)
+            self._dispatch()
+
+    def _withdraw(self, waiter: _Waiter) -> bool:
+        # Remove a waiting call that gave up; returns False if it was granted meanwhile
+        with self._lock:
+            if waiter.granted:
+                return False
+            groups = self._queues[waiter.lane]
+            groups[waiter.owner].remove(waiter)
+            if not groups[waiter.owner]:
+                del groups[waiter.owner]
+            LLM_QUEUE_DEPTH.dec(provider=waiter.provider, lane=waiter.lane)
+            return True
+
+    def acquire(self, provider: str) -> None:
+        """
+        Block the calling thread until a slot for `provider` is free.
+
+        Args:
+            provider (str): Provider name, e.g. 'groq'
+        """
+        waiter = _Waiter(provider, event=threading.Event())
+        self._enqueue(waiter)
+        waiter.event.wait()
+
+    async def acquire_async(self, provider: str) -> None:
+        """
+        Wait without blocking the event loop until a slot for `provider` is free.
+
+        Args:
+            provider (str): Provider name, e.g. 'groq'
+        """
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(provider, future=loop.create_future(), loop=loop)
+        self._enqueue(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if not self._withdraw(waiter):
+                self.release(provider)
+            raise
+
+    def release(self, provider: str) -> None:
+        """
+        Give back a slot taken with `acquire` or `acquire_async`.
+
+        Args:
+            provider (str): Provider the slot was taken for
+        """
+        with self._lock:
+            self.in_flight -= 1
+            self.in_flight_by_provider[provider] -= 1
+            LLM_IN_FLIGHT.dec(provider=provider)
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, provider: str) -> Iterator[None]:
+        """Hold a slot for `provider` for the duration of the block."""
+        self.acquire(provider)
+        try:
+            yield
+        finally:
+            self.release(provider)
+
+    @asynccontextmanager
+    async def slot_async(self, provider: str) -> AsyncIterator[None]:
+        """Hold a slot for `provider` for the duration of the async block."""
+        await self.acquire_async(provider)
+        try:
+            yield
+        finally:
+            self.release(provider)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the current load.
+
+        Returns:
+            Dict[str, Any]: in_flight overall and per provider, and waiting calls per lane
+        """
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "in_flight_by_provider": dict(self.in_flight_by_provider),
+                "waiting": {lane: sum(len(waiters) for waiters in groups.values())
+                            for lane, groups in self._queues.items()},
+            }
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    """
+    Return the process-wide LLM scheduler, creating it on first use.
+
+    Environment variables:
+        LLM_MAX_CONCURRENCY: LLM calls in flight over all providers, 0 for no limit. Defaults to 64.
+        Per-provider caps come from `ProviderConfig.max_concurrency` (GROQ_MAX_CONCURRENCY,
+        OPENAI_MAX_CONCURRENCY).
+
+    Returns:
+        LLMScheduler: Shared scheduler instance
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler(
+                max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "64")),
+                provider_limits={name: config.max_concurrency for name, config in PROVIDERS.items()},
+            )
+        return _scheduler
+
+
+def set_scheduler(scheduler: Optional[LLMScheduler]) -> None:
+    """
+    Replace the process-wide LLM scheduler, e.g. with different limits in a benchmark.
+
+    Args:
+        scheduler (Optional[LLMScheduler]): Scheduler to use, or None to recreate it from the environment
+    """
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = scheduler
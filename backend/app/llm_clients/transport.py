@@ -0,0 +1,478 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+from backend.app.telemetry import LLM_RETRIES
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Status codes that are worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class LLMTransportError(Exception):
+    """
+    Raised when an LLM provider call fails after all retries.
+
+    Attributes:
+        provider (str): Name of the provider that failed
+        status_code (Optional[int]): HTTP status of the last attempt, None for network errors
+    """
+
+    def __init__(self, provider: str, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.provider = provider
+        self.status_code = status_code
+
+
+@dataclass
+class ProviderConfig:
+    """
+    Connection, rate-limit and retry settings for one OpenAI-compatible provider.
+
+    Attributes:
+        name (str): Registry key of the provider, e.g. 'groq'
+        display_name (str): Name used in error messages, e.g. 'Groq'
+        base_url (str): Base URL of the OpenAI-compatible API
+        api_key_env (str): Environment variable holding the API key
+        requests_per_minute (float): Request quota, 0 disables the limit
+        tokens_per_minute (float): Token quota, 0 disables the limit
+        timeout (float): Per-call timeout in seconds
+        max_retries (int): Retries after the first attempt on 429/5xx/network errors
+        backoff_base (float): Base delay in seconds for exponential backoff
+        backoff_max (float): Upper bound for a single backoff delay in seconds
+        pool_size (int): Maximum number of pooled keep-alive connections
+        max_concurrency (int): Calls in flight at once, enforced by the LLM scheduler; 0 disables the cap
+    """
+    name: str
+    display_name: str
+    base_url: str
+    api_key_env: str
+    requests_per_minute: float = 0
+    tokens_per_minute: float = 0
+    timeout: float = 60.0
+    max_retries: int = 4
+    backoff_base: float = 1.0
+    backoff_max: float = 30.0
+    pool_size: int = 50
+    max_concurrency: int = 0
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket that refills continuously at `rate_per_minute`.
+
+    Callers reserve tokens up front and the bucket is allowed to go negative, so
+    waiting callers are served roughly in arrival order instead of racing.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1) -> float:
+        """
+        Take `amount` tokens from the bucket.
+
+        Args:
+            amount (float, optional): Number of tokens to take. Defaults to 1.
+
+        Returns:
+            float: Seconds the caller has to wait before the tokens are available
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= min(amount, self.capacity)
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class RateLimiter:
+    """
+    Per-provider limiter combining a requests/min and a tokens/min bucket.
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0):
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    def _reserve(self, tokens: int) -> float:
+        wait = 0.0
+        if self.request_bucket:
+            wait = max(wait, self.request_bucket.reserve(1))
+        if self.token_bucket:
+            wait = max(wait, self.token_bucket.reserve(tokens))
+        return wait
+
+    def acquire(self, tokens: int) -> None:
+        """Block until one request carrying `tokens` tokens may be sent."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int) -> None:
+        """Wait without blocking the event loop until one request may be sent."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def estimate_tokens(payload: Dict[str, Any]) -> int:
+    """
+    Roughly estimate the tokens a chat completion request will consume.
+
+    Counts one token per prompt character (a conservative figure for Chinese text)
+    plus the completion allowance.
+
+    Args:
+        payload (Dict[str, Any]): Chat completion request body
+
+    Returns:
+        int: Estimated prompt + completion tokens
+    """
+    prompt_chars = sum(len(message.get("content") or "") for message in payload.get("messages", []))
+    return prompt_chars + payload.get("max_tokens", 256)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given either in seconds or as an HTTP date.
+
+    Args:
+        value (Optional[str]): Raw header value
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float, cap: float, retry_after: Optional[float] = None) -> float:
+    """
+    Compute the delay before the next retry.
+
+    Honors the server's Retry-After when given, otherwise uses exponential backoff.
+    Jitter is added either way so that retries from concurrent requests spread out.
+
+    Args:
+        attempt (int): Zero-based index of the attempt that just failed
+        base (float): Base delay in seconds
+        cap (float): Maximum exponential delay in seconds
+        retry_after (Optional[float], optional): Server-requested delay in seconds
+
+    Returns:
+        float: Seconds to sleep before retrying
+    """
+    if retry_after is not None:
+        return retry_after + random.uniform(0, base)
+    delay = min(cap, base * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class LLMTransport:
+    """
+    Pooled, rate-limited HTTP transport for an OpenAI-compatible chat completions API.
+
+    A single instance per provider is shared by all callers: the sync path reuses a
+    `requests.Session` connection pool and the async path an `httpx.AsyncClient`.
+    """
+
+    def __init__(self, config: ProviderConfig):
+        self.config = config
+        self.limiter = RateLimiter(config.requests_per_minute, config.tokens_per_minute)
+        self._session = None
+        self._session_lock = threading.Lock()
+        # httpx clients are bound to the event loop they were first used on, so there is one per loop
+        self._async_clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+        self._async_lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"{self.config.base_url.rstrip('/')}/chat/completions"
+
+    def _headers(self) -> Dict[str, str]:
+        api_key = os.getenv(self.config.api_key_env)
+        if not api_key:
+            raise Exception(f"{self.config.api_key_env} environment variable is not set")
+        return {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}"
+        }
+
+    def _get_session(self) -> requests.Session:
+        with self._session_lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.config.pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            # Clients of loops that ended without `aclose` cannot be closed any more; drop them
+            # so their sockets are released instead of piling up with every new loop
+            for stale in [other for other in self._async_clients if other.is_closed()]:
+                logging.debug(f"🧹 Dropping {self.config.display_name} client of a closed event loop")
+                del self._async_clients[stale]
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = self._async_clients[loop] = httpx.AsyncClient(
+                    limits=httpx.Limits(max_connections=self.config.pool_size,
+                                        max_keepalive_connections=self.config.pool_size)
+                )
+            return client
+
+    async def aclose(self) -> None:
+        """
+        Close the connection pool of the running event loop.
+
+        Call before the loop ends (e.g. at server shutdown or at the end of an
+        `asyncio.run`); the next async call on this loop opens a new pool.
+        """
+        with self._async_lock:
+            client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def close(self) -> None:
+        """Close the connection pool of the blocking path."""
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def _error(self, status_code: Optional[int], detail: str) -> LLMTransportError:
+        if status_code is None:
+            return LLMTransportError(self.config.name, f"{self.config.display_name} API Error: {detail}")
+        return LLMTransportError(
+            self.config.name, f"{self.config.display_name} API Error {status_code}: {detail}", status_code
+        )
+
+    def _retry_or_raise(self, attempt: int, error: LLMTransportError, retry_after: Optional[float],
+                        model: str = "") -> float:
+        if attempt >= self.config.max_retries:
+            raise error
+        LLM_RETRIES.inc(provider=self.config.name, model=model, reason=error.status_code or "network")
+        delay = backoff_delay(attempt, self.config.backoff_base, self.config.backoff_max, retry_after)
+        logging.warning(f"🔁 {error} (retry {attempt + 1}/{self.config.max_retries} in {delay:.1f}s)")
+        return delay
+
+    def post(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Send a chat completion request, retrying on 429/5xx and network errors.
+
+        Args:
+            payload (Dict[str, Any]): Chat completion request body
+            timeout (Optional[float], optional): Per-call timeout overriding the provider default
+
+        Returns:
+            Dict[str, Any]: Parsed JSON response
+
+        Raises:
+            LLMTransportError: If the request fails with a non-retryable status or retries run out
+        """
+        headers = self._headers()
+        tokens = estimate_tokens(payload)
+        session = self._get_session()
+        for attempt in range(self.config.max_retries + 1):
+            self.limiter.acquire(tokens)
+            retry_after = None
+            try:
+                res = session.post(self.url, headers=headers, json=payload, timeout=timeout or self.config.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = self._error(None, str(e))
+            else:
+                if res.status_code == 200:
+                    return res.json()
+                error = self._error(res.status_code, res.text)
+                if res.status_code not in RETRY_STATUS_CODES:
+                    raise error
+                retry_after = parse_retry_after(res.headers.get("Retry-After"))
+            time.sleep(self._retry_or_raise(attempt, error, retry_after, payload.get("model", "")))
+
+    async def post_async(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Asynchronously send a chat completion request with the same retry policy as `post`.
+
+        Args:
+            payload (Dict[str, Any]): Chat completion request body
+            timeout (Optional[float], optional): Per-call timeout overriding the provider default
+
+        Returns:
+            Dict[str, Any]: Parsed JSON response
+
+        Raises:
+            LLMTransportError: If the request fails with a non-retryable status or retries run out
+        """
+        headers = self._headers()
+        tokens = estimate_tokens(payload)
+        client = self._get_async_client()
+        for attempt in range(self.config.max_retries + 1):
+            await self.limiter.acquire_async(tokens)
+            retry_after = None
+            try:
+                res = await client.post(self.url, headers=headers, json=payload, timeout=timeout or self.config.timeout)
+            except httpx.TransportError as e:
+                error = self._error(None, str(e) or type(e).__name__)
+            else:
+                if res.status_code == 200:
+                    return res.json()
+                error = self._error(res.status_code, res.text)
+                if res.status_code not in RETRY_STATUS_CODES:
+                    raise error
+                retry_after = parse_retry_after(res.headers.get("Retry-After"))
+            await asyncio.sleep(self._retry_or_raise(attempt, error, retry_after, payload.get("model", "")))
+
+
+    async def stream_async(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        Stream a chat completion, yielding content deltas as they arrive.
+
+        Failures before the first delta are retried like `post_async`; once output
+        has been yielded, errors are raised instead of retried to avoid duplicates.
+
+        Args:
+            payload (Dict[str, Any]): Chat completion request body
+            timeout (Optional[float], optional): Per-call timeout overriding the provider default
+
+        Yields:
+            str: Content delta of the next streamed chunk
+
+        Raises:
+            LLMTransportError: If the request fails with a non-retryable status or retries run out
+        """
+        headers = self._headers()
+        tokens = estimate_tokens(payload)
+        client = self._get_async_client()
+        payload = {**payload, "stream": True}
+        started = False
+        for attempt in range(self.config.max_retries + 1):
+            await self.limiter.acquire_async(tokens)
+            retry_after = None
+            try:
+                async with client.stream("POST", self.url, headers=headers, json=payload,
+                                         timeout=timeout or self.config.timeout) as res:
+                    if res.status_code == 200:
+                        async for line in res.aiter_lines():
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[len("data:"):].strip()
+                            if data == "[DONE]":
+                                return
+                            choices = json.loads(data).get("choices") or []
+                            delta = choices[0].get("delta", {}).get("content") if choices else None
+                            if delta:
+                                started = True
+                                yield delta
+                        return
+                    error = self._error(res.status_code, (await res.aread()).decode("utf-8", errors="replace"))
+                    if res.status_code not in RETRY_STATUS_CODES:
+                        raise error
+                    retry_after = parse_retry_after(res.headers.get("Retry-After"))
+            except httpx.TransportError as e:
+                error = self._error(None, str(e) or type(e).__name__)
+                if started:
+                    raise error
+            await asyncio.sleep(self._retry_or_raise(attempt, error, retry_after, payload.get("model", "")))
+
+
+PROVIDERS = {
+    "groq": ProviderConfig(
+        name="groq",
+        display_name="Groq",
+        base_url=os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1"),
+        api_key_env="GROQ_API_KEY",
+        requests_per_minute=float(os.getenv("GROQ_RPM", "1000")),
+        tokens_per_minute=float(os.getenv("GROQ_TPM", "300000")),
+        max_concurrency=int(os.getenv("GROQ_MAX_CONCURRENCY", "32")),
+    ),
+    "openai": ProviderConfig(
+        name="openai",
+        display_name="OpenAI",
+        base_url=os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"),
+        api_key_env="OPENAI_API_KEY",
+        requests_per_minute=float(os.getenv("OPENAI_RPM", "5000")),
+        tokens_per_minute=float(os.getenv("OPENAI_TPM", "2000000")),
+        max_concurrency=int(os.getenv("OPENAI_MAX_CONCURRENCY", "32")),
+        timeout=120.0,
+    ),
+}
+
+_transports: Dict[str, LLMTransport] = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport(provider: str) -> LLMTransport:
+    """
+    Return the process-wide transport for a provider, creating it on first use.
+
+    Args:
+        provider (str): Provider name, a key of PROVIDERS
+
+    Returns:
+        LLMTransport: Shared transport instance
+    """
+    with _transports_lock:
+        if provider not in _transports:
+            _transports[provider] = LLMTransport(PROVIDERS[provider])
+        return _transports[provider]
+
+
+async def close_transports() -> None:
+    """
+    Close the connection pools of every shared transport, for application shutdown.
+
+    Async pools are closed for the running event loop, blocking ones entirely.
+    """
+    with _transports_lock:
+        transports = list(_transports.values())
+    for transport in transports:
+        if isinstance(transport, LLMTransport):
+            await transport.aclose()
+            transport.close()
+
+
+def set_transport(provider: str, transport: Optional[LLMTransport]) -> None:
+    """
+    Replace the shared transport for a provider, e.g. to point it at a stub server.
+
+    Args:
+        provider (str): Provider name
+        transport (Optional[LLMTransport]): Transport to use from now on, or None to
+            recreate the default one on next use
+    """
+    with _transports_lock:
+        if transport is None:
+            _transports.pop(provider, None)
+        else:
+            _transports[provider] = transport
@@ -1,9 +1,54 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from backend.app.api import news_router
+from fastapi.responses import JSONResponse, PlainTextResponse
+from backend.app.api import jobs_router, news_router
+from backend.app.db.chroma_connector import get_retriever
+from backend.app.db.job_store import get_job_store
+from backend.app.llm_clients.transport import close_transports
+from backend.app.services.job_service import JobWorkerPool
+from backend.app.telemetry import REGISTRY
 import logging
 
-app = FastAPI()
+
+def _log_warmup_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception():
+        logging.error(f"❌ Retriever warm-up failed: {task.exception()}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Load the shared retriever in the background while the server starts accepting requests.
+
+    /ready reports 503 until the embedding model and collection are warm; queries that
+    arrive earlier wait for the load instead of starting their own.
+
+    Also runs the background job workers (JOBS_CONCURRENCY, default 2; 0 leaves the
+    queue to workers in another process), which resume jobs left over from a crash,
+    and closes the LLM connection pools on shutdown.
+    """
+    retriever = get_retriever()
+    app.state.retriever_warmup = asyncio.create_task(asyncio.to_thread(retriever.ensure_ready))
+    app.state.retriever_warmup.add_done_callback(_log_warmup_failure)
+
+    concurrency = int(os.getenv("JOBS_CONCURRENCY", "2"))
+    app.state.job_pool = None
+    if concurrency > 0:
+        app.state.job_pool = JobWorkerPool(
+            get_job_store(), jobs_router.run_query_job, concurrency=concurrency,
+            lease_seconds=float(os.getenv("JOBS_LEASE_SECONDS", "30")),
+        )
+        app.state.job_pool.start()
+    yield
+    if app.state.job_pool is not None:
+        await app.state.job_pool.stop()
+    await close_transports()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS settings
 origins = [
@@ -18,13 +63,30 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Cache", "X-Cache-Similarity", "X-Coalesced"],
 )
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
 # Mount routers
 app.include_router(news_router.router, prefix="/api")
+app.include_router(jobs_router.router, prefix="/api")
 
 @app.get("/")
 def read_root():
     return {"message": "ScoreRAG API ready."}
+
+@app.get("/ready")
+def readiness():
+    """
+    Readiness probe: 200 once the embedding model and vector collection are warm, 503 before.
+    """
+    status = get_retriever().status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@app.get("/metrics")
+def metrics():
+    """
+    Prometheus scrape endpoint: request, stage and LLM call metrics in the text exposition format.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
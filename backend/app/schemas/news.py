@@ -1,9 +1,20 @@
-from pydantic import BaseModel
-from typing import List
+from datetime import date
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
 
 class NewsQuery(BaseModel):
     query: str
     top_k: int = 5
+    # Optional inclusive date range; only the matching monthly partitions are searched
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+class NewsBatchQuery(BaseModel):
+    # Answered together: one encode call, one article fetch, shared summaries
+    queries: List[str] = Field(..., min_length=1, max_length=100)
+    top_k: int = 5
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
 
 class ScoredNews(BaseModel):
     id: str
@@ -11,8 +22,12 @@ class ScoredNews(BaseModel):
     date: str
     score: float
     generated_summary: str
+    # Scoring calls spent on the article ('adaptive' mode only)
+    samples_used: Optional[int] = None
 
 class NewsQueryResponse(BaseModel):
     query: str
     generated_article: str
-    references: List[ScoredNews]
\ No newline at end of file
+    references: List[ScoredNews]
+    # Scoring calls per scored article, including those below the threshold ('adaptive' mode only)
+    samples_used: Optional[Dict[str, int]] = None
\ No newline at end of file
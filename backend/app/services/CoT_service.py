@@ -1,13 +1,93 @@
+import asyncio
+import contextlib
+import json
+import logging
+import re
 from collections import defaultdict
-from typing import Dict, List, Any
-from backend.app.llm_clients.groq_client import call_groq
-from backend.app.services.summary_service import generate_graded_summary, extract_number
+from typing import Dict, List, Any, AsyncIterator, Iterable, Optional, Tuple
+from backend.app.llm_clients.provider_router import call_llm, call_llm_async
+from backend.app.services.summary_service import get_graded_summary, get_graded_summary_async, extract_number
+from backend.app.services.single_flight import AsyncSingleFlight, SingleFlight, normalize_query
+from backend.app.telemetry import bind_context
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+# Per-article scorings in flight, shared by concurrent requests for the same query
+_scoring_flight = SingleFlight()
+_async_scoring_flight = AsyncSingleFlight()
+
+
+def scoring_key(kind: str, query: str, news_id: Any, *params: Any) -> Tuple:
+    """
+    Build the coalescing key for scoring one article against a query.
+
+    Args:
+        kind (str): Scorer name, so scorers with different prompts or sampling never share results
+        query (str): The search query
+        news_id (Any): Article ID
+        *params (Any): Scorer parameters that change the outcome, e.g. n and threshold
+
+    Returns:
+        Tuple: Hashable key
+    """
+    return (kind, normalize_query(query), str(news_id)) + params
+
+
+def build_score_prompt(query: str, article: Dict[str, Any]) -> str:
+    """
+    Build the relevance scoring prompt for a single article.
+
+    Args:
+        query (str): The search query to evaluate relevance against
+        article (Dict[str, Any]): Article containing date, news_title and news_summary
+
+    Returns:
+        str: Prompt asking the LLM for a single 0-100 relevance score
+    """
+    return f"""
+            你是一位專業的新聞分析助手，請評估以下新聞對查詢主題的相關性：
+
+            查詢：{query}
+            日期：{article['date']}
+            標題：{article['news_title']}
+            摘要：{article['news_summary']}...
+
+            依據新聞與查詢的相關性，給出一個分數（0-100）：
+            - 90-100 分：完全相關
+            - 70-89 分：高度相關
+            - 50-69 分：部分相關
+            - 0-49 分：不相關
+
+            只輸出一個數字（0 到 100 之間）不要額外解釋。
+            """
+
+
+def build_scored_result(news_id: Any, article: Dict[str, Any], avg_score: float, summary: str) -> Dict[str, Any]:
+    """
+    Build the result entry for an article that passed the threshold.
+
+    Args:
+        news_id (Any): Article ID
+        article (Dict[str, Any]): Article containing news_title, date and news_content
+        avg_score (float): Average relevance score
+        summary (str): Graded summary of the article
+
+    Returns:
+        Dict[str, Any]: Result entry with id, title, date, rounded score, content and generated_summary
+    """
+    return {
+        "id": news_id,
+        "title": article["news_title"],
+        "date": article["date"],
+        "score": round(avg_score, 0),
+        "content": article["news_content"],
+        "generated_summary": summary
+    }
+
 def score_articles_sync(articles: Dict[str, Dict[str, Any]], 
                        query: str, 
                        n: int = 3, 
-                       threshold: int = 20) -> List[Dict[str, Any]]:
+                       threshold: int = 20,
+                       score_log: Dict[Any, float] = None) -> List[Dict[str, Any]]:
     """
     Synchronously score articles for relevance to a query and generate summaries.
 
@@ -26,6 +106,8 @@ def score_articles_sync(articles: Dict[str, Dict[str, Any]],
         query (str): The search query to evaluate relevance against
         n (int, optional): Number of times to score each article. Defaults to 3.
         threshold (int, optional): Minimum average score to include an article. Defaults to 20.
+        score_log (Dict[Any, float], optional): If given, filled with the average score of every
+            scored article, including those below the threshold. Defaults to None.
 
     Returns:
         List[Dict[str, Any]]: List of scored articles sorted by average score, each containing:
@@ -43,15 +125,14 @@ def score_articles_sync(articles: Dict[str, Dict[str, Any]],
         - 50-69: Partially relevant, some content related to query
         - 0-49: Not relevant, minimal or no relation to query
     """
-    scored_articles = defaultdict(lambda: {"scores": [],})
-
-    for news_id, article in articles.items(): 
+    def score_one_article(article):
         news_title = article["news_title"]
         news_summary = article["news_summary"]
         news_date = article["date"]
 
-        print(f"\n📰 評分新聞：{news_title}（日期：{news_date}）")
+        logging.debug(f"📰 評分新聞：{news_title}（日期：{news_date}）")
 
+        scores = []
         for i in range(n):
             prompt = f"""
             你是一位專業的新聞分析助手，請評估以下新聞對查詢主題的相關性：
@@ -70,30 +151,36 @@ def score_articles_sync(articles: Dict[str, Dict[str, Any]],
             只輸出一個數字（0 到 100 之間）不要額外解釋
             """
 
-            response = call_groq(prompt)
-            score = extract_number(response)
-            scored_articles[news_id]["scores"].append(score)
-
-        avg_score = sum(scored_articles[news_id]["scores"]) / len(scored_articles[news_id]["scores"])
-        print(f"✅ 平均分數：{avg_score:.2f}")
-
-    final_scores = [
-        {
-            "id": news_id, 
-            "title": article["news_title"], 
-            "date": article["date"],
-            "score": sum(data["scores"]) / len(data["scores"]),
-            "content": article["news_content"],
-            "generated_summary": generate_graded_summary(article, sum(data["scores"]) / len(data["scores"]))
-        }
-        for news_id, data in scored_articles.items()
-        if sum(data["scores"]) / len(data["scores"]) >= threshold
-    ]
+            # Only the first sample may come from the cache, so repeated samples stay independent
+            response = call_llm("scoring", prompt, use_cache=(i == 0))
+            scores.append(extract_number(response))
+
+        avg_score = sum(scores) / len(scores)
+        logging.debug(f"✅ 平均分數：{avg_score:.2f}")
+        summary = get_graded_summary(article, avg_score) if avg_score >= threshold else None
+        return avg_score, summary
+
+    final_scores = []
+    for news_id, article in articles.items():
+        (avg_score, summary), _ = _scoring_flight.do(
+            scoring_key("sync", query, news_id, n, threshold), lambda: score_one_article(article)
+        )
+        if score_log is not None:
+            score_log[news_id] = avg_score
+        if summary is not None:
+            final_scores.append({
+                "id": news_id,
+                "title": article["news_title"],
+                "date": article["date"],
+                "score": avg_score,
+                "content": article["news_content"],
+                "generated_summary": summary
+            })
 
     return sorted(final_scores, key=lambda x: x["score"], reverse=True)
 
 
-def score_articles_with_thread_pool(articles, query, n=3, threshold=20, max_workers=5):
+def score_articles_with_thread_pool(articles, query, n=3, threshold=20, max_workers=None, score_log=None):
     """
     Score articles for relevance to a query and generate summaries using multithreading.
 
@@ -112,7 +199,10 @@ def score_articles_with_thread_pool(articles, query, n=3, threshold=20, max_work
         query (str): The search query to evaluate relevance against
         n (int, optional): Number of times to score each article. Defaults to 3.
         threshold (int, optional): Minimum average score to include an article. Defaults to 20.
-        max_workers (int, optional): Maximum number of threads to use. Defaults to 5.
+        max_workers (int, optional): Maximum number of threads to use. Defaults to one per
+            article; the LLM scheduler caps the calls actually in flight across requests.
+        score_log (Dict[Any, float], optional): If given, filled with the average score of every
+            scored article, including those below the threshold. Defaults to None.
 
     Returns:
         List[Dict[str, Any]]: List of scored articles sorted by average score, each containing:
@@ -131,47 +221,430 @@ def score_articles_with_thread_pool(articles, query, n=3, threshold=20, max_work
         - 0-49: Not relevant, minimal or no relation to query
     """
 
-    def score_one_article(news_id, article):
+    def compute(article):
         scores = []
-        for _ in range(n):
-            prompt = f"""
-            你是一位專業的新聞分析助手，請評估以下新聞對查詢主題的相關性：
+        prompt = build_score_prompt(query, article)
+        for i in range(n):
+            # Only the first sample may come from the cache, so repeated samples stay independent
+            response = call_llm("scoring", prompt, use_cache=(i == 0))
+            scores.append(extract_number(response))
+
+        avg_score = sum(scores) / len(scores)
+        return avg_score, get_graded_summary(article, avg_score) if avg_score >= threshold else None
+
+    def score_one_article(news_id, article):
+        # Concurrent requests scoring the same article for the same query share one computation
+        (avg_score, summary), _ = _scoring_flight.do(
+            scoring_key("pool", query, news_id, n, threshold), lambda: compute(article)
+        )
+        if score_log is not None:
+            score_log[news_id] = avg_score
+        if summary is not None:
+            return build_scored_result(news_id, article, avg_score, summary)
+        return None
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers or max(1, len(articles))) as executor:
+        # bind_context keeps the LLM calls of worker threads in this request's trace
+        score = bind_context(score_one_article)
+        futures = [executor.submit(score, news_id, article) for news_id, article in articles.items()]
+        for future in as_completed(futures):
+            result = future.result()
+            if result:
+                results.append(result)
+
+    return sorted(results, key=lambda x: x["score"], reverse=True)
+
+
+async def iter_scored_articles_async(articles: Dict[str, Dict[str, Any]],
+                                    query: str,
+                                    n: int = 3,
+                                    threshold: int = 20,
+                                    max_concurrency: Optional[int] = None,
+                                    score_log: Dict[Any, float] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Asynchronously score articles and yield each passing article as soon as it is done.
+
+    For every article, the n scoring calls are fanned out with asyncio.gather, and if
+    the average score reaches the threshold its graded summary is generated. Articles
+    are processed concurrently and yielded in completion order, not score order.
+
+    LLM calls wait for a slot from the process-wide LLM scheduler without holding
+    any threads; `max_concurrency` additionally caps the calls of this request.
+    Pending work is cancelled if the consumer stops iterating early.
+
+    Args:
+        articles (Dict[str, Dict[str, Any]]): Dictionary of articles, where each value contains:
+            - news_title: Title of the article
+            - news_summary: Summary of the article
+            - news_content: Full content of the article
+            - date: Publication date
+        query (str): The search query to evaluate relevance against
+        n (int, optional): Number of times to score each article. Defaults to 3.
+        threshold (int, optional): Minimum average score to include an article. Defaults to 20.
+        max_concurrency (Optional[int], optional): Maximum number of concurrent LLM calls for
+            this request. Defaults to None (only the scheduler limits apply).
+        score_log (Dict[Any, float], optional): If given, filled with the average score of every
+            scored article, including those below the threshold. Defaults to None.
+
+    Yields:
+        Dict[str, Any]: Scored article in the same format as `score_articles_with_thread_pool`
+    """
+    semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else contextlib.nullcontext()
+
+    async def limited(coro_fn, *args, **kwargs):
+        async with semaphore:
+            return await coro_fn(*args, **kwargs)
+
+    async def compute(article):
+        prompt = build_score_prompt(query, article)
+        # Only the first sample may come from the cache, so repeated samples stay independent
+        responses = await asyncio.gather(*(limited(call_llm_async, "scoring", prompt, use_cache=(i == 0)) for i in range(n)))
+        scores = [extract_number(response) for response in responses]
+
+        avg_score = sum(scores) / len(scores)
+        if avg_score < threshold:
+            return avg_score, None
+        return avg_score, await limited(get_graded_summary_async, article, avg_score)
+
+    async def score_one_article(news_id, article):
+        # Concurrent requests scoring the same article for the same query share one computation
+        (avg_score, summary), _ = await _async_scoring_flight.do(
+            scoring_key("async", query, news_id, n, threshold), lambda: compute(article)
+        )
+        if score_log is not None:
+            score_log[news_id] = avg_score
+        if summary is None:
+            return None
+        return build_scored_result(news_id, article, avg_score, summary)
+
+    tasks = [asyncio.ensure_future(score_one_article(news_id, article)) for news_id, article in articles.items()]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            if result:
+                yield result
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def score_articles_async(articles: Dict[str, Dict[str, Any]],
+                               query: str,
+                               n: int = 3,
+                               threshold: int = 20,
+                               max_concurrency: Optional[int] = None,
+                               score_log: Dict[Any, float] = None) -> List[Dict[str, Any]]:
+    """
+    Asynchronously score articles for relevance to a query and generate summaries.
+
+    This is the event-loop counterpart of `score_articles_with_thread_pool`:
+    1. All n scoring calls for every article are fanned out with asyncio.gather
+    2. The average score is calculated for each article
+    3. Articles with an average score below the threshold are dropped
+    4. Graded summaries for the remaining articles are generated concurrently
+
+    See `iter_scored_articles_async` for the concurrency limits.
+
+    Args:
+        articles (Dict[str, Dict[str, Any]]): Dictionary of articles, where each value contains:
+            - news_title: Title of the article
+            - news_summary: Summary of the article
+            - news_content: Full content of the article
+            - date: Publication date
+        query (str): The search query to evaluate relevance against
+        n (int, optional): Number of times to score each article. Defaults to 3.
+        threshold (int, optional): Minimum average score to include an article. Defaults to 20.
+        max_concurrency (Optional[int], optional): Maximum number of concurrent LLM calls for
+            this request. Defaults to None (only the scheduler limits apply).
+        score_log (Dict[Any, float], optional): If given, filled with the average score of every
+            scored article, including those below the threshold. Defaults to None.
+
+    Returns:
+        List[Dict[str, Any]]: List of scored articles sorted by average score, in the same
+        format as `score_articles_with_thread_pool`
+    """
+    results = [
+        result async for result in iter_scored_articles_async(
+            articles, query, n=n, threshold=threshold, max_concurrency=max_concurrency, score_log=score_log
+        )
+    ]
+    return sorted(results, key=lambda x: x["score"], reverse=True)
+
+
+def build_batch_score_prompt(query: str, batch: List[Tuple[Any, Dict[str, Any]]]) -> str:
+    """
+    Build a listwise scoring prompt that scores several articles in one LLM call.
+
+    Args:
+        query (str): The search query to evaluate relevance against
+        batch (List[Tuple[Any, Dict[str, Any]]]): (news_id, article) pairs to score
+
+    Returns:
+        str: Prompt asking for a JSON object mapping each news_id to a 0-100 score
+    """
+    entries = "\n".join(
+        f"- news_id：{news_id}｜日期：{article['date']}｜標題：{article['news_title']}｜摘要：{article['news_summary']}"
+        for news_id, article in batch
+    )
+    return f"""
+            你是一位專業的新聞分析助手，請分別評估以下每一則新聞對查詢主題的相關性：
 
             查詢：{query}
-            日期：{article['date']}
-            標題：{article['news_title']}
-            摘要：{article['news_summary']}...
 
-            依據新聞與查詢的相關性，給出一個分數（0-100）：
+            新聞列表：
+            {entries}
+
+            依據新聞與查詢的相關性，為每一則新聞給出一個分數（0-100）：
             - 90-100 分：完全相關
             - 70-89 分：高度相關
             - 50-69 分：部分相關
             - 0-49 分：不相關
 
-            只輸出一個數字（0 到 100 之間）不要額外解釋。
+            只輸出一個 JSON 物件，鍵為 news_id（字串），值為分數，例如 {{"123": 85, "456": 30}}，不要額外解釋。
             """
-            response = call_groq(prompt)
-            scores.append(extract_number(response))
-        
-        avg_score = sum(scores) / len(scores)
-        if avg_score >= threshold:
-            summary = generate_graded_summary(article, avg_score)
-            return {
-                "id": news_id,
-                "title": article["news_title"],
-                "date": article["date"],
-                "score": round(avg_score, 0),
-                "content": article["news_content"],
-                "generated_summary": summary
+
+
+def parse_batch_scores(text: str, expected_ids: Iterable[Any]) -> Dict[str, int]:
+    """
+    Parse the scores from a listwise scoring reply.
+
+    Accepts a JSON object keyed by news_id (optionally inside a code fence), a list of
+    {"news_id": ..., "score": ...} objects, or falls back to "id: score" pairs in free
+    text. Only expected ids are kept and scores are clamped to 0-100.
+
+    Args:
+        text (str): Raw LLM reply
+        expected_ids (Iterable[Any]): The news_ids that were sent in the prompt
+
+    Returns:
+        Dict[str, int]: Scores keyed by news_id as a string; ids that could not be parsed are absent
+    """
+    expected = {str(news_id) for news_id in expected_ids}
+    parsed: Dict[str, Any] = {}
+
+    match = re.search(r"[\[{].*[\]}]", text, re.DOTALL)
+    if match:
+        try:
+            data = json.loads(match.group(0))
+        except ValueError:
+            data = None
+        if isinstance(data, dict) and isinstance(data.get("scores"), (list, dict)):
+            data = data["scores"]
+        if isinstance(data, dict):
+            parsed = {str(k): v for k, v in data.items()}
+        elif isinstance(data, list):
+            parsed = {
+                str(item.get("news_id", item.get("id"))): item.get("score")
+                for item in data if isinstance(item, dict)
             }
-        return None
 
-    results = []
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = [executor.submit(score_one_article, news_id, article) for news_id, article in articles.items()]
-        for future in as_completed(futures):
-            result = future.result()
-            if result:
-                results.append(result)
+    if not expected & parsed.keys():
+        parsed = {k: v for k, v in re.findall(r'"?(\d+)"?\s*[:：=]\s*"?(\d{1,3})', text)}
+
+    scores = {}
+    for news_id, value in parsed.items():
+        if news_id not in expected:
+            continue
+        try:
+            scores[news_id] = max(0, min(100, int(float(value))))
+        except (TypeError, ValueError):
+            continue
+    return scores
+
+
+def score_articles_batched(articles: Dict[str, Dict[str, Any]],
+                           query: str,
+                           n: int = 1,
+                           threshold: int = 20,
+                           batch_size: int = 5,
+                           max_workers: Optional[int] = None,
+                           score_log: Dict[Any, float] = None) -> List[Dict[str, Any]]:
+    """
+    Score articles listwise, packing several articles into each LLM call.
+
+    This function evaluates relevance like `score_articles_with_thread_pool` but:
+    1. Splits the articles into batches of `batch_size` and scores each batch n times
+       with a single prompt that asks for JSON scores keyed by news_id
+    2. Falls back to per-article scoring for ids missing from a reply
+    3. Filters by the average score and generates graded summaries for the rest
+
+    This cuts the number of scoring calls per query by roughly `batch_size`.
+
+    Args:
+        articles (Dict[str, Dict[str, Any]]): Dictionary of articles, where each value contains:
+            - news_title: Title of the article
+            - news_summary: Summary of the article
+            - news_content: Full content of the article
+            - date: Publication date
+        query (str): The search query to evaluate relevance against
+        n (int, optional): Number of times to score each batch. Defaults to 1.
+        threshold (int, optional): Minimum average score to include an article. Defaults to 20.
+        batch_size (int, optional): Number of articles per scoring call. Defaults to 5.
+        max_workers (Optional[int], optional): Maximum number of threads to use. Defaults to one
+            per batch or article; the LLM scheduler caps the calls actually in flight.
+        score_log (Dict[Any, float], optional): If given, filled with the average score of every
+            scored article, including those below the threshold. Defaults to None.
+
+    Returns:
+        List[Dict[str, Any]]: List of scored articles sorted by average score, in the same
+        format as `score_articles_with_thread_pool`
+    """
+    items = list(articles.items())
+    batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+
+    def score_batch(batch):
+        prompt = build_batch_score_prompt(query, batch)
+        scores = defaultdict(list)
+        for i in range(n):
+            # Only the first sample may come from the cache, so repeated samples stay independent
+            response = call_llm("scoring", prompt, use_cache=(i == 0))
+            for news_id, score in parse_batch_scores(response, (news_id for news_id, _ in batch)).items():
+                scores[news_id].append(score)
+
+        missing = [(news_id, article) for news_id, article in batch if len(scores[str(news_id)]) < n]
+        if missing:
+            logging.warning(f"⚠️ Batch reply missing {len(missing)} ids, scoring them one by one")
+        for news_id, article in missing:
+            single_prompt = build_score_prompt(query, article)
+            for i in range(len(scores[str(news_id)]), n):
+                scores[str(news_id)].append(extract_number(call_llm("scoring", single_prompt, use_cache=(i == 0))))
+
+        return [
+            (news_id, article, sum(scores[str(news_id)]) / n)
+            for news_id, article in batch
+        ]
+
+    def summarize(news_id, article, avg_score):
+        return build_scored_result(news_id, article, avg_score, get_graded_summary(article, avg_score))
+
+    with ThreadPoolExecutor(max_workers=max_workers or max(1, len(articles))) as executor:
+        scored = [entry for batch_result in executor.map(bind_context(score_batch), batches) for entry in batch_result]
+        if score_log is not None:
+            score_log.update((news_id, avg_score) for news_id, _, avg_score in scored)
+        passing = [entry for entry in scored if entry[2] >= threshold]
+        results = list(executor.map(bind_context(lambda entry: summarize(*entry)), passing))
+
+    return sorted(results, key=lambda x: x["score"], reverse=True)
+
+
+def should_stop_sampling(scores: List[int],
+                         threshold: int,
+                         n: int,
+                         max_samples: int,
+                         tolerance: float = 5,
+                         margin: float = 15) -> bool:
+    """
+    Decide whether an article has been sampled enough.
+
+    Sampling stops as soon as one of these holds:
+    - the running mean is at least `margin` away from the threshold (clear accept/reject)
+    - at least two samples were taken and they agree within `tolerance`
+    - n samples were taken and the mean is not within `tolerance` of the threshold
+    - `max_samples` samples were taken
+
+    Args:
+        scores (List[int]): Scores sampled so far
+        threshold (int): Minimum average score to include an article
+        n (int): Regular sample budget
+        max_samples (int): Hard cap for borderline articles
+        tolerance (float, optional): Allowed spread between samples. Defaults to 5.
+        margin (float, optional): Distance from threshold that counts as decisive. Defaults to 15.
+
+    Returns:
+        bool: True if no more samples are needed
+    """
+    k = len(scores)
+    mean = sum(scores) / k
+    if k >= max_samples or abs(mean - threshold) >= margin:
+        return True
+    if k >= 2 and max(scores) - min(scores) <= tolerance:
+        return True
+    return k >= n and abs(mean - threshold) >= tolerance
+
+
+def score_articles_adaptive(articles: Dict[str, Dict[str, Any]],
+                            query: str,
+                            n: int = 3,
+                            threshold: int = 20,
+                            max_samples: int = None,
+                            tolerance: float = 5,
+                            margin: float = 15,
+                            max_workers: Optional[int] = None,
+                            score_log: Dict[Any, float] = None,
+                            samples_log: Dict[Any, int] = None) -> List[Dict[str, Any]]:
+    """
+    Score articles with adaptive consistency sampling and generate summaries.
+
+    Like `score_articles_with_thread_pool`, but instead of always taking n samples,
+    each article is sampled one call at a time until `should_stop_sampling` says the
+    samples agree or the decision is clear. Only borderline articles use the full n,
+    and up to `max_samples` if their samples still disagree.
+
+    Args:
+        articles (Dict[str, Dict[str, Any]]): Dictionary of articles, where each value contains:
+            - news_title: Title of the article
+            - news_summary: Summary of the article
+            - news_content: Full content of the article
+            - date: Publication date
+        query (str): The search query to evaluate relevance against
+        n (int, optional): Regular sample budget per article. Defaults to 3.
+        threshold (int, optional): Minimum average score to include an article. Defaults to 20.
+        max_samples (int, optional): Sample cap for borderline articles. Defaults to n.
+        tolerance (float, optional): Allowed spread between samples. Defaults to 5.
+        margin (float, optional): Distance from threshold that counts as decisive. Defaults to 15.
+        max_workers (Optional[int], optional): Maximum number of threads to use. Defaults to one
+            per batch or article; the LLM scheduler caps the calls actually in flight.
+        score_log (Dict[Any, float], optional): If given, filled with the average score of every
+            scored article, including those below the threshold. Defaults to None.
+        samples_log (Dict[Any, int], optional): If given, filled with the samples taken for every
+            scored article, including those below the threshold. Defaults to None.
+
+    Returns:
+        List[Dict[str, Any]]: List of scored articles sorted by average score, in the same
+        format as `score_articles_with_thread_pool` plus:
+            - samples_used: Number of scoring calls spent on the article
+    """
+    max_samples = max(n, max_samples or n)
+
+    def compute(article):
+        prompt = build_score_prompt(query, article)
+        scores = []
+        while True:
+            # Only the first sample may come from the cache, so repeated samples stay independent
+            scores.append(extract_number(call_llm("scoring", prompt, use_cache=not scores)))
+            if should_stop_sampling(scores, threshold, n, max_samples, tolerance, margin):
+                break
+
+        avg_score = sum(scores) / len(scores)
+        logging.info(f"🎯 {article['news_title']}: {len(scores)} samples, mean {avg_score:.1f}")
+        summary = get_graded_summary(article, avg_score) if avg_score >= threshold else None
+        return len(scores), avg_score, summary
+
+    def score_one_article(news_id, article):
+        # Concurrent requests scoring the same article for the same query share one computation
+        (used, avg_score, summary), shared = _scoring_flight.do(
+            scoring_key("adaptive", query, news_id, n, threshold, max_samples, tolerance, margin),
+            lambda: compute(article)
+        )
+        # Samples spent by another request are not counted against this one
+        spent = 0 if shared else used
+        if score_log is not None:
+            score_log[news_id] = avg_score
+        if samples_log is not None:
+            samples_log[news_id] = used
+        if summary is None:
+            return spent, None
+        result = build_scored_result(news_id, article, avg_score, summary)
+        result["samples_used"] = used
+        return spent, result
+
+    with ThreadPoolExecutor(max_workers=max_workers or max(1, len(articles))) as executor:
+        outcomes = list(executor.map(bind_context(lambda item: score_one_article(*item)), articles.items()))
+
+    samples_used = sum(used for used, _ in outcomes)
+    logging.info(f"📉 Adaptive scoring used {samples_used} of {n * len(articles)} samples "
+                 f"for {len(articles)} articles")
 
+    results = [result for _, result in outcomes if result]
     return sorted(results, key=lambda x: x["score"], reverse=True)
@@ -0,0 +1,289 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from backend.app.services.CoT_service import build_scored_result
+from backend.app.services.summary_service import get_graded_summary
+
+CASCADE_CALIBRATION_PATH = os.getenv("CASCADE_CALIBRATION_PATH", "./backend/storage/cascade_calibration.json")
+CASCADE_LOG_PATH = os.getenv("CASCADE_LOG_PATH", "./backend/storage/cascade_log.jsonl")
+
+# Accept articles above the calibrated ceiling without an LLM score (their score is estimated)
+CASCADE_AUTO_ACCEPT = os.getenv("CASCADE_AUTO_ACCEPT", "0") == "1"
+
+# Share of queries whose similarities and scores go to the calibration log; 0 disables logging
+CASCADE_LOG_SAMPLE_RATE = float(os.getenv("CASCADE_LOG_SAMPLE_RATE", "0"))
+
+# Share of cascade-settled articles in logged queries that are LLM-scored anyway, so refits see both ends
+CASCADE_EXPLORE_RATE = float(os.getenv("CASCADE_EXPLORE_RATE", "0.1"))
+
+_calibration_cache: Dict[str, Any] = {"mtime": None, "value": None}
+_log_lock = threading.Lock()
+
+
+def best_similarity_per_article(docs_and_scores: Iterable[Tuple[Any, float]]) -> Dict[int, float]:
+    """
+    Reduce chunk-level retrieval scores to the best score per article.
+
+    Args:
+        docs_and_scores (Iterable[Tuple[Any, float]]): (Document, relevance score) pairs from Chroma
+
+    Returns:
+        Dict[int, float]: Highest chunk similarity per news_id
+    """
+    similarities: Dict[int, float] = {}
+    for doc, score in docs_and_scores:
+        news_id = int(doc.metadata["news_id"])
+        similarities[news_id] = max(score, similarities.get(news_id, float("-inf")))
+    return similarities
+
+
+def load_cascade_calibration(path: str = CASCADE_CALIBRATION_PATH) -> Optional[Dict[str, float]]:
+    """
+    Load the similarity cut-offs fitted by `scripts/calibrate_cascade.py`.
+
+    The file is re-read only when it changes on disk.
+
+    Args:
+        path (str, optional): Calibration JSON path. Defaults to CASCADE_CALIBRATION_PATH.
+
+    Returns:
+        Optional[Dict[str, float]]: Calibration with reject_below, accept_above, slope and
+        intercept (cut-offs may be None), or None if the cascade has not been calibrated
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    if _calibration_cache["mtime"] != mtime:
+        with open(path, "r", encoding="utf-8") as f:
+            _calibration_cache["value"] = json.load(f)
+        _calibration_cache["mtime"] = mtime
+    return _calibration_cache["value"]
+
+
+def estimate_score(similarity: float, calibration: Dict[str, float]) -> float:
+    """
+    Estimate the LLM relevance score of an article from its retrieval similarity.
+
+    Args:
+        similarity (float): Best chunk similarity of the article
+        calibration (Dict[str, float]): Calibration containing slope and intercept
+
+    Returns:
+        float: Estimated score clamped to 0-100
+    """
+    return max(0.0, min(100.0, calibration["slope"] * similarity + calibration["intercept"]))
+
+
+def start_cascade_log(sample_rate: Optional[float] = None) -> Optional[Dict[Any, str]]:
+    """
+    Decide whether this query goes to the calibration log.
+
+    Args:
+        sample_rate (Optional[float], optional): Share of queries logged. Defaults to CASCADE_LOG_SAMPLE_RATE.
+
+    Returns:
+        Optional[Dict[Any, str]]: An empty dict to collect the cascade decisions in (pass it
+        to `apply_similarity_cascade` and `record_similarity_scores`), or None if not sampled
+    """
+    rate = CASCADE_LOG_SAMPLE_RATE if sample_rate is None else sample_rate
+    return {} if rate > 0 and random.random() < rate else None
+
+
+def apply_similarity_cascade(articles: Dict[Any, Dict[str, Any]],
+                             similarities: Dict[int, float],
+                             calibration: Optional[Dict[str, float]],
+                             decisions: Optional[Dict[Any, str]] = None,
+                             auto_accept: Optional[bool] = None,
+                             explore_rate: float = CASCADE_EXPLORE_RATE
+                             ) -> Tuple[Dict[Any, Dict[str, Any]], Dict[Any, float]]:
+    """
+    Split articles into clear-cut cases and the ambiguous band that needs LLM scoring.
+
+    Articles below `reject_below` are dropped. Only with `auto_accept`, articles above
+    `accept_above` are accepted with a score estimated from their similarity. Everything
+    else (including articles without a similarity) is returned for LLM scoring.
+
+    When `decisions` is given (the query is logged), each article's decision is recorded
+    in it, and `explore_rate` of the articles the cascade would settle are sent to the
+    LLM anyway ('explored'), so the calibration log keeps covering both ends.
+
+    Args:
+        articles (Dict[Any, Dict[str, Any]]): Articles keyed by news_id
+        similarities (Dict[int, float]): Best chunk similarity per news_id
+        calibration (Optional[Dict[str, float]]): Calibration from `load_cascade_calibration`
+        decisions (Optional[Dict[Any, str]], optional): Filled with 'scored', 'explored',
+            'rejected' or 'accepted' per news_id. Defaults to None.
+        auto_accept (Optional[bool], optional): Use the `accept_above` ceiling. Defaults to CASCADE_AUTO_ACCEPT.
+        explore_rate (float, optional): Share of settled articles LLM-scored in logged queries.
+            Defaults to CASCADE_EXPLORE_RATE.
+
+    Returns:
+        Tuple[Dict[Any, Dict[str, Any]], Dict[Any, float]]: Articles to score with the LLM,
+        and auto-accepted news_ids with their estimated score
+    """
+    if not calibration:
+        if decisions is not None:
+            decisions.update((news_id, "scored") for news_id in articles)
+        return articles, {}
+
+    if auto_accept is None:
+        auto_accept = CASCADE_AUTO_ACCEPT
+    reject_below = calibration.get("reject_below")
+    accept_above = calibration.get("accept_above") if auto_accept else None
+    to_score, accepted, rejected = {}, {}, 0
+    for news_id, article in articles.items():
+        similarity = similarities.get(int(news_id))
+        if similarity is not None and reject_below is not None and similarity < reject_below:
+            decision = "rejected"
+        elif similarity is not None and accept_above is not None and similarity >= accept_above:
+            decision = "accepted"
+        else:
+            decision = "scored"
+        if decision != "scored" and decisions is not None and random.random() < explore_rate:
+            decision = "explored"
+
+        if decision == "rejected":
+            rejected += 1
+        elif decision == "accepted":
+            accepted[news_id] = max(estimate_score(similarity, calibration), calibration.get("threshold", 20))
+        else:
+            to_score[news_id] = article
+        if decisions is not None:
+            decisions[news_id] = decision
+
+    logging.info(f"🪜 Cascade: {rejected} rejected, {len(accepted)} accepted, "
+                 f"{len(to_score)} sent to LLM scoring")
+    return to_score, accepted
+
+
+def build_cascade_results(articles: Dict[Any, Dict[str, Any]], accepted: Dict[Any, float]) -> List[Dict[str, Any]]:
+    """
+    Build result entries for auto-accepted articles, with graded summaries.
+
+    Args:
+        articles (Dict[Any, Dict[str, Any]]): Articles keyed by news_id
+        accepted (Dict[Any, float]): Auto-accepted news_ids with their estimated score
+
+    Returns:
+        List[Dict[str, Any]]: Entries in the same format as the LLM scorers
+    """
+    return [
+        build_scored_result(news_id, articles[news_id], score, get_graded_summary(articles[news_id], score))
+        for news_id, score in accepted.items()
+    ]
+
+
+def record_similarity_scores(query: str,
+                             similarities: Dict[int, float],
+                             llm_scores: Dict[Any, float],
+                             decisions: Optional[Dict[Any, str]],
+                             path: str = CASCADE_LOG_PATH,
+                             explore_rate: float = CASCADE_EXPLORE_RATE) -> None:
+    """
+    Append one line per article of a sampled query to the calibration log.
+
+    Cascade-settled articles are logged without a score. Explored articles carry a
+    weight of 1 / explore_rate, so that a refit counts them for all the settled
+    articles they stand in for.
+
+    Args:
+        query (str): The query the articles were scored against
+        similarities (Dict[int, float]): Best chunk similarity per news_id
+        llm_scores (Dict[Any, float]): Average LLM score per news_id, for every scored article
+        decisions (Optional[Dict[Any, str]]): Decisions from `apply_similarity_cascade`, or None
+            if the query was not sampled (nothing is logged)
+        path (str, optional): JSONL log path; empty disables logging. Defaults to CASCADE_LOG_PATH.
+        explore_rate (float, optional): Explore rate the decisions were made with. Defaults to CASCADE_EXPLORE_RATE.
+    """
+    if not path or not decisions:
+        return
+    now = time.time()
+    lines = [
+        json.dumps({"ts": now, "query": query, "news_id": int(news_id), "similarity": similarities[int(news_id)],
+                    "score": llm_scores.get(news_id, llm_scores.get(str(news_id))), "decision": decision,
+                    "weight": 1 / explore_rate if decision == "explored" and explore_rate > 0 else 1.0},
+                   ensure_ascii=False)
+        for news_id, decision in decisions.items()
+        if int(news_id) in similarities
+    ]
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with _log_lock, open(path, "a", encoding="utf-8") as f:
+            f.write("".join(line + "\n" for line in lines))
+    except OSError as e:
+        logging.warning(f"⚠️ Could not write cascade log: {str(e)}")
+
+
+def fit_cascade_thresholds(pairs: List[Tuple[float, ...]],
+                           threshold: float = 20,
+                           max_recall_loss: float = 0.02,
+                           max_false_accept: float = 0.02,
+                           min_support: int = 20) -> Dict[str, Optional[float]]:
+    """
+    Fit the cascade cut-offs from logged (similarity, LLM score[, weight]) pairs.
+
+    - reject_below is the highest similarity such that rejecting everything below it
+      loses at most `max_recall_loss` of the articles the LLM scored >= threshold.
+    - accept_above is the lowest similarity such that at most `max_false_accept` of the
+      articles at or above it scored < threshold.
+    - slope/intercept are a least-squares fit of score on similarity, used to estimate
+      the score (and summary length) of auto-accepted articles.
+
+    Shares and the fit are weighted by each pair's weight (1 when absent). Either
+    cut-off is None when fewer than `min_support` pairs fall on its side.
+
+    Args:
+        pairs (List[Tuple[float, ...]]): (similarity, LLM score) or (similarity, LLM score, weight) tuples
+        threshold (float, optional): LLM score threshold used by the scorers. Defaults to 20.
+        max_recall_loss (float, optional): Tolerated share of relevant articles rejected. Defaults to 0.02.
+        max_false_accept (float, optional): Tolerated share of irrelevant auto-accepts. Defaults to 0.02.
+        min_support (int, optional): Minimum pairs beyond a cut-off. Defaults to 20.
+
+    Returns:
+        Dict[str, Optional[float]]: reject_below, accept_above, slope, intercept, threshold
+    """
+    pairs = sorted((p[0], p[1], p[2] if len(p) > 2 else 1.0) for p in pairs)
+    n = len(pairs)
+    relevant_total = sum(w for _, score, w in pairs if score >= threshold)
+
+    reject_below = None
+    lost = 0.0
+    for i, (similarity, score, w) in enumerate(pairs):
+        # Cutting at this similarity rejects pairs[:i]
+        if i >= min_support and relevant_total and lost / relevant_total <= max_recall_loss:
+            reject_below = similarity
+        if score >= threshold:
+            lost += w
+
+    accept_above = None
+    false_accepts = 0.0
+    total = 0.0
+    for i in range(n - 1, -1, -1):
+        similarity, score, w = pairs[i]
+        if score < threshold:
+            false_accepts += w
+        total += w
+        if n - i >= min_support and false_accepts / total <= max_false_accept:
+            accept_above = similarity
+
+    if reject_below is not None and accept_above is not None and accept_above <= reject_below:
+        accept_above = None
+
+    weight = sum(w for _, _, w in pairs)
+    mean_x = sum(s * w for s, _, w in pairs) / weight if n else 0.0
+    mean_y = sum(y * w for _, y, w in pairs) / weight if n else 0.0
+    var_x = sum(w * (s - mean_x) ** 2 for s, _, w in pairs)
+    slope = sum(w * (s - mean_x) * (y - mean_y) for s, y, w in pairs) / var_x if var_x else 0.0
+
+    return {
+        "reject_below": reject_below,
+        "accept_above": accept_above,
+        "slope": slope,
+        "intercept": mean_y - slope * mean_x,
+        "threshold": threshold,
+    }
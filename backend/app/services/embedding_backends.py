@@ -0,0 +1,355 @@
+# Embedding backends. Every backend exposes the LangChain embeddings interface
+# (`embed_documents` / `embed_query`), so Chroma and the ingesters can use any of them.
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+ONNX_CACHE_DIR = os.getenv("ONNX_CACHE_DIR", "./backend/storage/onnx")
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+DEFAULT_EMBEDDING_MODEL = "intfloat/multilingual-e5-large"
+
+
+def is_e5_model(model_name: str) -> bool:
+    """
+    Tell whether a model belongs to the E5 family, which expects input prefixes.
+
+    Args:
+        model_name (str): HuggingFace model name or local path
+
+    Returns:
+        bool: True for E5 models
+    """
+    return "e5" in os.path.basename(model_name.rstrip("/")).lower()
+
+
+# Identity keys that decide whether two sets of vectors can be compared; the torch, ONNX
+# and quantised backends of one model are interchangeable
+EMBEDDING_COMPAT_KEYS = ("embedding_model", "embedding_prefix")
+
+
+def embedding_identity(embedding: Any = None) -> Dict[str, str]:
+    """
+    Describe the vectors an embeddings object produces: model, backend and input prefix.
+
+    Vectors are comparable when the model and prefix match (see `EMBEDDING_COMPAT_KEYS`);
+    the backend only changes how they are computed and is informational. An object (or a
+    wrapped inner object) with an `identity` attribute, such as a test double, reports its own;
+    anything else is the model configured by EMBEDDING_MODEL and EMBEDDING_BACKEND,
+    which is what `initialize_embedding` loads.
+
+    Args:
+        embedding (Any, optional): Embeddings object. Defaults to the configured model.
+
+    Returns:
+        Dict[str, str]: embedding_model, embedding_backend and embedding_prefix ('e5' or 'none')
+    """
+    while embedding is not None:
+        identity = getattr(embedding, "identity", None)
+        if identity:
+            return dict(identity)
+        embedding = getattr(embedding, "inner", None)
+    model_name = os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+    return {
+        "embedding_model": model_name,
+        "embedding_backend": os.getenv("EMBEDDING_BACKEND", "torch"),
+        "embedding_prefix": "e5" if is_e5_model(model_name) else "none",
+    }
+
+
+def embedding_mismatch(metadata: Optional[Dict[str, Any]], identity: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Compare the embedding identity recorded on a Chroma collection with an expected one.
+
+    Only `EMBEDDING_COMPAT_KEYS` count; a different backend of the same model is only
+    logged. Collections written before identities were recorded carry none and are not reported.
+
+    Args:
+        metadata (Optional[Dict[str, Any]]): Collection metadata
+        identity (Dict[str, str]): Expected identity from `embedding_identity`
+
+    Returns:
+        Dict[str, Any]: Differing keys mapped to (recorded, expected); empty if they match
+    """
+    metadata = metadata or {}
+    mismatch = {key: (metadata[key], identity[key]) for key in EMBEDDING_COMPAT_KEYS
+                if key in metadata and key in identity and metadata[key] != identity[key]}
+    backend = metadata.get("embedding_backend")
+    if not mismatch and backend and identity.get("embedding_backend") not in (None, backend):
+        logging.warning(f"⚠️ Collection was embedded with the {backend} backend, now using "
+                        f"{identity['embedding_backend']}; vectors of the same model stay comparable")
+    return mismatch
+
+
+def embed_queries(embedding: Any, texts: List[str]) -> List[List[float]]:
+    """
+    Embed several queries with one encode call where the embeddings object allows it.
+
+    Wrappers that add query prefixes or caching implement `embed_queries`; a plain
+    model embeds queries and documents alike, so `embed_documents` batches them.
+
+    Args:
+        embedding (Any): Embeddings object
+        texts (List[str]): Queries to embed
+
+    Returns:
+        List[List[float]]: One vector per query
+    """
+    if hasattr(embedding, "embed_queries"):
+        return embedding.embed_queries(texts)
+    return embedding.embed_documents(texts)
+
+
+class E5PrefixedEmbeddings:
+    """
+    Add the "query: " / "passage: " prefixes E5 models were trained with.
+
+    Without them, queries and passages are embedded as the same kind of text and
+    retrieval quality drops noticeably.
+    """
+
+    def __init__(self, inner: Any):
+        self.inner = inner
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.inner.embed_documents([f"passage: {text}" for text in texts])
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.inner.embed_query(f"query: {text}")
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return embed_queries(self.inner, [f"query: {text}" for text in texts])
+
+
+class CachedQueryEmbeddings:
+    """
+    LRU cache of query embeddings in front of another embeddings object.
+
+    Repeated queries (and the several lookups one request makes: response cache,
+    partitions, chunk retrieval) skip the model entirely. Passages are not cached.
+    """
+
+    def __init__(self, inner: Any, size: int = 1024):
+        self.inner = inner
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        with self._lock:
+            if text in self._cache:
+                self._cache.move_to_end(text)
+                self.hits += 1
+                return self._cache[text]
+        vector = self.inner.embed_query(text)
+        with self._lock:
+            self.misses += 1
+            self._cache[text] = vector
+            while len(self._cache) > self.size:
+                self._cache.popitem(last=False)
+        return vector
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            cached = {text: self._cache[text] for text in texts if text in self._cache}
+            self.hits += len(cached)
+        misses = list(dict.fromkeys(text for text in texts if text not in cached))
+        if misses:
+            vectors = embed_queries(self.inner, misses)
+            with self._lock:
+                self.misses += len(misses)
+                for text, vector in zip(misses, vectors):
+                    self._cache[text] = cached[text] = vector
+                while len(self._cache) > self.size:
+                    self._cache.popitem(last=False)
+        return [cached[text] for text in texts]
+
+
+def set_encode_batch_size(embedding: Any, batch_size: int) -> None:
+    """
+    Set how many texts a backend encodes per forward pass.
+
+    Args:
+        embedding (Any): Embeddings object, possibly wrapped
+        batch_size (int): Texts per forward pass
+    """
+    while hasattr(embedding, "inner"):
+        embedding = embedding.inner
+    if hasattr(embedding, "encode_kwargs"):
+        embedding.encode_kwargs = {**(embedding.encode_kwargs or {}), "batch_size": batch_size}
+    elif hasattr(embedding, "batch_size"):
+        embedding.batch_size = batch_size
+
+
+def mean_pool(hidden_states: np.ndarray, attention_mask: np.ndarray, normalize: bool = True) -> np.ndarray:
+    """
+    Average token embeddings over the attention mask, as sentence-transformers does.
+
+    Args:
+        hidden_states (np.ndarray): (batch, tokens, dim) last hidden states
+        attention_mask (np.ndarray): (batch, tokens) mask of real tokens
+        normalize (bool, optional): L2-normalize the result. Defaults to True.
+
+    Returns:
+        np.ndarray: (batch, dim) sentence embeddings
+    """
+    import numpy as np
+
+    mask = attention_mask[..., None].astype(hidden_states.dtype)
+    pooled = (hidden_states * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+    if normalize:
+        pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+    return pooled
+
+
+def export_onnx_model(model_name: str, cache_dir: str = ONNX_CACHE_DIR) -> str:
+    """
+    Export a HuggingFace encoder to ONNX once and return its directory.
+
+    A directory that already contains `model.onnx` and `tokenizer.json` (for example a
+    small model copied there by hand) is used as is. Exporting needs `optimum[exporters]`;
+    running the exported model only needs onnxruntime and tokenizers.
+
+    Args:
+        model_name (str): HuggingFace model name, or a directory with an exported model
+        cache_dir (str, optional): Where exported models are kept. Defaults to ONNX_CACHE_DIR.
+
+    Returns:
+        str: Directory with model.onnx and tokenizer.json
+
+    Raises:
+        ImportError: If the model has to be exported and optimum is not installed
+    """
+    if os.path.exists(os.path.join(model_name, "model.onnx")):
+        return model_name
+    target = os.path.join(cache_dir, model_name.replace("/", "__"))
+    if os.path.exists(os.path.join(target, "model.onnx")):
+        return target
+    try:
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+    except ImportError as e:
+        raise ImportError("Exporting to ONNX requires `pip install optimum[exporters]`") from e
+
+    logging.info(f"📦 Exporting {model_name} to ONNX in {target}")
+    ORTModelForFeatureExtraction.from_pretrained(model_name, export=True).save_pretrained(target)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(target)
+    return target
+
+
+def quantize_onnx_model(model_dir: str) -> str:
+    """
+    Dynamically quantize an exported model's weights to int8, once.
+
+    Args:
+        model_dir (str): Directory from `export_onnx_model`
+
+    Returns:
+        str: Path of model_int8.onnx
+    """
+    target = os.path.join(model_dir, "model_int8.onnx")
+    if not os.path.exists(target):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        logging.info(f"🗜️ Quantizing {model_dir} to int8")
+        quantize_dynamic(os.path.join(model_dir, "model.onnx"), target, weight_type=QuantType.QInt8)
+    return target
+
+
+class OnnxEmbeddings:
+    """
+    CPU embeddings with ONNX Runtime, optionally with int8-quantized weights.
+
+    Produces mean-pooled, L2-normalized vectors like the sentence-transformers
+    pipeline of E5 models, at a fraction of the fp32 PyTorch latency on CPU.
+    """
+
+    def __init__(self,
+                 model_name: str,
+                 quantize: bool = True,
+                 threads: Optional[int] = None,
+                 batch_size: int = 32,
+                 max_length: int = 512,
+                 cache_dir: str = ONNX_CACHE_DIR):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = export_onnx_model(model_name, cache_dir)
+        model_path = quantize_onnx_model(model_dir) if quantize else os.path.join(model_dir, "model.onnx")
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+        self.batch_size = batch_size
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        import numpy as np
+
+        vectors = []
+        for i in range(0, len(texts), self.batch_size):
+            encodings = self.tokenizer.encode_batch(texts[i:i + self.batch_size])
+            inputs = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            hidden_states = self.session.run(None, {k: v for k, v in inputs.items() if k in self.input_names})[0]
+            vectors.append(mean_pool(hidden_states, inputs["attention_mask"]))
+        return np.concatenate(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
+
+
+def create_embedding_backend(model_name: str,
+                             backend: str = "torch",
+                             device: str = "cpu",
+                             threads: Optional[int] = None) -> Any:
+    """
+    Build the raw (unprefixed) embeddings for a backend.
+
+    Args:
+        model_name (str): HuggingFace model name or local model directory
+        backend (str, optional): 'torch' (sentence-transformers, fp32), 'onnx' or 'onnx-int8'.
+            Defaults to 'torch'.
+        device (str, optional): Device for the torch backend. Defaults to 'cpu'.
+        threads (int, optional): CPU threads used for inference. Defaults to the library default.
+
+    Returns:
+        Any: Object with `embed_documents` and `embed_query`
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    if backend == "torch":
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        return HuggingFaceEmbeddings(model_name=model_name, model_kwargs={"device": device},
+                                     encode_kwargs={"normalize_embeddings": True}, show_progress=True)
+    if backend in ("onnx", "onnx-int8"):
+        return OnnxEmbeddings(model_name, quantize=backend == "onnx-int8", threads=threads)
+    raise ValueError(f"Unknown embedding backend: {backend} (expected one of {', '.join(EMBEDDING_BACKENDS)})")
@@ -1,28 +1,81 @@
+# Heavy dependencies (pandas, langchain, torch via sentence-transformers, chromadb) are
+# imported inside the functions that need them, so importing the API stays fast.
+from __future__ import annotations
+
 import os
-import pandas as pd
-from langchain.schema import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
 import json
-import chromadb
+import logging
+from typing import TYPE_CHECKING, Any, Optional
+from backend.app.db.ingest_manifest import IngestManifest, manifest_path_for
+from backend.app.services.embedding_backends import (
+    DEFAULT_EMBEDDING_MODEL, E5PrefixedEmbeddings, create_embedding_backend, embedding_identity, is_e5_model
+)
+from backend.app.services.ingestion_service import (
+    articles_from_documents, build_text_splitter, iter_document_batches, open_news_collections, split_article,
+    write_article_batch
+)
+from backend.app.services.ingestion_pipeline import run_ingestion_pipeline, print_pipeline_report
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from langchain.schema import Document
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+
+def detect_device() -> str:
+    """
+    Pick the device for the embedding model.
+
+    The EMBEDDING_DEVICE environment variable wins; otherwise CUDA, then Apple MPS,
+    then CPU is used, depending on what the installed torch supports.
+
+    Returns:
+        str: 'cuda', 'mps' or 'cpu'
+    """
+    device = os.getenv("EMBEDDING_DEVICE")
+    if device:
+        return device
+    try:
+        import torch
+    except ImportError:
+        return "cpu"
+    if torch.cuda.is_available():
+        return "cuda"
+    if getattr(torch.backends, "mps", None) and torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
 
 
-def initialize_embedding(device: str = 'mps', model_name: str = "intfloat/multilingual-e5-large") -> HuggingFaceEmbeddings:
+def initialize_embedding(device: Optional[str] = None,
+                         model_name: Optional[str] = None,
+                         backend: Optional[str] = None,
+                         threads: Optional[int] = None) -> Any:
     """
-    Initialize the HuggingFace embedding model.
+    Initialize the embedding model.
+
+    E5 models are wrapped so that queries are embedded as "query: ..." and indexed
+    chunks as "passage: ...", as the model expects.
     
     Args:
         device (str, optional): The device to run the model on ('cpu', 'cuda', 'mps'). 
-                              Defaults to 'mps'.
-        model_name (str, optional): The name of the HuggingFace model to use. 
-                                  Defaults to 'intfloat/multilingual-e5-large'.
+                              Defaults to the result of `detect_device()` for the torch backend.
+        model_name (str, optional): The name of the HuggingFace model (or a local model directory).
+                                  Defaults to EMBEDDING_MODEL or 'intfloat/multilingual-e5-large'.
+        backend (str, optional): 'torch' (fp32 sentence-transformers), 'onnx' or 'onnx-int8'
+                               (ONNX Runtime on CPU). Defaults to EMBEDDING_BACKEND or 'torch'.
+        threads (int, optional): CPU threads for inference. Defaults to EMBEDDING_THREADS if set.
     
     Returns:
-        HuggingFaceEmbeddings: Initialized embedding model
+        Any: Embeddings object with `embed_documents` and `embed_query`
     """
-    model_kwargs = {'device': device}
-    return HuggingFaceEmbeddings(model_name=model_name, model_kwargs=model_kwargs, show_progress=True)
+    model_name = model_name or os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+    backend = backend or os.getenv("EMBEDDING_BACKEND", "torch")
+    threads = threads or int(os.getenv("EMBEDDING_THREADS", "0")) or None
+    device = device or (detect_device() if backend == "torch" else "cpu")
+
+    logging.info(f"🧠 Loading embedding model {model_name} ({backend}) on {device}")
+    embedding = create_embedding_backend(model_name, backend, device, threads)
+    return E5PrefixedEmbeddings(embedding) if is_e5_model(model_name) else embedding
 
 
 def load_news_data(file_path: str) -> pd.DataFrame:
@@ -35,6 +88,8 @@ def load_news_data(file_path: str) -> pd.DataFrame:
     Returns:
         pd.DataFrame: Processed DataFrame with non-null news content
     """
+    import pandas as pd
+
     # Read JSON file as a list of records
     with open(file_path, 'r', encoding='utf-8') as f:
         data = json.load(f)
@@ -57,29 +112,10 @@ def split_and_filter_documents(df: pd.DataFrame, chunk_size: int = 500, chunk_ov
     Returns:
         list[Document]: List of Document objects containing text chunks and metadata
     """
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        length_function=len,
-        separators=["\\n\\n", "\\n", "。", "，", "；", "！"]
-    )
-
+    splitter = build_text_splitter(chunk_size, chunk_overlap)
     documents = []
     for _, row in df.iterrows():
-        content = row['news_content']
-        if len(content.strip()) > 20:
-            splits = splitter.split_text(content)
-            cleaned = [s for s in splits if len(s.strip()) > 70]
-            for i, split in enumerate(cleaned):
-                documents.append(Document(
-                    page_content=split,
-                    metadata={
-                        "news_id": f"{row['news_id']}",
-                        "date": row['date'],
-                        "news_title": row['news_title'],
-                        "chunk_id": i
-                    }
-                ))
+        documents.extend(split_article(row, splitter))
     return documents
 
 
@@ -89,6 +125,10 @@ def store_documents_in_chroma(docs: list[Document],
                             batch_size: int = 1000) -> None:
     """
     Store document chunks in ChromaDB with embeddings.
+
+    Chunks are written like the pipelined ingester writes them: upserted under
+    deterministic ids into the monthly partitions, with stale chunks of edited
+    articles deleted and unchanged articles skipped through the ingestion manifest.
     
     Args:
         docs (list[Document]): List of Document objects to store
@@ -98,23 +138,18 @@ def store_documents_in_chroma(docs: list[Document],
         batch_size (int, optional): Number of documents to process in each batch. 
                                   Defaults to 1000.
     """
-    # Create directory if it doesn't exist
-    os.makedirs(persist_directory, exist_ok=True)
-    
-    # Initialize ChromaDB client
-    client = chromadb.PersistentClient(path=persist_directory)
-    
-    # Create or get collection
-    vectordb = Chroma(
-        client=client,
-        embedding_function=embedding,
-        collection_name="news_collection"
-    )
-    
-    for i in range(0, len(docs), batch_size):
-        batch = docs[i:i + batch_size]
-        vectordb.add_documents(batch)
-        print(f"已處理 {i + len(batch)} 筆資料...")
+    embedding_id = embedding_identity(embedding)
+    collections = open_news_collections(persist_directory, embedding_id=embedding_id)
+    manifest = IngestManifest(manifest_path_for(persist_directory))
+    articles = articles_from_documents(docs, manifest, embedding_id)
+
+    processed = 0
+    for batch in iter_document_batches(articles, batch_size):
+        texts = [text for article in batch for text, _ in article.chunks]
+        vectors = embedding.embed_documents(texts) if texts else []
+        write_article_batch(collections, batch, vectors, manifest)
+        processed += len(texts)
+        print(f"已處理 {processed} 筆資料...")
     print("所有文件已成功存入 ChromaDB")
 
 
@@ -123,6 +158,10 @@ def process_news_files(directory: str,
                       persist_directory: str = "./backend/storage/chromadb") -> None:
     """
     Process multiple news files and store them in ChromaDB.
+
+    Files go through the pipelined ingester (`run_ingestion_pipeline`): chunking,
+    embedding and Chroma writes overlap, memory stays bounded, and an interrupted
+    run resumes from its checkpoints.
     
     Args:
         directory (str): Directory containing the news files
@@ -133,18 +172,20 @@ def process_news_files(directory: str,
     # Create directory if it doesn't exist
     os.makedirs(persist_directory, exist_ok=True)
     
-    # Initialize embedding model
-    embedding = initialize_embedding()
-    
+    file_paths = []
     for file_name in file_list:
         file_path = os.path.join(directory, file_name)
         if os.path.exists(file_path):
-            print(f"處理中：{file_name}")
-            try:
-                df = load_news_data(file_path)
-                docs = split_and_filter_documents(df)
-                store_documents_in_chroma(docs, embedding, persist_directory)
-            except Exception as e:
-                print(f"處理 {file_name} 發生錯誤：{e}")
+            file_paths.append(file_path)
         else:
-            print(f"找不到 {file_name}，已跳過。")
\ No newline at end of file
+            print(f"找不到 {file_name}，已跳過。")
+
+    # Initialize embedding model
+    embedding = initialize_embedding()
+    
+    print(f"處理中：{', '.join(os.path.basename(p) for p in file_paths)}")
+    try:
+        report = run_ingestion_pipeline(file_paths, embedding, persist_directory)
+        print_pipeline_report(report)
+    except Exception as e:
+        print(f"匯入發生錯誤：{e}")
@@ -1,5 +1,28 @@
-from typing import List, Dict, Any
-from backend.app.llm_clients.openai_client import call_openai
+from typing import List, Dict, Any, AsyncIterator
+from backend.app.llm_clients.provider_router import call_llm, call_llm_async, stream_llm_async
+
+
+def build_generation_prompt(query: str, final_sorted_articles: List[Dict[str, Any]]) -> str:
+    """
+    Build the article generation prompt from the query and the scored references.
+
+    Args:
+        query (str): The main topic or theme for the news article
+        final_sorted_articles (List[Dict[str, Any]]): Reference articles with title, date and generated_summary
+
+    Returns:
+        str: Prompt instructing the LLM to write a cited news article
+    """
+    references = []
+    for idx, article in enumerate(final_sorted_articles, start=1):
+        references.append(f"{idx}.（標題：{article['title']}），日期：{article['date']}）內容：{article['generated_summary']}")
+
+    prompt = f"""
+    你是一位專業的新聞專題生成助理，請跟據「報導主題」，以及過去的「參考資料」，為讀者生成一篇完整的專題報導。生成時請評估參考資料是否與報導主題相關，報導內容需貫徹「報導主題」，於必要時引入「參考資料」增強文章。當需要引用參考資料時，注意文章與提供的參考資料一致，並注意參考資料的時間，流暢統整文章，報導語氣客觀、符合新聞寫作標準，避免口語化或冗長表述。
+    引用的方式請使用以下格式：'參考資料第X篇（來源：標題）'，其中X代表該新聞在參考資料中的編號，第一篇為1第二篇為2，以此類推。報導主題：{query}，參考資料{references}"
+    """
+    return prompt
+
 
 def generated_news_with_CoT(query: str, final_sorted_articles: List[Dict[str, Any]]) -> str:
     """
@@ -31,14 +54,49 @@ def generated_news_with_CoT(query: str, final_sorted_articles: List[Dict[str, An
         - Ensure consistency with reference materials
         - Consider the temporal context of references
     """
-    references = []
-    for idx, article in enumerate(final_sorted_articles, start=1):
-        references.append(f"{idx}.（標題：{article['title']}），日期：{article['date']}）內容：{article['generated_summary']}")
+    prompt = build_generation_prompt(query, final_sorted_articles)
+    response = call_llm("generation", prompt)
+    return response
 
-    prompt = f"""
-    你是一位專業的新聞專題生成助理，請跟據「報導主題」，以及過去的「參考資料」，為讀者生成一篇完整的專題報導。生成時請評估參考資料是否與報導主題相關，報導內容需貫徹「報導主題」，於必要時引入「參考資料」增強文章。當需要引用參考資料時，注意文章與提供的參考資料一致，並注意參考資料的時間，流暢統整文章，報導語氣客觀、符合新聞寫作標準，避免口語化或冗長表述。
-    引用的方式請使用以下格式：'參考資料第X篇（來源：標題）'，其中X代表該新聞在參考資料中的編號，第一篇為1第二篇為2，以此類推。報導主題：{query}，參考資料{references}"
+
+async def generated_news_with_CoT_async(query: str, final_sorted_articles: List[Dict[str, Any]]) -> str:
     """
+    Asynchronously generate a comprehensive news article based on a query and reference articles.
 
-    response = call_openai(prompt)
-    return response
\ No newline at end of file
+    Uses the same prompt as `generated_news_with_CoT` but awaits the LLM call
+    instead of blocking a worker thread.
+
+    Args:
+        query (str): The main topic or theme for the news article
+        final_sorted_articles (List[Dict[str, Any]]): List of reference articles, each containing:
+            - title: Article title
+            - date: Publication date
+            - generated_summary: Summary of the article
+
+    Returns:
+        str: A complete news article that integrates information from reference materials
+    """
+    prompt = build_generation_prompt(query, final_sorted_articles)
+    return await call_llm_async("generation", prompt)
+
+
+async def stream_generated_news_with_CoT(query: str, final_sorted_articles: List[Dict[str, Any]]) -> AsyncIterator[str]:
+    """
+    Stream a comprehensive news article based on a query and reference articles.
+
+    Uses the same prompt as `generated_news_with_CoT` with a streaming completion,
+    so the article can be shown to the user token by token.
+
+    Args:
+        query (str): The main topic or theme for the news article
+        final_sorted_articles (List[Dict[str, Any]]): List of reference articles, each containing:
+            - title: Article title
+            - date: Publication date
+            - generated_summary: Summary of the article
+
+    Yields:
+        str: The next piece of the generated article
+    """
+    prompt = build_generation_prompt(query, final_sorted_articles)
+    async for delta in stream_llm_async("generation", prompt):
+        yield delta
@@ -0,0 +1,293 @@
+# Pipelined ingestion: chunking runs in worker processes, embedding and Chroma writes
+# run in their own threads, and the stages are connected by bounded queues so that
+# the next batch is embedded while the previous one is being written.
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from backend.app.db.ingest_manifest import IngestManifest, manifest_path_for
+from backend.app.services.embedding_backends import embedding_identity, set_encode_batch_size
+from backend.app.services.ingestion_service import (
+    INGEST_CHECKPOINT_DIR, ChunkedArticle, advance_checkpoint, article_hash, build_text_splitter,
+    checkpoint_path_for, chunk_article, is_unchanged, iter_news_records, open_news_collections,
+    save_checkpoint, start_checkpoint, write_article_batch
+)
+
+if TYPE_CHECKING:
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+# Queue marker for "no more items"
+_DONE = object()
+
+_worker_splitter = None
+
+
+class StageStats:
+    """Items processed and seconds spent busy by one pipeline stage."""
+
+    def __init__(self, name: str, unit: str):
+        self.name = name
+        self.unit = unit
+        self.items = 0
+        self.seconds = 0.0
+
+    def add(self, items: int, seconds: float) -> None:
+        self.items += items
+        self.seconds += seconds
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "items": self.items,
+            "unit": self.unit,
+            "busy_seconds": round(self.seconds, 3),
+            "per_second": round(self.items / self.seconds, 1) if self.seconds else None,
+        }
+
+
+def _chunk_records(records: List[Tuple[int, Dict[str, Any], str, bool]],
+                   chunk_size: int,
+                   chunk_overlap: int) -> Tuple[List[ChunkedArticle], float]:
+    """
+    Chunk a group of articles; runs in a worker process.
+
+    Returns:
+        Tuple[List[ChunkedArticle], float]: The chunked articles and the seconds spent
+    """
+    global _worker_splitter
+    start = time.perf_counter()
+    if _worker_splitter is None:
+        _worker_splitter = build_text_splitter(chunk_size, chunk_overlap)
+    chunked = [
+        chunk_article(offset, record, _worker_splitter, digest, unchanged)
+        for offset, record, digest, unchanged in records
+    ]
+    return chunked, time.perf_counter() - start
+
+
+def _put(q: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    """Put with back-pressure; gives up (returns False) once the pipeline is stopping."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event) -> Any:
+    """Get the next item, or _DONE once the pipeline is stopping."""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def run_ingestion_pipeline(file_paths: List[str],
+                           embedding: Optional[HuggingFaceEmbeddings] = None,
+                           persist_directory: str = "./backend/storage/chromadb",
+                           batch_size: int = 256,
+                           encode_batch_size: int = 32,
+                           chunk_workers: Optional[int] = None,
+                           records_per_task: int = 64,
+                           queue_size: int = 4,
+                           chunk_size: int = 500,
+                           chunk_overlap: int = 50,
+                           resume: bool = True,
+                           checkpoint_dir: str = INGEST_CHECKPOINT_DIR,
+                           collection: Any = None,
+                           manifest: Optional[IngestManifest] = None) -> Dict[str, Any]:
+    """
+    Ingest news files through a three-stage pipeline.
+
+    1. Chunking: articles are read incrementally and split in `chunk_workers` processes,
+       `records_per_task` articles per task.
+    2. Embedding: chunks are grouped into batches of about `batch_size` (ending on article
+       boundaries) and encoded with `encode_batch_size` texts per forward pass.
+    3. Writing: embedded batches are upserted into the Chroma collection while the next
+       batch is being embedded, stale chunks are deleted, and the manifest and the file's
+       checkpoint are advanced.
+
+    Articles the manifest records with the same content hash are not chunked, embedded
+    or written again.
+
+    Stages are connected by queues of `queue_size` items, so memory stays bounded when
+    one stage is slower than the others. Files are checkpointed like
+    `stream_news_file_to_chroma`, so both ingesters can resume each other's runs.
+
+    Args:
+        file_paths (List[str]): News files (JSON array or JSON Lines)
+        embedding (HuggingFaceEmbeddings, optional): Embedding model. Defaults to `initialize_embedding()`.
+        persist_directory (str, optional): Directory of the ChromaDB. Defaults to "./backend/storage/chromadb".
+        batch_size (int, optional): Chunks per embedding/write batch. Defaults to 256.
+        encode_batch_size (int, optional): Texts per model forward pass. Defaults to 32.
+        chunk_workers (int, optional): Chunking processes; 0 chunks in a thread. Defaults to the CPU count.
+        records_per_task (int, optional): Articles sent to a chunking process at a time. Defaults to 64.
+        queue_size (int, optional): Capacity of each inter-stage queue. Defaults to 4.
+        chunk_size (int, optional): Size of each text chunk. Defaults to 500.
+        chunk_overlap (int, optional): Overlap between chunks. Defaults to 50.
+        resume (bool, optional): Continue from saved checkpoints. Defaults to True.
+        checkpoint_dir (str, optional): Directory of checkpoints. Defaults to INGEST_CHECKPOINT_DIR.
+        collection (Any, optional): NewsCollections or raw collection to write to.
+            Defaults to `open_news_collections(persist_directory)`.
+        manifest (IngestManifest, optional): Ingestion manifest. Defaults to the one in `persist_directory`.
+
+    Returns:
+        Dict[str, Any]: Wall-clock seconds, per-file checkpoints and per-stage throughput
+    """
+    if embedding is None:
+        from backend.app.services.embedding_service import initialize_embedding
+        embedding = initialize_embedding()
+    set_encode_batch_size(embedding, encode_batch_size)
+    embedding_id = embedding_identity(embedding)
+    if collection is None:
+        collection = open_news_collections(persist_directory, embedding_id=embedding_id)
+    if manifest is None:
+        manifest = IngestManifest(manifest_path_for(persist_directory))
+    if chunk_workers is None:
+        chunk_workers = os.cpu_count() or 1
+
+    stats = {
+        "chunk": StageStats("chunk", "articles"),
+        "embed": StageStats("embed", "chunks"),
+        "write": StageStats("write", "chunks"),
+    }
+    checkpoints: Dict[str, Dict[str, Any]] = {}
+    chunk_q: queue.Queue = queue.Queue(maxsize=queue_size)
+    write_q: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors: List[BaseException] = []
+    executor = ProcessPoolExecutor(max_workers=chunk_workers) if chunk_workers > 0 else None
+
+    def submit(records):
+        if executor is not None:
+            return executor.submit(_chunk_records, records, chunk_size, chunk_overlap)
+        future: Future = Future()
+        future.set_result(_chunk_records(records, chunk_size, chunk_overlap))
+        return future
+
+    def read_and_chunk():
+        try:
+            for file_path in file_paths:
+                checkpoint = start_checkpoint(file_path, checkpoint_dir, resume)
+                checkpoints[file_path] = checkpoint
+                records = []
+                for offset, record in iter_news_records(file_path, start_offset=checkpoint["offset"]):
+                    digest = article_hash(record, chunk_size, chunk_overlap, embedding_id)
+                    records.append((offset, record, digest, is_unchanged(record, digest, manifest)))
+                    if len(records) >= records_per_task:
+                        if not _put(chunk_q, ("chunks", file_path, submit(records)), stop):
+                            return
+                        records = []
+                if records and not _put(chunk_q, ("chunks", file_path, submit(records)), stop):
+                    return
+                if not _put(chunk_q, ("eof", file_path, None), stop):
+                    return
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put(chunk_q, _DONE, stop)
+
+    def embed():
+        batch: List[ChunkedArticle] = []
+        chunks, current = 0, None
+
+        def flush():
+            nonlocal batch, chunks
+            if not batch:
+                return True
+            texts = [text for article in batch for text, _ in article.chunks]
+            start = time.perf_counter()
+            vectors = embedding.embed_documents(texts) if texts else []
+            stats["embed"].add(len(texts), time.perf_counter() - start)
+            item = ("batch", current, batch, vectors)
+            batch, chunks = [], 0
+            return _put(write_q, item, stop)
+
+        try:
+            while True:
+                item = _get(chunk_q, stop)
+                if item is _DONE:
+                    break
+                kind, file_path, future = item
+                if kind == "eof":
+                    if not flush() or not _put(write_q, ("eof", file_path), stop):
+                        return
+                    continue
+                current = file_path
+                chunked, seconds = future.result()
+                stats["chunk"].add(len(chunked), seconds)
+                for article in chunked:
+                    batch.append(article)
+                    chunks += len(article.chunks)
+                    if chunks >= batch_size and not flush():
+                        return
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put(write_q, _DONE, stop)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=read_and_chunk, daemon=True), threading.Thread(target=embed, daemon=True)]
+    for thread in threads:
+        thread.start()
+    try:
+        while True:
+            item = _get(write_q, stop)
+            if item is _DONE:
+                break
+            if item[0] == "eof":
+                checkpoint = checkpoints[item[1]]
+                checkpoint["done"] = True
+                save_checkpoint(checkpoint_path_for(item[1], checkpoint_dir), checkpoint)
+                continue
+            _, file_path, articles, vectors = item
+            write_start = time.perf_counter()
+            written = write_article_batch(collection, articles, vectors, manifest)
+            stats["write"].add(written["written"], time.perf_counter() - write_start)
+            checkpoint = checkpoints[file_path]
+            advance_checkpoint(checkpoint, articles, written)
+            save_checkpoint(checkpoint_path_for(file_path, checkpoint_dir), checkpoint)
+            print(f"已處理 {checkpoint['records']} 篇文章、{checkpoint['chunks']} 個段落"
+                  f"（未變更 {checkpoint['skipped']} 篇，{os.path.basename(file_path)}）...")
+    except BaseException as e:
+        errors.append(e)
+        stop.set()
+    finally:
+        for thread in threads:
+            thread.join()
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    if errors:
+        raise errors[0]
+
+    report = {
+        "seconds": round(time.perf_counter() - start, 3),
+        "files": checkpoints,
+        "stages": {name: stage.as_dict() for name, stage in stats.items()},
+    }
+    logging.info(f"📥 Ingestion pipeline finished: {report['stages']}")
+    return report
+
+
+def print_pipeline_report(report: Dict[str, Any]) -> None:
+    """
+    Print per-stage throughput of a pipeline run.
+
+    Args:
+        report (Dict[str, Any]): Return value of `run_ingestion_pipeline`
+    """
+    print(f"總耗時 {report['seconds']:.1f} 秒")
+    for name, stage in report["stages"].items():
+        rate = f"{stage['per_second']:.1f} {stage['unit']}/s" if stage["per_second"] else "-"
+        print(f"  {name:<6} {stage['items']:>8} {stage['unit']:<8} 忙碌 {stage['busy_seconds']:>8.1f} 秒  {rate}")
@@ -0,0 +1,700 @@
+# Streaming ingestion: news dumps are read record by record and written to Chroma in
+# fixed-size batches, so peak memory does not depend on the size of the input file.
+from __future__ import annotations
+
+import codecs
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from backend.app.db.ingest_manifest import IngestManifest, manifest_path_for
+from backend.app.db.partitions import partition_name
+from backend.app.services.embedding_backends import EMBEDDING_COMPAT_KEYS, embedding_identity, embedding_mismatch
+
+if TYPE_CHECKING:
+    from langchain.schema import Document
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+# JSON whitespace, plus a UTF-8 byte order mark at the start of the file
+_BLANK = " \t\r\n\ufeff"
+
+# 'month' writes each article to the news_YYYY_MM collection of its date; 'none' uses news_collection
+CHROMA_PARTITIONING = os.getenv("CHROMA_PARTITIONING", "month")
+
+INGEST_CHECKPOINT_DIR = os.getenv("INGEST_CHECKPOINT_DIR", "./backend/storage/ingest_checkpoints")
+
+
+def detect_news_format(file_path: str) -> str:
+    """
+    Tell a JSON array dump from a JSON Lines dump by its first non-blank byte.
+
+    Args:
+        file_path (str): Path to the news file
+
+    Returns:
+        str: 'array' or 'jsonl'
+    """
+    with open(file_path, "rb") as f:
+        while True:
+            block = f.read(4096)
+            if not block:
+                return "jsonl"
+            stripped = block.lstrip()
+            if stripped:
+                # UTF-8 BOM
+                stripped = stripped[3:].lstrip() if stripped.startswith(codecs.BOM_UTF8) else stripped
+                if stripped:
+                    return "array" if stripped[:1] == b"[" else "jsonl"
+
+
+def _iter_jsonl(file_path: str, start_offset: int) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    with open(file_path, "rb") as f:
+        f.seek(start_offset)
+        offset = start_offset
+        for line in f:
+            offset += len(line)
+            line = line.strip()
+            if line:
+                yield offset, json.loads(line)
+
+
+def _iter_json_array(file_path: str, start_offset: int, block_size: int) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    with open(file_path, "rb") as f:
+        f.seek(start_offset)
+        offset = start_offset
+        # A non-zero offset always points just past a record, i.e. inside the array
+        started = start_offset > 0
+        buf, eof = "", False
+
+        def consume(n: int) -> None:
+            nonlocal buf, offset
+            offset += len(buf[:n].encode("utf-8"))
+            buf = buf[n:]
+
+        while True:
+            stripped = buf.lstrip(_BLANK)
+            if stripped and not started:
+                if stripped[0] != "[":
+                    raise ValueError(f"{file_path} is not a JSON array")
+                consume(len(buf) - len(stripped) + 1)
+                started = True
+                continue
+            if stripped[:1] == ",":
+                consume(len(buf) - len(stripped) + 1)
+                continue
+            if stripped[:1] == "]":
+                return
+            if stripped:
+                try:
+                    record, end = decoder.raw_decode(buf, len(buf) - len(stripped))
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    consume(end)
+                    yield offset, record
+                    continue
+            if eof:
+                if started:
+                    raise ValueError(f"{file_path} ended before the JSON array was closed")
+                return
+            block = f.read(block_size)
+            eof = not block
+            buf += text_decoder.decode(block, final=eof)
+
+
+def iter_news_records(file_path: str,
+                      start_offset: int = 0,
+                      block_size: int = 1 << 20) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Incrementally parse a news dump, holding at most one block plus one record in memory.
+
+    Both a single JSON array of articles and JSON Lines (one article per line) are
+    supported. Each record is yielded with the byte offset just past it; passing that
+    offset back as `start_offset` resumes right after the record.
+
+    Args:
+        file_path (str): Path to the news file
+        start_offset (int, optional): Byte offset to resume from. Defaults to 0.
+        block_size (int, optional): Bytes read per block for JSON arrays. Defaults to 1 MiB.
+
+    Returns:
+        Iterator[Tuple[int, Dict[str, Any]]]: (byte offset after the record, record) pairs
+
+    Raises:
+        ValueError: If a JSON array dump is malformed or truncated
+    """
+    if detect_news_format(file_path) == "jsonl":
+        return _iter_jsonl(file_path, start_offset)
+    return _iter_json_array(file_path, start_offset, block_size)
+
+
+def build_text_splitter(chunk_size: int = 500, chunk_overlap: int = 50):
+    """
+    Create the text splitter used for news chunks.
+
+    Args:
+        chunk_size (int, optional): Size of each text chunk. Defaults to 500.
+        chunk_overlap (int, optional): Overlap between chunks. Defaults to 50.
+
+    Returns:
+        RecursiveCharacterTextSplitter: Configured splitter
+    """
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        separators=["\\n\\n", "\\n", "。", "，", "；", "！"]
+    )
+
+
+class ChunkedArticle(NamedTuple):
+    """One article on its way through ingestion."""
+    offset: int
+    news_id: str
+    article_hash: str
+    chunks: List[Tuple[str, Dict[str, Any]]]
+    unchanged: bool = False
+    date: Optional[str] = None
+
+
+def article_hash(record: Dict[str, Any],
+                 chunk_size: int = 500,
+                 chunk_overlap: int = 50,
+                 embedding_id: Optional[Dict[str, str]] = None) -> str:
+    """
+    Hash the fields of an article that end up in the vector store.
+
+    The chunking parameters and the embedding model and prefix are included, so
+    changing them re-ingests everything; switching only the backend does not.
+
+    Args:
+        record (Dict[str, Any]): Article record
+        chunk_size (int, optional): Size of each text chunk. Defaults to 500.
+        chunk_overlap (int, optional): Overlap between chunks. Defaults to 50.
+        embedding_id (Optional[Dict[str, str]], optional): `embedding_identity` of the model
+            the chunks are embedded with. Defaults to the configured model.
+
+    Returns:
+        str: Hex digest
+    """
+    identity = embedding_id or embedding_identity()
+    compat = [(key, identity.get(key)) for key in EMBEDDING_COMPAT_KEYS]
+    raw = json.dumps([record.get("news_title"), record.get("date"), record.get("news_content"),
+                      chunk_size, chunk_overlap, compat], ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def make_chunk_id(news_id: Any, index: int, text: str) -> str:
+    """
+    Build the deterministic id of a chunk from its article, position and content.
+
+    Args:
+        news_id (Any): News ID of the article
+        index (int): Position of the chunk in the article
+        text (str): Chunk text
+
+    Returns:
+        str: '<news_id>-<index>-<first 16 hex digits of the content hash>'
+    """
+    return f"{news_id}-{index}-{hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]}"
+
+
+def split_text_chunks(record: Dict[str, Any], splitter: Any) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Split one article into (text, metadata) chunks.
+
+    Articles without content (or with fewer than 20 characters) produce no chunks,
+    and chunks of 70 characters or less are dropped.
+
+    Args:
+        record (Dict[str, Any]): Article with news_id, date, news_title and news_content
+        splitter (Any): Splitter from `build_text_splitter`
+
+    Returns:
+        List[Tuple[str, Dict[str, Any]]]: The article's chunks
+    """
+    content = record.get("news_content")
+    if not isinstance(content, str) or len(content.strip()) <= 20:
+        return []
+    cleaned = [s for s in splitter.split_text(content) if len(s.strip()) > 70]
+    return [
+        (split, {
+            "news_id": f"{record['news_id']}",
+            "date": record["date"],
+            "news_title": record["news_title"],
+            "chunk_id": i
+        })
+        for i, split in enumerate(cleaned)
+    ]
+
+
+def split_article(record: Dict[str, Any], splitter: Any) -> List[Document]:
+    """
+    Split one article into Document chunks with metadata.
+
+    Args:
+        record (Dict[str, Any]): Article with news_id, date, news_title and news_content
+        splitter (Any): Splitter from `build_text_splitter`
+
+    Returns:
+        List[Document]: The article's chunks
+    """
+    from langchain.schema import Document
+
+    return [Document(page_content=text, metadata=metadata) for text, metadata in split_text_chunks(record, splitter)]
+
+
+def chunk_article(offset: int, record: Dict[str, Any], splitter: Any, digest: str, unchanged: bool = False) -> ChunkedArticle:
+    """
+    Chunk one article, unless the manifest says it is unchanged.
+
+    Args:
+        offset (int): Byte offset just past the record
+        record (Dict[str, Any]): Article record
+        splitter (Any): Splitter from `build_text_splitter`
+        digest (str): `article_hash` of the record
+        unchanged (bool, optional): Skip chunking because the article is already ingested. Defaults to False.
+
+    Returns:
+        ChunkedArticle: The article with its chunks (none if unchanged)
+    """
+    chunks = [] if unchanged else split_text_chunks(record, splitter)
+    return ChunkedArticle(offset, str(record["news_id"]), digest, chunks, unchanged, record.get("date"))
+
+
+def is_unchanged(record: Dict[str, Any], digest: str, manifest: Optional[IngestManifest]) -> bool:
+    """
+    Tell whether an article was already ingested with the same content.
+
+    Args:
+        record (Dict[str, Any]): Article record
+        digest (str): `article_hash` of the record
+        manifest (Optional[IngestManifest]): Ingestion manifest, or None to ingest everything
+
+    Returns:
+        bool: True if the article can be skipped
+    """
+    if manifest is None:
+        return False
+    entry = manifest.get(str(record["news_id"]))
+    return entry is not None and entry[0] == digest
+
+
+def iter_article_chunks(records: Iterable[Tuple[int, Dict[str, Any]]],
+                        chunk_size: int = 500,
+                        chunk_overlap: int = 50,
+                        manifest: Optional[IngestManifest] = None,
+                        embedding_id: Optional[Dict[str, str]] = None) -> Iterator[ChunkedArticle]:
+    """
+    Lazily chunk a stream of articles, skipping those the manifest marks as unchanged.
+
+    Args:
+        records (Iterable[Tuple[int, Dict[str, Any]]]): (offset, record) pairs from `iter_news_records`
+        chunk_size (int, optional): Size of each text chunk. Defaults to 500.
+        chunk_overlap (int, optional): Overlap between chunks. Defaults to 50.
+        manifest (Optional[IngestManifest], optional): Ingestion manifest. Defaults to None.
+        embedding_id (Optional[Dict[str, str]], optional): `embedding_identity` of the model the
+            chunks will be embedded with. Defaults to the configured model.
+
+    Returns:
+        Iterator[ChunkedArticle]: One entry per article
+    """
+    splitter = build_text_splitter(chunk_size, chunk_overlap)
+    embedding_id = embedding_id or embedding_identity()
+    for offset, record in records:
+        digest = article_hash(record, chunk_size, chunk_overlap, embedding_id)
+        yield chunk_article(offset, record, splitter, digest, is_unchanged(record, digest, manifest))
+
+
+def articles_from_documents(docs: Iterable[Document],
+                            manifest: Optional[IngestManifest] = None,
+                            embedding_id: Optional[Dict[str, str]] = None) -> List[ChunkedArticle]:
+    """
+    Group already split Document chunks into articles for `write_article_batch`.
+
+    The full article text is not available here, so the article hash covers the chunks
+    themselves (and the embedding identity); articles whose chunks the manifest already
+    holds are marked unchanged.
+
+    Args:
+        docs (Iterable[Document]): Chunks from `split_article`, in any order
+        manifest (Optional[IngestManifest], optional): Ingestion manifest. Defaults to None.
+        embedding_id (Optional[Dict[str, str]], optional): `embedding_identity` of the model the
+            chunks will be embedded with. Defaults to the configured model.
+
+    Returns:
+        List[ChunkedArticle]: One entry per news_id, in order of first appearance
+    """
+    identity = embedding_id or embedding_identity()
+    grouped: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+    for doc in docs:
+        grouped.setdefault(str(doc.metadata["news_id"]), []).append((doc.page_content, doc.metadata))
+
+    articles = []
+    for news_id, chunks in grouped.items():
+        chunks.sort(key=lambda chunk: chunk[1]["chunk_id"])
+        raw = json.dumps([chunks, [(key, identity.get(key)) for key in EMBEDDING_COMPAT_KEYS]],
+                         ensure_ascii=False, default=str)
+        digest = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+        entry = manifest.get(news_id) if manifest is not None else None
+        unchanged = entry is not None and entry[0] == digest
+        articles.append(ChunkedArticle(0, news_id, digest, [] if unchanged else chunks, unchanged,
+                                       chunks[0][1].get("date")))
+    return articles
+
+
+def iter_document_batches(chunked: Iterable[ChunkedArticle], batch_size: int = 256) -> Iterator[List[ChunkedArticle]]:
+    """
+    Group chunked articles into batches of about `batch_size` chunks.
+
+    Batches end on article boundaries, so the offset of a batch's last article is a
+    safe resume point: every chunk of every article before it has been emitted. A
+    batch holds at most `batch_size - 1` chunks plus those of one article.
+
+    Args:
+        chunked (Iterable[ChunkedArticle]): Output of `iter_article_chunks`
+        batch_size (int, optional): Target number of chunks per batch. Defaults to 256.
+
+    Returns:
+        Iterator[List[ChunkedArticle]]: Batches of articles
+    """
+    batch: List[ChunkedArticle] = []
+    chunks = 0
+    for article in chunked:
+        batch.append(article)
+        chunks += len(article.chunks)
+        if chunks >= batch_size:
+            yield batch
+            batch, chunks = [], 0
+    if batch:
+        yield batch
+
+
+class NewsCollections:
+    """
+    Resolves the Chroma collection each article is written to.
+
+    With 'month' partitioning an article goes to the news_YYYY_MM collection of its
+    date (articles without a usable date go to the default collection); with 'none'
+    everything goes to the default collection.
+
+    With an `embedding_id`, collections opened from the client record it in their
+    metadata, and writing to one that holds vectors of another embedding raises.
+    """
+
+    def __init__(self,
+                 client: Any = None,
+                 partitioning: str = CHROMA_PARTITIONING,
+                 default_name: str = "news_collection",
+                 collections: Optional[Dict[str, Any]] = None,
+                 embedding_id: Optional[Dict[str, str]] = None):
+        self.client = client
+        self.partitioning = partitioning
+        self.default_name = default_name
+        self.embedding_id = embedding_id
+        self._collections: Dict[str, Any] = dict(collections or {})
+
+    @classmethod
+    def single(cls, collection: Any, name: str = "news_collection") -> "NewsCollections":
+        """Wrap one raw collection that receives every article."""
+        return cls(partitioning="none", default_name=name, collections={name: collection})
+
+    def name_for(self, article: ChunkedArticle) -> str:
+        if self.partitioning == "month":
+            return partition_name(article.date) or self.default_name
+        return self.default_name
+
+    def get(self, name: str) -> Any:
+        if name not in self._collections:
+            # Embeddings are always computed by us, so Chroma needs no embedding function
+            collection = self.client.get_or_create_collection(name, embedding_function=None,
+                                                              metadata=self.embedding_id)
+            if self.embedding_id:
+                self._check_embedding(name, collection)
+            self._collections[name] = collection
+        return self._collections[name]
+
+    def _check_embedding(self, name: str, collection: Any) -> None:
+        metadata = collection.metadata or {}
+        mismatch = embedding_mismatch(metadata, self.embedding_id)
+        if mismatch:
+            raise ValueError(f"Collection {name} holds vectors of another embedding {mismatch} "
+                             f"(recorded, configured); ingest into a new CHROMA_DIR instead")
+        if any(key not in metadata for key in self.embedding_id):
+            # Collections created before identities were recorded; distance settings cannot be modified
+            kept = {key: value for key, value in metadata.items() if not key.startswith("hnsw:")}
+            collection.modify(metadata={**kept, **self.embedding_id})
+
+
+def write_article_batch(collections: Any,
+                        articles: List[ChunkedArticle],
+                        vectors: List[List[float]],
+                        manifest: Optional[IngestManifest] = None) -> Dict[str, int]:
+    """
+    Upsert a batch of embedded chunks under deterministic ids and drop stale chunks.
+
+    Chunks of edited articles that no longer exist (or that now live in another
+    partition) are deleted, and the manifest is updated after the collections, so a
+    crash in between only causes an idempotent re-upsert on the next run. An article
+    that occurs more than once in the batch is written once, from its last copy.
+
+    Args:
+        collections (Any): NewsCollections, or a single raw Chroma collection
+        articles (List[ChunkedArticle]): Batch from `iter_document_batches`
+        vectors (List[List[float]]): Embeddings of all chunks of the changed articles, in order
+        manifest (Optional[IngestManifest], optional): Ingestion manifest to consult and update
+
+    Returns:
+        Dict[str, int]: Chunks written and deleted, and articles skipped as unchanged
+    """
+    if not isinstance(collections, NewsCollections):
+        collections = NewsCollections.single(collections)
+
+    # Dumps often repeat an article; only its last copy in the batch is written, with its own vectors
+    vector_iter = iter(vectors)
+    latest: Dict[str, Tuple[ChunkedArticle, List[List[float]]]] = {}
+    for article in articles:
+        if not article.unchanged:
+            latest[article.news_id] = (article, [next(vector_iter) for _ in article.chunks])
+    changed = [article for article, _ in latest.values()]
+    ids = {
+        article.news_id: [make_chunk_id(article.news_id, metadata["chunk_id"], text) for text, metadata in article.chunks]
+        for article in changed
+    }
+    targets = {article.news_id: collections.name_for(article) for article in changed}
+
+    # One upsert per target collection
+    grouped: Dict[str, Tuple[List[str], List[List[float]], List[str], List[Dict[str, Any]]]] = {}
+    for article, article_vectors in latest.values():
+        group = grouped.setdefault(targets[article.news_id], ([], [], [], []))
+        for chunk_id, (text, metadata), vector in zip(ids[article.news_id], article.chunks, article_vectors):
+            group[0].append(chunk_id)
+            group[1].append(vector)
+            group[2].append(text)
+            group[3].append(metadata)
+    for name, (chunk_ids, embeddings, documents, metadatas) in grouped.items():
+        if chunk_ids:
+            collections.get(name).upsert(ids=chunk_ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    deleted = 0
+    if manifest is not None and changed:
+        stale: Dict[str, List[str]] = {}
+        for news_id, (_, old_ids, old_collection) in manifest.get_many(ids).items():
+            keep = set(ids[news_id]) if old_collection == targets[news_id] else set()
+            stale.setdefault(old_collection, []).extend(chunk_id for chunk_id in old_ids if chunk_id not in keep)
+        for name, chunk_ids in stale.items():
+            if chunk_ids:
+                collections.get(name).delete(ids=chunk_ids)
+                deleted += len(chunk_ids)
+        manifest.put_many(
+            (article.news_id, article.article_hash, ids[article.news_id], targets[article.news_id])
+            for article in changed
+        )
+
+    return {"written": sum(len(group[0]) for group in grouped.values()), "deleted": deleted,
+            "skipped": sum(1 for article in articles if article.unchanged)}
+
+
+def checkpoint_path_for(file_path: str, checkpoint_dir: str = INGEST_CHECKPOINT_DIR) -> str:
+    """
+    Return the checkpoint file used for a news file.
+
+    Args:
+        file_path (str): Path to the news file
+        checkpoint_dir (str, optional): Directory of checkpoints. Defaults to INGEST_CHECKPOINT_DIR.
+
+    Returns:
+        str: Path of the JSON checkpoint
+    """
+    return os.path.join(checkpoint_dir, os.path.basename(file_path) + ".checkpoint.json")
+
+
+def load_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Read an ingestion checkpoint.
+
+    Args:
+        path (str): Checkpoint path
+
+    Returns:
+        Optional[Dict[str, Any]]: The checkpoint (offset, records, chunks, done), or None if absent
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_checkpoint(path: str, checkpoint: Dict[str, Any]) -> None:
+    """
+    Atomically write an ingestion checkpoint.
+
+    Args:
+        path (str): Checkpoint path
+        checkpoint (Dict[str, Any]): Checkpoint to write
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def open_news_collection(embedding: HuggingFaceEmbeddings,
+                         persist_directory: str = "./backend/storage/chromadb",
+                         collection_name: str = "news_collection") -> Any:
+    """
+    Open (or create) the persisted Chroma news collection.
+
+    Args:
+        embedding (HuggingFaceEmbeddings): Embedding model to use
+        persist_directory (str, optional): Directory to persist the database.
+                                         Defaults to "./backend/storage/chromadb".
+        collection_name (str, optional): Collection name. Defaults to "news_collection".
+
+    Returns:
+        Chroma: The collection wrapper
+    """
+    import chromadb
+    from langchain_chroma import Chroma
+
+    os.makedirs(persist_directory, exist_ok=True)
+    client = chromadb.PersistentClient(path=persist_directory)
+    return Chroma(client=client, embedding_function=embedding, collection_name=collection_name)
+
+
+def open_news_collections(persist_directory: str = "./backend/storage/chromadb",
+                          partitioning: str = CHROMA_PARTITIONING,
+                          embedding_id: Optional[Dict[str, str]] = None) -> NewsCollections:
+    """
+    Open the persisted ChromaDB for writing, partitioned as configured.
+
+    Args:
+        persist_directory (str, optional): Directory to persist the database.
+                                         Defaults to "./backend/storage/chromadb".
+        partitioning (str, optional): 'month' or 'none'. Defaults to CHROMA_PARTITIONING.
+        embedding_id (Optional[Dict[str, str]], optional): `embedding_identity` recorded on (and
+            checked against) the collections. Defaults to the configured model.
+
+    Returns:
+        NewsCollections: Resolver of the collection each article is written to
+    """
+    import chromadb
+
+    os.makedirs(persist_directory, exist_ok=True)
+    return NewsCollections(chromadb.PersistentClient(path=persist_directory), partitioning,
+                           embedding_id=embedding_id or embedding_identity())
+
+
+def start_checkpoint(file_path: str, checkpoint_dir: str = INGEST_CHECKPOINT_DIR, resume: bool = True) -> Dict[str, Any]:
+    """
+    Return the checkpoint a run over `file_path` starts from.
+
+    An unfinished saved checkpoint is resumed; a finished one starts a new pass over
+    the file (cheap, because the manifest skips unchanged articles).
+
+    Args:
+        file_path (str): Path to the news file
+        checkpoint_dir (str, optional): Directory of checkpoints. Defaults to INGEST_CHECKPOINT_DIR.
+        resume (bool, optional): Consider the saved checkpoint at all. Defaults to True.
+
+    Returns:
+        Dict[str, Any]: Checkpoint with file, offset, records, chunks, skipped, deleted and done
+    """
+    checkpoint = {"file": os.path.abspath(file_path), "offset": 0, "records": 0, "chunks": 0,
+                  "skipped": 0, "deleted": 0, "done": False}
+    saved = load_checkpoint(checkpoint_path_for(file_path, checkpoint_dir)) if resume else None
+    if saved and saved.get("file") == checkpoint["file"] and not saved.get("done"):
+        checkpoint.update(saved)
+        print(f"從位移 {checkpoint['offset']} 繼續匯入 {os.path.basename(file_path)}（已處理 {checkpoint['records']} 篇）")
+    return checkpoint
+
+
+def advance_checkpoint(checkpoint: Dict[str, Any], articles: List[ChunkedArticle], written: Dict[str, int]) -> None:
+    """
+    Move a checkpoint past a written batch.
+
+    Args:
+        checkpoint (Dict[str, Any]): Checkpoint from `start_checkpoint`
+        articles (List[ChunkedArticle]): The batch that was written
+        written (Dict[str, int]): Result of `write_article_batch`
+    """
+    checkpoint["offset"] = articles[-1].offset
+    checkpoint["records"] += len(articles)
+    checkpoint["chunks"] += written["written"]
+    checkpoint["skipped"] += written["skipped"]
+    checkpoint["deleted"] += written["deleted"]
+
+
+def stream_news_file_to_chroma(file_path: str,
+                               embedding: Optional[HuggingFaceEmbeddings] = None,
+                               persist_directory: str = "./backend/storage/chromadb",
+                               batch_size: int = 256,
+                               start_offset: Optional[int] = None,
+                               resume: bool = True,
+                               checkpoint_dir: str = INGEST_CHECKPOINT_DIR,
+                               collection: Any = None,
+                               manifest: Optional[IngestManifest] = None) -> Dict[str, Any]:
+    """
+    Ingest a news dump into Chroma with bounded memory, checkpointing after every batch.
+
+    Records are parsed incrementally, chunked lazily and embedded/written in batches of
+    about `batch_size` chunks. After each batch the byte offset reached is saved, so a
+    crashed run resumes where it stopped instead of starting over.
+
+    Chunks are upserted under deterministic ids and recorded in the ingestion manifest,
+    so re-ingesting a file skips unchanged articles, replaces edited ones and deletes
+    their stale chunks.
+
+    Args:
+        file_path (str): Path to a JSON array or JSON Lines news file
+        embedding (HuggingFaceEmbeddings, optional): Embedding model. Defaults to `initialize_embedding()`.
+        persist_directory (str, optional): Directory of the ChromaDB. Defaults to "./backend/storage/chromadb".
+        batch_size (int, optional): Chunks embedded and written per batch. Defaults to 256.
+        start_offset (int, optional): Byte offset to start from; overrides the checkpoint.
+        resume (bool, optional): Continue an unfinished saved checkpoint. Defaults to True.
+        checkpoint_dir (str, optional): Directory of checkpoints. Defaults to INGEST_CHECKPOINT_DIR.
+        collection (Any, optional): NewsCollections or raw collection to write to.
+            Defaults to `open_news_collections(persist_directory)`.
+        manifest (IngestManifest, optional): Ingestion manifest. Defaults to the one in `persist_directory`.
+
+    Returns:
+        Dict[str, Any]: Final checkpoint with offset, records, chunks, skipped, deleted, done and seconds
+    """
+    checkpoint_path = checkpoint_path_for(file_path, checkpoint_dir)
+    checkpoint = start_checkpoint(file_path, checkpoint_dir, resume)
+    if start_offset is not None:
+        checkpoint["offset"] = start_offset
+
+    if embedding is None:
+        from backend.app.services.embedding_service import initialize_embedding
+        embedding = initialize_embedding()
+    embedding_id = embedding_identity(embedding)
+    if collection is None:
+        collection = open_news_collections(persist_directory, embedding_id=embedding_id)
+    if manifest is None:
+        manifest = IngestManifest(manifest_path_for(persist_directory))
+
+    start = time.perf_counter()
+    records = iter_news_records(file_path, start_offset=checkpoint["offset"])
+    chunked = iter_article_chunks(records, manifest=manifest, embedding_id=embedding_id)
+    for articles in iter_document_batches(chunked, batch_size):
+        texts = [text for article in articles for text, _ in article.chunks]
+        vectors = embedding.embed_documents(texts) if texts else []
+        advance_checkpoint(checkpoint, articles, write_article_batch(collection, articles, vectors, manifest))
+        save_checkpoint(checkpoint_path, checkpoint)
+        print(f"已處理 {checkpoint['records']} 篇文章、{checkpoint['chunks']} 個段落"
+              f"（未變更 {checkpoint['skipped']} 篇）...")
+
+    checkpoint.update(done=True, seconds=time.perf_counter() - start)
+    save_checkpoint(checkpoint_path, checkpoint)
+    logging.info(f"📥 Ingested {file_path}: {checkpoint}")
+    return checkpoint
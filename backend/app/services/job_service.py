@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from backend.app.db.job_store import JobStore
+from backend.app.telemetry import start_trace
+
+# Top-level spans of `answer_query`, reported as job progress in this order
+PIPELINE_STAGES = ("retrieval", "mongo", "cascade", "scoring", "generation")
+
+
+class JobProgress:
+    """
+    Trace listener that records the stage of a running job for the job store.
+
+    Only the pipeline stages are reported; nested spans such as embedding or
+    summarization are folded into the stage they run in. Spans end on the event
+    loop, so the listener only buffers the progress; `flush` writes it to the
+    store and is called from the worker's heartbeat in a thread.
+    """
+
+    def __init__(self, store: JobStore, job_id: str):
+        self.store = store
+        self.job_id = job_id
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self._started: Dict[str, float] = {}
+        self._stage: Optional[str] = None
+        self._dirty = False
+        # Spans of threadpool work report from other threads
+        self._lock = threading.Lock()
+
+    def __call__(self, stage: str, finished: bool) -> None:
+        if stage not in PIPELINE_STAGES:
+            return
+        with self._lock:
+            if finished:
+                elapsed = time.perf_counter() - self._started.pop(stage, time.perf_counter())
+                self.stages[stage] = {"status": "done", "ms": round(elapsed * 1000, 1)}
+            else:
+                self._started[stage] = time.perf_counter()
+                self.stages[stage] = {"status": "running"}
+            self._stage = stage
+            self._dirty = True
+
+    def flush(self) -> None:
+        """Write the progress to the job store if it changed since the last flush (blocking)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            stage, progress = self._stage, self._snapshot()
+            self._dirty = False
+        self.store.update_progress(self.job_id, stage, progress)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Return the progress as stored with the job.
+
+        Returns:
+            Dict[str, Any]: Status and milliseconds per stage, and how many of the stages are done
+        """
+        with self._lock:
+            return self._snapshot()
+
+    def _snapshot(self) -> Dict[str, Any]:
+        return {
+            "stages": {stage: self.stages[stage] for stage in PIPELINE_STAGES if stage in self.stages},
+            "completed": sum(1 for entry in self.stages.values() if entry["status"] == "done"),
+            "total": len(PIPELINE_STAGES),
+        }
+
+
+class JobWorkerPool:
+    """
+    Workers on the event loop that take jobs from a `JobStore` and run them.
+
+    Each worker claims one job at a time, renews its lease and writes its progress
+    every `progress_interval` seconds while the handler runs, and stores the result
+    or the error. Idle workers poll the store every `poll_interval`
+    seconds, or sooner when `notify` is called after an enqueue. Jobs interrupted by
+    `stop` go back to the queue; jobs of a worker that died are recovered by the
+    store once their lease expires.
+    """
+
+    def __init__(self,
+                 store: JobStore,
+                 handler: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+                 concurrency: int = 2,
+                 poll_interval: float = 1.0,
+                 lease_seconds: float = 30.0,
+                 progress_interval: float = 1.0):
+        self.store = store
+        self.handler = handler
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.progress_interval = progress_interval
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self) -> None:
+        """Start the workers on the running event loop."""
+        self._wakeup = asyncio.Event()
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+        logging.info(f"🧵 Started {self.concurrency} job workers")
+
+    async def stop(self) -> None:
+        """Cancel the workers and put their running jobs back in the queue."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def notify(self) -> None:
+        """Wake an idle worker, e.g. right after a job was enqueued."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _work(self) -> None:
+        while True:
+            self._wakeup.clear()
+            job = await asyncio.to_thread(self.store.claim, self.lease_seconds)
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self.run_job(job)
+
+    async def run_job(self, job: Dict[str, Any]) -> None:
+        """
+        Run one claimed job and store its result, renewing the lease meanwhile.
+
+        Args:
+            job (Dict[str, Any]): Job as returned by `JobStore.claim`
+        """
+        job_id = job["id"]
+        logging.info(f"🚀 Running job {job_id} (attempt {job['attempts']})")
+        progress = JobProgress(self.store, job_id)
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, progress))
+        try:
+            trace = start_trace(progress)
+            result = await self.handler(job)
+        except asyncio.CancelledError:
+            await asyncio.to_thread(self.store.release, job_id)
+            raise
+        except Exception as e:
+            logging.error(f"❌ Job {job_id} failed: {str(e)}")
+            # Keep the stage the job failed in
+            await asyncio.to_thread(progress.flush)
+            await asyncio.to_thread(self.store.fail, job_id, str(e))
+        else:
+            final = {**progress.as_dict(), "total_ms": trace.as_dict()["total_ms"]}
+            await asyncio.to_thread(self.store.complete, job_id, result, final)
+            logging.info(f"✅ Job {job_id} done")
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: str, progress: JobProgress) -> None:
+        renew_every = self.lease_seconds / 3
+        renewed = time.monotonic()
+        while True:
+            await asyncio.sleep(min(self.progress_interval, renew_every))
+            await asyncio.to_thread(progress.flush)
+            if time.monotonic() - renewed >= renew_every:
+                await asyncio.to_thread(self.store.renew, job_id, self.lease_seconds)
+                renewed = time.monotonic()
@@ -0,0 +1,169 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+
+class SemanticResponseCache:
+    """
+    In-memory cache of complete query responses, looked up by query embedding.
+
+    A lookup returns a stored response when a previous query with the same
+    namespace (top_k, mode, date range, ...) has a cosine similarity of at least
+    `threshold` with the new one and is younger than `ttl` seconds. Entries are
+    evicted least recently used first once there are more than `max_entries` or
+    their estimated size exceeds `max_bytes`.
+
+    Lookups compare the query with the entries of its namespace in one matrix
+    product; they still take time linear in the entries, so callers on the event
+    loop should run them in a worker thread.
+    """
+
+    def __init__(self,
+                 threshold: float = 0.98,
+                 ttl: float = 600,
+                 max_bytes: int = 64 * 1024 * 1024,
+                 max_entries: int = 2048,
+                 enabled: bool = True):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.size_bytes = 0
+        # key -> (namespace, unit vector, response, size, created_at)
+        self._entries: "OrderedDict[int, Tuple[Hashable, np.ndarray, Dict[str, Any], int, float]]" = OrderedDict()
+        # namespace -> keys of its entries, so a lookup only compares against its own namespace
+        self._namespaces: Dict[Hashable, Dict[int, None]] = {}
+        self._next_key = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _drop(self, key: int) -> None:
+        namespace, _, _, size, _ = self._entries.pop(key)
+        self.size_bytes -= size
+        keys = self._namespaces[namespace]
+        del keys[key]
+        if not keys:
+            del self._namespaces[namespace]
+
+    def lookup(self, vector: List[float], namespace: Hashable) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        Find the cached response of the most similar previous query.
+
+        Args:
+            vector (List[float]): Embedding of the new query
+            namespace (Hashable): Request parameters that must match exactly
+
+        Returns:
+            Optional[Tuple[Dict[str, Any], float]]: (response, cosine similarity), or None on a miss
+        """
+        if not self.enabled:
+            return None
+        query = self._unit(vector)
+        now = time.time()
+        with self._lock:
+            keys = list(self._namespaces.get(namespace, ()))
+            for key in [key for key in keys if now - self._entries[key][4] >= self.ttl]:
+                self._drop(key)
+                keys.remove(key)
+            if keys:
+                similarities = np.stack([self._entries[key][1] for key in keys]) @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    self._entries.move_to_end(keys[best])
+                    self.hits += 1
+                    return self._entries[keys[best]][2], float(similarities[best])
+            self.misses += 1
+            return None
+
+    def store(self, vector: List[float], namespace: Hashable, response: Dict[str, Any]) -> None:
+        """
+        Cache a response, evicting least recently used entries beyond the entry and memory budgets.
+
+        Args:
+            vector (List[float]): Embedding of the query
+            namespace (Hashable): Request parameters the response depends on
+            response (Dict[str, Any]): JSON-serializable response
+        """
+        if not self.enabled:
+            return
+        unit = self._unit(vector)
+        size = unit.nbytes + len(json.dumps(response, ensure_ascii=False, default=str).encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._entries[self._next_key] = (namespace, unit, response, size, time.time())
+            self._namespaces.setdefault(namespace, {})[self._next_key] = None
+            self._next_key += 1
+            self.size_bytes += size
+            while self.size_bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return hit/miss counters and current size.
+
+        Returns:
+            Dict[str, Any]: hits, misses, entries and size_bytes
+        """
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "size_bytes": self.size_bytes}
+
+
+_cache: Optional[SemanticResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> SemanticResponseCache:
+    """
+    Return the process-wide semantic response cache configured from the environment.
+
+    Environment variables:
+        RESPONSE_CACHE_ENABLED: '0' disables the cache. Defaults to '1'.
+        RESPONSE_CACHE_THRESHOLD: Minimum cosine similarity for a hit. Defaults to 0.98, since
+            E5 similarities between unrelated queries already reach 0.8-0.9.
+        RESPONSE_CACHE_TTL: Entry lifetime in seconds. Defaults to 600.
+        RESPONSE_CACHE_MAX_MB: Memory budget in MiB. Defaults to 64.
+        RESPONSE_CACHE_MAX_ENTRIES: Maximum number of cached responses. Defaults to 2048.
+
+    Returns:
+        SemanticResponseCache: Shared cache instance
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SemanticResponseCache(
+                threshold=float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.98")),
+                ttl=float(os.getenv("RESPONSE_CACHE_TTL", "600")),
+                max_bytes=int(float(os.getenv("RESPONSE_CACHE_MAX_MB", "64")) * 1024 * 1024),
+                max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048")),
+                enabled=os.getenv("RESPONSE_CACHE_ENABLED", "1") != "0",
+            )
+        return _cache
+
+
+def set_response_cache(cache: Optional[SemanticResponseCache]) -> None:
+    """
+    Replace the process-wide semantic response cache.
+
+    Args:
+        cache (Optional[SemanticResponseCache]): Cache to use, or None to recreate it from the environment
+    """
+    global _cache
+    with _cache_lock:
+        _cache = cache
@@ -0,0 +1,124 @@
+import asyncio
+import re
+import threading
+import unicodedata
+import weakref
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query so trivially different spellings share one computation.
+
+    Applies NFKC (full-width to half-width), trims, collapses whitespace and lowercases.
+
+    Args:
+        query (str): Raw query text
+
+    Returns:
+        str: Normalized query
+    """
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", query)).strip().lower()
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls made from threads.
+
+    The first caller for a key runs the function in its own thread; callers that
+    arrive while it is running wait for and share its result (or exception). The
+    key is released as soon as the call finishes, so later calls run again.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run `fn` once for all concurrent callers with the same key.
+
+        Args:
+            key (Hashable): Identity of the computation
+            fn (Callable[[], Any]): Computation to run if no identical call is in flight
+
+        Returns:
+            Tuple[Any, bool]: The result, and True if it was shared from another caller
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return future.result(), False
+
+
+class AsyncSingleFlight:
+    """
+    Coalesce concurrent identical coroutine calls on an event loop.
+
+    The first caller for a key starts the coroutine as a task; callers that arrive
+    while it is running await the same task. The task is cancelled only when every
+    caller waiting on it has been cancelled, so one client going away does not
+    fail the others. Calls are tracked per event loop.
+    """
+
+    def __init__(self):
+        self._calls: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, list]]" = \
+            weakref.WeakKeyDictionary()
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: Hashable, coro_fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Await `coro_fn()` once for all concurrent callers with the same key.
+
+        Args:
+            key (Hashable): Identity of the computation
+            coro_fn (Callable[[], Awaitable[Any]]): Coroutine factory, called only by the first caller
+
+        Returns:
+            Tuple[Any, bool]: The result, and True if it was shared from another caller
+        """
+        calls = self._calls.setdefault(asyncio.get_running_loop(), {})
+        entry = calls.get(key)
+        shared = entry is not None
+        if shared:
+            self.followers += 1
+            entry[1] += 1
+        else:
+            self.leaders += 1
+            task = asyncio.ensure_future(coro_fn())
+            # [task, waiters]
+            entry = calls[key] = [task, 1]
+            task.add_done_callback(lambda _: calls.pop(key, None) if calls.get(key) is entry else None)
+
+        task = entry[0]
+        try:
+            return await asyncio.shield(task), shared
+        except asyncio.CancelledError:
+            if not task.done():
+                entry[1] -= 1
+                if entry[1] == 0:
+                    # Release the key now so a new caller starts afresh instead of joining the cancelled task
+                    if calls.get(key) is entry:
+                        del calls[key]
+                    task.cancel()
+            raise
@@ -1,6 +1,32 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
 import re
-from typing import Dict, Any
-from backend.app.llm_clients.groq_client import call_groq
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, Optional
+from backend.app.db.summary_store import get_summary_store
+from backend.app.llm_clients.provider_router import call_llm, call_llm_async
+from backend.app.services.single_flight import AsyncSingleFlight, SingleFlight
+from backend.app.telemetry import span
+
+# Score bucket (lower, upper) -> summary length range in characters
+SUMMARY_LENGTH = {
+    (70, 101): (300, 500),
+    (50, 70): (150, 300),
+    (30, 50): (50, 150),
+    (20, 30): (30, 50),
+}
+
+# After an error of the shared summary store, requests skip it for this long instead of each waiting on it
+SUMMARY_STORE_RETRY_SECONDS = float(os.getenv("SUMMARY_STORE_RETRY_SECONDS", "60"))
+_store_down_until = 0.0
+
+# Summaries being generated, keyed by (news_id, bucket), so concurrent requests generate each once
+_summary_flight = SingleFlight()
+_async_summary_flight = AsyncSingleFlight()
 
 def extract_number(text: str) -> int:
     """
@@ -18,6 +44,84 @@ def extract_number(text: str) -> int:
     return 0
 
 
+def summary_bucket_range(score: float) -> tuple:
+    """
+    Return the (lower, upper) score bucket that determines the summary length.
+
+    Scores outside every bucket (e.g. below 20) get the nearest one.
+
+    Args:
+        score (float): Score of the article (20-100)
+
+    Returns:
+        tuple: The matching key of SUMMARY_LENGTH
+    """
+    lowest, highest = min(SUMMARY_LENGTH), max(SUMMARY_LENGTH)
+    return next((k for k in SUMMARY_LENGTH if k[0] <= score < k[1]), lowest if score < lowest[0] else highest)
+
+
+def summary_bucket(score: float) -> int:
+    """
+    Return the bucket id (its lower bound: 20, 30, 50 or 70) for a score.
+
+    Args:
+        score (float): Score of the article (20-100)
+
+    Returns:
+        int: Bucket id used as the key of stored graded summaries
+    """
+    return summary_bucket_range(score)[0]
+
+
+def article_content_hash(article: Dict[str, Any]) -> str:
+    """
+    Hash the article fields a graded summary is generated from.
+
+    Args:
+        article (Dict[str, Any]): Dictionary containing news_title and news_content
+
+    Returns:
+        str: Hex digest stored with the summary, so edited articles miss the store
+    """
+    source = json.dumps([article["news_title"], article["news_content"]], ensure_ascii=False)
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def build_graded_summary_prompt(article: Dict[str, Any], score: float) -> str:
+    """
+    Build the summary prompt for an article, with the target length chosen by score.
+
+    Args:
+        article (Dict[str, Any]): Dictionary containing news_title and news_content
+        score (float): Score of the article (0-100) determining summary length
+
+    Returns:
+        str: Prompt instructing the LLM to write a length-controlled summary
+    """
+    min_length, max_length = SUMMARY_LENGTH[summary_bucket_range(score)]
+
+    prompt = f"""
+    你是一位專業的新聞摘要助手，請根據以下新聞內容生成 {min_length} 到 {max_length} 字的摘要：
+    
+    標題：{article["news_title"]}
+    內容：{article["news_content"]}
+
+    請遵守以下規則：
+    - 長度應在 {min_length}-{max_length} 字內。
+    - 保持新聞的關鍵事實、數據和重要引述（如果適用）。
+    - 若分數高於 70，需要包含：核心事實、關鍵數據、主要引述、背景資訊和影響評估。
+    - 若分數在 50-70，需要包含：核心事實、關鍵數據、主要引述和簡要背景。
+    - 若分數在 30-50，只需包含：核心事實和最重要的數據。
+    - 若分數在 20-30，只需包含：最核心的事實摘要。
+    - 摘要需保持客觀，避免加入個人評價。
+    - 保留原文的時間和地點資訊。
+    - 如果原文有多個觀點，請確保摘要平衡呈現。
+
+    直接輸出摘要內容，不要加上多餘的說明。
+    """
+    return prompt
+
+
 def generate_graded_summary(article: Dict[str, Any], score: float) -> str:
     """
     Generate a summary of varying length based on the article's score.
@@ -44,34 +148,157 @@ def generate_graded_summary(article: Dict[str, Any], score: float) -> str:
         - Score 30-50: Includes only core facts and most important data
         - Score 20-30: Includes only the most essential facts
     """
-    summary_length = {
-        (70, 101): (300, 500),
-        (50, 70): (150, 300),
-        (30, 50): (50, 150),
-        (20, 30): (30, 50),
-    }
+    prompt = build_graded_summary_prompt(article, score)
+    response = call_llm("summary", prompt)
+    return response
 
-    min_length, max_length = next(v for k, v in summary_length.items() if k[0] <= score < k[1])
 
-    prompt = f"""
-    你是一位專業的新聞摘要助手，請根據以下新聞內容生成 {min_length} 到 {max_length} 字的摘要：
-    
-    標題：{article["news_title"]}
-    內容：{article["news_content"]}
+async def generate_graded_summary_async(article: Dict[str, Any], score: float) -> str:
+    """
+    Asynchronously generate a summary of varying length based on the article's score.
 
-    請遵守以下規則：
-    - 長度應在 {min_length}-{max_length} 字內。
-    - 保持新聞的關鍵事實、數據和重要引述（如果適用）。
-    - 若分數高於 70，需要包含：核心事實、關鍵數據、主要引述、背景資訊和影響評估。
-    - 若分數在 50-70，需要包含：核心事實、關鍵數據、主要引述和簡要背景。
-    - 若分數在 30-50，只需包含：核心事實和最重要的數據。
-    - 若分數在 20-30，只需包含：最核心的事實摘要。
-    - 摘要需保持客觀，避免加入個人評價。
-    - 保留原文的時間和地點資訊。
-    - 如果原文有多個觀點，請確保摘要平衡呈現。
+    Uses the same prompt as `generate_graded_summary` but awaits the LLM call,
+    so summaries for several articles can be generated concurrently.
 
-    直接輸出摘要內容，不要加上多餘的說明。
+    Args:
+        article (Dict[str, Any]): Dictionary containing article information with keys:
+            - news_title: Title of the article
+            - news_content: Full content of the article
+        score (float): Score of the article (0-100) determining summary length
+
+    Returns:
+        str: Generated summary following the specified length and content guidelines
+    """
+    prompt = build_graded_summary_prompt(article, score)
+    return await call_llm_async("summary", prompt)
+
+
+def _shared_store_down(store) -> bool:
+    return store is None and time.monotonic() < _store_down_until
+
+
+def _store_failed(store, action: str, error: Exception) -> None:
+    global _store_down_until
+    if store is None:
+        _store_down_until = time.monotonic() + SUMMARY_STORE_RETRY_SECONDS
+        logging.warning(f"⚠️ Graded summary {action} failed, skipping the store for "
+                        f"{SUMMARY_STORE_RETRY_SECONDS:.0f}s: {str(error)}")
+    else:
+        logging.warning(f"⚠️ Graded summary {action} failed: {str(error)}")
+
+
+def _load_stored_summary(store, article: Dict[str, Any], bucket: int, content_hash: str) -> Optional[str]:
+    if _shared_store_down(store):
+        return None
+    try:
+        return (store or get_summary_store()).get(article["news_id"], bucket, content_hash)
+    except Exception as e:
+        _store_failed(store, "lookup", e)
+        return None
+
+
+def _save_stored_summary(store, article: Dict[str, Any], bucket: int, summary: str, content_hash: str) -> None:
+    if _shared_store_down(store):
+        return
+    try:
+        (store or get_summary_store()).put(article["news_id"], bucket, summary, content_hash)
+    except Exception as e:
+        _store_failed(store, "store", e)
+
+
+def get_graded_summary(article: Dict[str, Any], score: float, store=None) -> str:
+    """
+    Return the graded summary for an article, generating and storing it on first use.
+
+    Since the summary depends only on the article and the score bucket, the stored
+    summary (from the precompute job or an earlier request) is reused when present
+    and generated from the same title and content, and concurrent requests for the same missing summary share one generation.
+    Store errors are logged and fall back to generating the summary directly; after
+    an error the shared store is skipped for SUMMARY_STORE_RETRY_SECONDS.
+
+    Args:
+        article (Dict[str, Any]): Article containing news_id, news_title and news_content
+        score (float): Score of the article (0-100) determining summary length
+        store (GradedSummaryStore, optional): Summary store. Defaults to the shared store.
+
+    Returns:
+        str: Generated summary following the specified length and content guidelines
+    """
+    with span("summarization"):
+        bucket = summary_bucket(score)
+        content_hash = article_content_hash(article)
+        summary = _load_stored_summary(store, article, bucket, content_hash)
+        if summary is None:
+            def generate():
+                generated = generate_graded_summary(article, score)
+                _save_stored_summary(store, article, bucket, generated, content_hash)
+                return generated
+
+            summary, _ = _summary_flight.do((str(article["news_id"]), bucket, content_hash), generate)
+    return summary
+
+
+async def get_graded_summary_async(article: Dict[str, Any], score: float, store=None) -> str:
+    """
+    Asynchronously return the graded summary for an article, generating it on first use.
+
+    Args:
+        article (Dict[str, Any]): Article containing news_id, news_title and news_content
+        score (float): Score of the article (0-100) determining summary length
+        store (GradedSummaryStore, optional): Summary store. Defaults to the shared store.
+
+    Returns:
+        str: Generated summary following the specified length and content guidelines
+    """
+    with span("summarization"):
+        bucket = summary_bucket(score)
+        content_hash = article_content_hash(article)
+        summary = await asyncio.to_thread(_load_stored_summary, store, article, bucket, content_hash)
+        if summary is None:
+            async def generate():
+                generated = await generate_graded_summary_async(article, score)
+                await asyncio.to_thread(_save_stored_summary, store, article, bucket, generated, content_hash)
+                return generated
+
+            summary, _ = await _async_summary_flight.do((str(article["news_id"]), bucket, content_hash), generate)
+    return summary
+
+
+def precompute_graded_summaries(articles: Iterable[Dict[str, Any]], store=None, max_workers: int = 5) -> int:
     """
+    Generate and store all four bucket summaries for each article.
+
+    Buckets that are already stored for the current content are skipped, so the job
+    can be re-run after articles are ingested or edited, or resumed after an interruption.
+
+    Args:
+        articles (Iterable[Dict[str, Any]]): Articles containing news_id, news_title and news_content
+        store (GradedSummaryStore, optional): Summary store. Defaults to the shared store.
+        max_workers (int, optional): Number of concurrent LLM calls. Defaults to 5.
+
+    Returns:
+        int: Number of summaries generated
+    """
+    store = store or get_summary_store()
+    articles = list(articles)
+    hashes = {int(article["news_id"]): article_content_hash(article) for article in articles}
+    existing = store.get_many(hashes)
+
+    tasks = [
+        (article, bucket)
+        for article in articles
+        for bucket in (k[0] for k in SUMMARY_LENGTH)
+        if bucket not in existing.get(int(article["news_id"]), {})
+    ]
+
+    def generate(task):
+        article, bucket = task
+        summary = generate_graded_summary(article, bucket)
+        store.put(article["news_id"], bucket, summary, hashes[int(article["news_id"])])
 
-    response = call_groq(prompt)
-    return response
\ No newline at end of file
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for done, _ in enumerate(executor.map(generate, tasks), start=1):
+            if done % 20 == 0:
+                print(f"已產生 {done}/{len(tasks)} 篇摘要...")
+    print(f"摘要預先產生完成，共 {len(tasks)} 篇")
+    return len(tasks)
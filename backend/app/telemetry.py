@@ -0,0 +1,408 @@
+import asyncio
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+# Default latency buckets in seconds, from a cached lookup to a slow generation call
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: Sequence[str], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, one series per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, one series per label combination."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets, with a sum and count per series."""
+
+    kind = "histogram"
+
+    def __init__(self,
+                 name: str,
+                 documentation: str,
+                 labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # key -> (per-bucket counts, sum, count)
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels: Any) -> int:
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted((key, [list(s[0]), s[1], s[2]]) for key, s in self._series.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {count}"
+
+
+class MetricsRegistry:
+    """Process-wide set of metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> Any:
+        """
+        Add a metric, or return the one already registered under its name.
+
+        Args:
+            metric (_Metric): Counter, Gauge or Histogram
+
+        Returns:
+            Any: The registered metric
+        """
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format (version 0.0.4).
+
+        Returns:
+            str: Exposition text
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "scorerag_request_seconds", "End-to-end latency of API requests.", ["endpoint", "mode"]))
+REQUESTS = REGISTRY.register(Counter(
+    "scorerag_requests_total", "API requests by outcome (ok, error, cache_hit, coalesced, cancelled).",
+    ["endpoint", "mode", "outcome"]))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "scorerag_stage_seconds", "Time spent per pipeline stage.", ["stage"]))
+LLM_CALL_SECONDS = REGISTRY.register(Histogram(
+    "scorerag_llm_call_seconds", "Latency of LLM calls, including transport retries.",
+    ["provider", "model", "outcome"]))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "scorerag_llm_tokens_total", "Tokens reported by LLM providers.", ["provider", "model", "kind"]))
+LLM_RETRIES = REGISTRY.register(Counter(
+    "scorerag_llm_retries_total", "LLM request retries by reason.", ["provider", "model", "reason"]))
+LLM_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "scorerag_llm_queue_depth", "LLM calls waiting for a scheduler slot.", ["provider", "lane"]))
+LLM_IN_FLIGHT = REGISTRY.register(Gauge(
+    "scorerag_llm_in_flight", "LLM calls holding a scheduler slot.", ["provider"]))
+LLM_QUEUE_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "scorerag_llm_queue_wait_seconds", "Time LLM calls waited for a scheduler slot.", ["provider", "lane"]))
+LLM_HEDGES = REGISTRY.register(Counter(
+    "scorerag_llm_hedges_total", "Hedged LLM requests by task and outcome (fired, won).", ["task", "outcome"]))
+LLM_FALLBACKS = REGISTRY.register(Counter(
+    "scorerag_llm_fallbacks_total", "LLM calls retried on the next provider/model after a failure.",
+    ["task", "provider", "model"]))
+LLM_PROVIDER_HEALTHY = REGISTRY.register(Gauge(
+    "scorerag_llm_provider_healthy", "1 while a provider/model is healthy, 0 while it is skipped.",
+    ["provider", "model"]))
+
+
+class RequestTrace:
+    """
+    Timing breakdown of one request, filled in by `span` and `llm_call`.
+
+    Stage times are summed per stage, so stages that run concurrently (for example
+    the summaries of several articles) can add up to more than the request took.
+    """
+
+    def __init__(self, listener: Optional[Callable[[str, bool], None]] = None):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.llm: Dict[str, Dict[str, float]] = {}
+        # Called with (stage, finished) when a span starts and ends, e.g. to report job progress
+        self.listener = listener
+        self._lock = threading.Lock()
+
+    def enter_stage(self, stage: str) -> None:
+        if self.listener is not None:
+            self.listener(stage, False)
+
+    def add_stage(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        if self.listener is not None:
+            self.listener(stage, True)
+
+    def add_llm_call(self, provider: str, model: str, seconds: float, ok: bool,
+                     prompt_tokens: int = 0, completion_tokens: int = 0, cancelled: bool = False) -> None:
+        with self._lock:
+            entry = self.llm.setdefault(f"{provider}/{model}", {
+                "calls": 0, "errors": 0, "cancelled": 0, "seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0
+            })
+            entry["calls"] += 1
+            entry["errors"] += 0 if ok or cancelled else 1
+            entry["cancelled"] += 1 if cancelled else 0
+            entry["seconds"] += seconds
+            entry["prompt_tokens"] += prompt_tokens
+            entry["completion_tokens"] += completion_tokens
+
+    def llm_calls(self) -> int:
+        """
+        Return the number of LLM calls recorded so far.
+
+        Returns:
+            int: Calls over every provider and model
+        """
+        with self._lock:
+            return int(sum(entry["calls"] for entry in self.llm.values()))
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Return the breakdown in milliseconds, as added to responses.
+
+        Returns:
+            Dict[str, Any]: total_ms, stages_ms per stage and LLM usage per provider/model
+        """
+        with self._lock:
+            return {
+                "total_ms": round((time.perf_counter() - self.started) * 1000, 1),
+                "stages_ms": {stage: round(seconds * 1000, 1) for stage, seconds in self.stages.items()},
+                "llm": {
+                    name: {**entry, "seconds": round(entry["seconds"], 3)} for name, entry in self.llm.items()
+                },
+            }
+
+
+_current_trace: contextvars.ContextVar[Optional[RequestTrace]] = contextvars.ContextVar("request_trace", default=None)
+
+
+def start_trace(listener: Optional[Callable[[str, bool], None]] = None) -> RequestTrace:
+    """
+    Start a trace for the current request; spans in this context and its children record into it.
+
+    Args:
+        listener (Optional[Callable[[str, bool], None]], optional): Called with (stage, finished)
+            when a span starts and ends. Defaults to None.
+
+    Returns:
+        RequestTrace: The new trace
+    """
+    trace = RequestTrace(listener)
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """
+    Return the trace of the current request, if one was started.
+
+    Returns:
+        Optional[RequestTrace]: Active trace or None
+    """
+    return _current_trace.get()
+
+
+def bind_context(fn: Callable) -> Callable:
+    """
+    Wrap a function so every call runs in a copy of the caller's context.
+
+    Thread pools do not propagate context variables, so work submitted to them would
+    otherwise not record into the request trace.
+
+    Args:
+        fn (Callable): Function to run in worker threads
+
+    Returns:
+        Callable: Wrapper safe to call concurrently from several threads
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+
+    return run
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """
+    Time a pipeline stage into `scorerag_stage_seconds` and the current request trace.
+
+    Works around synchronous code and around `await` alike.
+
+    Args:
+        stage (str): Stage name, e.g. 'retrieval' or 'generation'
+    """
+    trace = current_trace()
+    if trace is not None:
+        trace.enter_stage(stage)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        STAGE_SECONDS.observe(seconds, stage=stage)
+        if trace is not None:
+            trace.add_stage(stage, seconds)
+
+
+class LLMCallRecorder:
+    """Collects the token usage of one LLM call inside `llm_call`."""
+
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def record_usage(self, response: Dict[str, Any]) -> None:
+        """
+        Take token counts from the `usage` field of a chat completion response.
+
+        Args:
+            response (Dict[str, Any]): Parsed response; responses without usage are ignored
+        """
+        usage = response.get("usage") or {}
+        self.prompt_tokens = int(usage.get("prompt_tokens") or 0)
+        self.completion_tokens = int(usage.get("completion_tokens") or 0)
+
+
+@contextmanager
+def llm_call(provider: str, model: str) -> Iterator[LLMCallRecorder]:
+    """
+    Record latency, outcome and token usage of one LLM call.
+
+    The outcome is 'ok', 'error', or 'cancelled' when the caller went away first (a
+    streaming client disconnected, or a hedged call lost the race), which is not a
+    provider error.
+
+    Args:
+        provider (str): Provider name, e.g. 'groq'
+        model (str): Model name
+
+    Yields:
+        LLMCallRecorder: Call `record_usage` with the response to count its tokens
+    """
+    recorder = LLMCallRecorder()
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield recorder
+        outcome = "ok"
+    except (GeneratorExit, asyncio.CancelledError):
+        outcome = "cancelled"
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        LLM_CALL_SECONDS.observe(seconds, provider=provider, model=model, outcome=outcome)
+        if recorder.prompt_tokens:
+            LLM_TOKENS.inc(recorder.prompt_tokens, provider=provider, model=model, kind="prompt")
+        if recorder.completion_tokens:
+            LLM_TOKENS.inc(recorder.completion_tokens, provider=provider, model=model, kind="completion")
+        trace = current_trace()
+        if trace is not None:
+            trace.add_llm_call(provider, model, seconds, outcome == "ok", recorder.prompt_tokens,
+                               recorder.completion_tokens, cancelled=outcome == "cancelled")
@@ -0,0 +1,69 @@
+"""
+Script to benchmark article-level retrieval.
+
+For every query, the reference ranking is computed by aggregating a deep chunk
+search (`--reference-chunks` chunks) per article. The script then reports, for
+plain chunk retrieval and for each over-fetch factor:
+1. Recall@k: share of the reference top-k articles that were returned
+2. Distinct articles returned (chunk retrieval often returns fewer than k)
+3. Mean search latency
+
+By default the queries are the titles of the articles in the sample data.
+
+Example:
+    python -m backend.scripts.benchmark_article_retrieval --k 5 --factors 1 2 4 8
+"""
+
+import argparse
+import json
+import statistics
+import time
+from backend.app.db.chroma_connector import aggregate_chunks_by_article, get_retriever
+
+parser = argparse.ArgumentParser(description="Recall and latency of article-level retrieval vs over-fetch factor")
+parser.add_argument("--queries", help="Text file with one query per line (defaults to sample article titles)")
+parser.add_argument("--data", default="backend/example_data/news_202405.json", help="Sample news file for default queries")
+parser.add_argument("--k", type=int, default=5, help="Articles requested per query")
+parser.add_argument("--factors", type=int, nargs="+", default=[1, 2, 4, 8], help="Over-fetch factors to compare")
+parser.add_argument("--method", choices=["max", "sum"], default="max", help="Chunk aggregation method")
+parser.add_argument("--reference-chunks", type=int, default=500, help="Chunks searched for the reference ranking")
+args = parser.parse_args()
+
+if args.queries:
+    with open(args.queries, "r", encoding="utf-8") as f:
+        queries = [line.strip() for line in f if line.strip()]
+else:
+    with open(args.data, "r", encoding="utf-8") as f:
+        queries = [article["news_title"] for article in json.load(f)]
+
+retriever = get_retriever().ensure_ready()
+print(f"共 {len(queries)} 個查詢，k={args.k}，聚合方式={args.method}")
+
+
+def article_ids(docs_and_scores):
+    return [int(doc.metadata["news_id"]) for doc, _ in docs_and_scores]
+
+
+reference = {}
+for query in queries:
+    deep = retriever.similarity_search_with_relevance_scores(query, k=args.reference_chunks)
+    reference[query] = set(article_ids(aggregate_chunks_by_article(deep, args.k, method=args.method)))
+
+
+def run(label, search):
+    recalls, distinct, latencies = [], [], []
+    for query in queries:
+        start = time.perf_counter()
+        ids = set(article_ids(search(query)))
+        latencies.append(time.perf_counter() - start)
+        distinct.append(len(ids))
+        expected = reference[query]
+        recalls.append(len(ids & expected) / len(expected) if expected else 1.0)
+    print(f"{label:<16} recall@{args.k}={statistics.mean(recalls):.3f}  "
+          f"distinct={statistics.mean(distinct):.2f}  latency={statistics.mean(latencies) * 1000:.1f} ms")
+
+
+run("chunk", lambda q: retriever.similarity_search_with_relevance_scores(q, k=args.k))
+for factor in args.factors:
+    run(f"article x{factor}", lambda q, factor=factor: retriever.search_articles(
+        q, k=args.k, overfetch=factor, method=args.method, max_rounds=1))
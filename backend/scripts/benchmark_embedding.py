@@ -0,0 +1,73 @@
+"""
+Script to benchmark embedding backends against the fp32 baseline.
+
+For each backend (the first one is the baseline) it reports:
+1. Model load time
+2. Passage throughput (chunks/sec) when embedding the sample corpus
+3. Query embedding latency (mean and p95)
+4. Retrieval overlap@k with the baseline: share of the baseline's top-k chunks
+   that the backend also ranks in its top-k, averaged over the queries
+
+The corpus is the chunked sample news data and the queries are the article
+titles, so it runs without ChromaDB or MongoDB.
+
+Example:
+    python -m backend.scripts.benchmark_embedding --backends torch onnx onnx-int8 --threads 4
+    python -m backend.scripts.benchmark_embedding --model intfloat/multilingual-e5-small
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from backend.app.services.embedding_service import initialize_embedding
+from backend.app.services.ingestion_service import iter_article_chunks, iter_news_records
+
+parser = argparse.ArgumentParser(description="Compare embedding backends on latency, throughput and retrieval overlap")
+parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"], help="Backends; the first is the baseline")
+parser.add_argument("--model", help="Model name or local directory (defaults to EMBEDDING_MODEL)")
+parser.add_argument("--threads", type=int, help="CPU threads for inference")
+parser.add_argument("--data", default="backend/example_data/news_202405.json", help="News file used as corpus")
+parser.add_argument("--k", type=int, default=5, help="Top-k used for retrieval overlap")
+parser.add_argument("--query-runs", type=int, default=3, help="Times each query is embedded for latency")
+args = parser.parse_args()
+
+records = list(iter_news_records(args.data))
+passages = [text for article in iter_article_chunks(records) for text, _ in article.chunks]
+queries = [record["news_title"] for _, record in records]
+print(f"語料 {len(passages)} 個段落，{len(queries)} 個查詢")
+
+baseline_top = None
+for backend in args.backends:
+    start = time.perf_counter()
+    embedding = initialize_embedding(model_name=args.model, backend=backend, threads=args.threads)
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    doc_vectors = np.array(embedding.embed_documents(passages))
+    passages_per_second = len(passages) / (time.perf_counter() - start)
+
+    latencies, query_vectors = [], []
+    for query in queries:
+        for _ in range(args.query_runs):
+            start = time.perf_counter()
+            vector = embedding.embed_query(query)
+            latencies.append(time.perf_counter() - start)
+        query_vectors.append(vector)
+
+    # Cosine ranking of the corpus for each query
+    docs = doc_vectors / np.linalg.norm(doc_vectors, axis=1, keepdims=True)
+    qs = np.array(query_vectors)
+    qs = qs / np.linalg.norm(qs, axis=1, keepdims=True)
+    top = np.argsort(-(qs @ docs.T), axis=1)[:, :args.k]
+    if baseline_top is None:
+        baseline_top = top
+    overlap = statistics.mean(len(set(a) & set(b)) / args.k for a, b in zip(top, baseline_top))
+
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{backend:<10} 載入 {load_seconds:6.1f} 秒  段落 {passages_per_second:7.1f}/s  "
+          f"查詢 平均 {statistics.mean(latencies) * 1000:6.1f} ms p95 {p95 * 1000:6.1f} ms  "
+          f"overlap@{args.k} {overlap:.3f}")
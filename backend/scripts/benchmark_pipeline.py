@@ -0,0 +1,88 @@
+"""
+Script to benchmark the /api/query pipeline offline.
+
+LLM providers, MongoDB and the embedding model are replaced by the stand-ins in
+`offline_stack.py` (simulated LLM latency and errors, the sample news in memory,
+a hashing embedding), so the numbers reflect the pipeline itself. For every
+scoring mode, the script sends `--requests` queries at `--concurrency` and reports:
+1. p50/p95/p99 request latency
+2. Throughput and error rate
+3. LLM calls per query, in total and per provider
+
+Every request uses a distinct query by default, so coalescing and caching do not
+hide per-query cost; `--repeat-queries` cycles the article titles instead.
+
+Example:
+    python -m backend.scripts.benchmark_pipeline --modes sync thread --concurrency 8 --llm-latency 0.3
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+from backend.scripts.offline_stack import (
+    SAMPLE_DATA, drive_queries, install_offline_stack, summarize_run
+)
+
+parser = argparse.ArgumentParser(description="Offline latency, throughput and LLM-call benchmark of /api/query")
+parser.add_argument("--modes", nargs="+", default=["sync", "thread"],
+                    help="Scoring modes to compare (sync, thread, async, batch, adaptive)")
+parser.add_argument("--requests", type=int, default=40, help="Requests per mode")
+parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once")
+parser.add_argument("--top-k", type=int, default=5, help="Articles per query")
+parser.add_argument("--llm-latency", type=float, default=0.2, help="Median scoring/summary call latency (s)")
+parser.add_argument("--generation-latency", type=float, default=None,
+                    help="Median generation call latency (s), defaults to --llm-latency")
+parser.add_argument("--latency-sigma", type=float, default=0.5, help="Lognormal spread of LLM latency")
+parser.add_argument("--error-rate", type=float, default=0.0, help="Probability that an LLM call fails")
+parser.add_argument("--no-hedge", action="store_true", help="Disable hedged LLM requests")
+parser.add_argument("--repeat-queries", action="store_true", help="Reuse the article titles as queries")
+parser.add_argument("--data", default=SAMPLE_DATA, help="Sample news file to index")
+parser.add_argument("--seed", type=int, default=0, help="Random seed for latencies and errors")
+parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+parser.add_argument("--verbose", action="store_true", help="Keep the per-request logs and prints")
+args = parser.parse_args()
+
+if args.no_hedge:
+    os.environ["LLM_HEDGE_ENABLED"] = "0"
+
+stack = install_offline_stack(args.data, llm_median=args.llm_latency, llm_sigma=args.latency_sigma,
+                              generation_median=args.generation_latency, error_rate=args.error_rate,
+                              seed=args.seed)
+# Imported after the stack is installed so nothing reaches for the real services
+from backend.app.main import app
+
+if not args.verbose:
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+titles = [article["news_title"] for article in stack.articles]
+queries = [titles[i % len(titles)] if args.repeat_queries else f"{titles[i % len(titles)]} #{i}"
+           for i in range(args.requests)]
+
+if not args.json:
+    print(f"共 {len(stack.articles)} 篇新聞，每種模式 {args.requests} 個請求，並行 {args.concurrency}，"
+          f"LLM 延遲中位數 {args.llm_latency}s，錯誤率 {args.error_rate:.0%}")
+
+results = {}
+try:
+    for mode in args.modes:
+        stack.reset()
+        # The sync scorer prints progress per article; keep it out of the report
+        with contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO()):
+            latencies, errors, wall = asyncio.run(
+                drive_queries(app, queries, mode, concurrency=args.concurrency, top_k=args.top_k)
+            )
+        results[mode] = summary = summarize_run(latencies, errors, wall, stack.llm_calls())
+        if not args.json:
+            print(f"{mode:<9} p50={summary['p50_ms']:7.0f} ms  p95={summary['p95_ms']:7.0f} ms  "
+                  f"p99={summary['p99_ms']:7.0f} ms  {summary['throughput_rps']:6.2f} req/s  "
+                  f"錯誤率={summary['error_rate']:.1%}  LLM 呼叫/查詢={summary['llm_calls_per_query']:.1f} "
+                  f"(groq {summary['groq_calls_per_query']:.1f}, openai {summary['openai_calls_per_query']:.1f})")
+finally:
+    stack.close()
+
+if args.json:
+    print(json.dumps(results, indent=2))
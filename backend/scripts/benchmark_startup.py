@@ -0,0 +1,68 @@
+"""
+Script to benchmark API cold start.
+
+Each run starts a fresh Python interpreter and records:
+1. Import time of `backend.app.main` and which heavy libraries it pulled in
+2. Time until the shared retriever is ready (model load, collection open, warm-up)
+
+The median of several runs is printed and, with --output, each run is appended
+to a JSONL file so startup regressions can be tracked over time.
+
+Example:
+    python -m backend.scripts.benchmark_startup --runs 3 --output backend/storage/startup_bench.jsonl
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ["torch", "sentence_transformers", "pandas", "chromadb", "langchain", "langchain_huggingface"]
+
+# Executed in a fresh interpreter so nothing is already imported
+PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import backend.app.main
+import_seconds = time.perf_counter() - start
+loaded = [m for m in {HEAVY_MODULES!r} if m in sys.modules]
+result = {{"import_seconds": import_seconds, "heavy_modules_on_import": loaded}}
+if sys.argv[1] != "skip-ready":
+    from backend.app.db.chroma_connector import get_retriever
+    start = time.perf_counter()
+    retriever = get_retriever().ensure_ready()
+    result["ready_seconds"] = time.perf_counter() - start
+    result["ready_breakdown"] = retriever.timings
+print(json.dumps(result))
+"""
+
+parser = argparse.ArgumentParser(description="Measure API import time and time-to-ready")
+parser.add_argument("--runs", type=int, default=3, help="Number of cold starts to measure")
+parser.add_argument("--skip-ready", action="store_true", help="Only measure import time")
+parser.add_argument("--output", help="Append each run as a JSON line to this file")
+args = parser.parse_args()
+
+runs = []
+for i in range(args.runs):
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE, "skip-ready" if args.skip_ready else "ready"],
+        capture_output=True, text=True, check=True
+    )
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["process_seconds"] = time.perf_counter() - start
+    runs.append(result)
+    print(f"第 {i + 1} 次：import {result['import_seconds']:.2f}s"
+          + (f"，就緒 {result['ready_seconds']:.2f}s" if "ready_seconds" in result else ""))
+
+print(f"\nimport 中位數：{statistics.median(r['import_seconds'] for r in runs):.2f}s")
+if not args.skip_ready:
+    print(f"就緒中位數：{statistics.median(r['ready_seconds'] for r in runs):.2f}s")
+print(f"import 時載入的重量級套件：{runs[0]['heavy_modules_on_import'] or '無'}")
+
+if args.output:
+    with open(args.output, "a", encoding="utf-8") as f:
+        for result in runs:
+            f.write(json.dumps({"ts": time.time(), **result}) + "\n")
@@ -0,0 +1,60 @@
+"""
+Script to calibrate the embedding-similarity cascade.
+
+A sample of queries (CASCADE_LOG_SAMPLE_RATE) appends one line per retrieved
+article to the cascade log: its similarity, the cascade's decision and, for
+articles the LLM scored, the score. Some of the articles the cascade settles
+are scored anyway (CASCADE_EXPLORE_RATE) and weighted accordingly. This
+script fits the similarity cut-offs from that log:
+- below `reject_below`, articles are rejected without an LLM call
+- at or above `accept_above`, articles are accepted with an estimated score
+  (only with CASCADE_AUTO_ACCEPT=1)
+Everything in between is still scored by the LLM. The result is written to
+the calibration file that the API reloads automatically.
+
+Example:
+    python -m backend.scripts.calibrate_cascade --max-recall-loss 0.02
+"""
+
+import argparse
+import json
+import os
+from backend.app.services.cascade_service import (
+    CASCADE_CALIBRATION_PATH, CASCADE_LOG_PATH, fit_cascade_thresholds
+)
+
+parser = argparse.ArgumentParser(description="Fit cascade cut-offs from logged (similarity, LLM score) pairs")
+parser.add_argument("--log", default=CASCADE_LOG_PATH, help="Cascade log (JSONL)")
+parser.add_argument("--output", default=CASCADE_CALIBRATION_PATH, help="Calibration file to write")
+parser.add_argument("--threshold", type=float, default=20, help="LLM score threshold used by the scorers")
+parser.add_argument("--max-recall-loss", type=float, default=0.02,
+                    help="Tolerated share of relevant articles rejected by the floor")
+parser.add_argument("--max-false-accept", type=float, default=0.02,
+                    help="Tolerated share of irrelevant articles auto-accepted by the ceiling")
+parser.add_argument("--min-support", type=int, default=20, help="Minimum pairs beyond each cut-off")
+args = parser.parse_args()
+
+with open(args.log, "r", encoding="utf-8") as f:
+    records = [json.loads(line) for line in f if line.strip()]
+# Articles the cascade settled without an LLM call have no score to fit on
+pairs = [(record["similarity"], record["score"], record.get("weight", 1.0))
+         for record in records if record.get("score") is not None]
+print(f"讀取 {len(pairs)} 筆 (相似度, 分數) 資料")
+
+calibration = fit_cascade_thresholds(
+    pairs,
+    threshold=args.threshold,
+    max_recall_loss=args.max_recall_loss,
+    max_false_accept=args.max_false_accept,
+    min_support=args.min_support,
+)
+
+below = sum(1 for s, _, _ in pairs if calibration["reject_below"] is not None and s < calibration["reject_below"])
+above = sum(1 for s, _, _ in pairs if calibration["accept_above"] is not None and s >= calibration["accept_above"])
+print(f"拒絕門檻：{calibration['reject_below']}，接受門檻：{calibration['accept_above']}")
+print(f"預估可省下 {below + above}/{len(pairs)} 次 LLM 評分（拒絕 {below}，接受 {above}）")
+
+os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+with open(args.output, "w", encoding="utf-8") as f:
+    json.dump(calibration, f, indent=2)
+print(f"已寫入 {args.output}")
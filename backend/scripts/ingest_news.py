@@ -0,0 +1,60 @@
+"""
+Script to stream large news dumps into the vector database.
+
+Each file (a JSON array or JSON Lines, one article per line) is parsed
+incrementally and written to ChromaDB in batches, so memory stays flat no
+matter how large the dump is. Progress is checkpointed after every batch;
+re-running the same command after a crash resumes where it stopped.
+
+By default the pipelined ingester is used: chunking runs in --workers
+processes and embedding overlaps with Chroma writes. Per-stage throughput is
+printed at the end. --sequential processes one batch at a time instead.
+
+Example:
+    python -m backend.scripts.ingest_news data/news_202406.jsonl --batch-size 256
+    python -m backend.scripts.ingest_news data/*.jsonl --workers 8 --encode-batch-size 64
+    python -m backend.scripts.ingest_news data/news_202406.json --sequential --start-offset 104857600
+"""
+
+import argparse
+from backend.app.services.embedding_service import initialize_embedding
+from backend.app.services.ingestion_pipeline import print_pipeline_report, run_ingestion_pipeline
+from backend.app.services.ingestion_service import stream_news_file_to_chroma
+
+parser = argparse.ArgumentParser(description="Stream news files into ChromaDB with bounded memory")
+parser.add_argument("files", nargs="+", help="News files (JSON array or JSON Lines)")
+parser.add_argument("--persist-directory", default="./backend/storage/chromadb", help="ChromaDB directory")
+parser.add_argument("--batch-size", type=int, default=256, help="Chunks embedded and written per batch")
+parser.add_argument("--encode-batch-size", type=int, default=32, help="Texts per embedding forward pass")
+parser.add_argument("--workers", type=int, help="Chunking processes (defaults to the CPU count)")
+parser.add_argument("--queue-size", type=int, default=4, help="Capacity of each inter-stage queue")
+parser.add_argument("--no-resume", action="store_true", help="Ignore saved checkpoints and start from the beginning")
+parser.add_argument("--sequential", action="store_true", help="Use the single-threaded streaming ingester")
+parser.add_argument("--start-offset", type=int, help="Byte offset to start from with --sequential (overrides the checkpoint)")
+args = parser.parse_args()
+
+embedding = initialize_embedding()
+if args.sequential:
+    for file_path in args.files:
+        print(f"處理中：{file_path}")
+        result = stream_news_file_to_chroma(
+            file_path,
+            embedding,
+            persist_directory=args.persist_directory,
+            batch_size=args.batch_size,
+            start_offset=args.start_offset,
+            resume=not args.no_resume,
+        )
+        print(f"完成：{result['records']} 篇文章、{result['chunks']} 個段落")
+else:
+    report = run_ingestion_pipeline(
+        args.files,
+        embedding,
+        persist_directory=args.persist_directory,
+        batch_size=args.batch_size,
+        encode_batch_size=args.encode_batch_size,
+        chunk_workers=args.workers,
+        queue_size=args.queue_size,
+        resume=not args.no_resume,
+    )
+    print_pipeline_report(report)
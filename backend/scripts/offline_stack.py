@@ -0,0 +1,376 @@
+"""
+Offline stand-ins for the LLM providers, MongoDB and the embedding model.
+
+`install_offline_stack` wires the API to:
+1. `FakeLLMTransport` for Groq and OpenAI, with lognormal latency and an error rate
+2. A mongomock database loaded from the sample news file
+3. `HashingEmbeddings`, a character n-gram hashing embedding, over a temporary Chroma index
+
+so that `/api/query` can be driven end to end without network access or model
+downloads. `drive_queries` sends queries at a fixed concurrency and
+`summarize_run` turns the timings into latency percentiles and throughput.
+
+Used by `benchmark_pipeline.py` and the offline tests.
+"""
+
+import asyncio
+import json
+import math
+import random
+import re
+import shutil
+import tempfile
+import threading
+import time
+import unicodedata
+import zlib
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from backend.app.llm_clients.transport import LLMTransportError
+
+SAMPLE_DATA = "backend/example_data/news_202405.json"
+
+
+class FakeLLMTransport:
+    """
+    Drop-in replacement for `LLMTransport` that answers locally after a simulated delay.
+
+    Latency is lognormal around `median` seconds with spread `sigma`; each call fails
+    with probability `error_rate`, as if the real transport had run out of retries.
+    Replies follow the prompt: a 0-100 score for scoring prompts, a JSON object of
+    scores for batch prompts and filler text for summaries and generation.
+    """
+
+    def __init__(self,
+                 name: str,
+                 median: float = 0.0,
+                 sigma: float = 0.0,
+                 error_rate: float = 0.0,
+                 seed: int = 0):
+        self.name = name
+        self.median = median
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.calls = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _draw(self) -> Tuple[float, bool, int]:
+        with self._lock:
+            self.calls += 1
+            delay = self._rng.lognormvariate(math.log(self.median), self.sigma) if self.median > 0 else 0.0
+            failed = self._rng.random() < self.error_rate
+            if failed:
+                self.errors += 1
+            return delay, failed, self._rng.randint(-5, 5)
+
+    def _reply(self, payload: Dict[str, Any], noise: int) -> str:
+        prompt = payload["messages"][-1]["content"]
+        if "JSON" in prompt and "news_id" in prompt:
+            ids = re.findall(r"news_id：(\S+?)｜", prompt)
+            return json.dumps({news_id: zlib.crc32(news_id.encode()) % 101 for news_id in ids})
+        if "只輸出一個數字" in prompt:
+            return str(max(0, min(100, zlib.crc32(prompt.encode()) % 101 + noise)))
+        return "模擬回應。" * 40
+
+    def _response(self, payload: Dict[str, Any], noise: int) -> Dict[str, Any]:
+        content = self._reply(payload, noise)
+        # Rough token counts, so usage metrics have something to report
+        usage = {"prompt_tokens": len(payload["messages"][-1]["content"]) // 2, "completion_tokens": len(content) // 2}
+        return {"choices": [{"message": {"content": content}}], "usage": usage}
+
+    def reset(self) -> None:
+        """Zero the call and error counters."""
+        with self._lock:
+            self.calls = 0
+            self.errors = 0
+
+    def post(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Answer a chat completion request after the simulated delay."""
+        delay, failed, noise = self._draw()
+        time.sleep(delay)
+        if failed:
+            raise LLMTransportError(self.name, "injected failure", 503)
+        return self._response(payload, noise)
+
+    async def post_async(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Asynchronous counterpart of `post`."""
+        delay, failed, noise = self._draw()
+        await asyncio.sleep(delay)
+        if failed:
+            raise LLMTransportError(self.name, "injected failure", 503)
+        return self._response(payload, noise)
+
+    async def stream_async(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """Stream the reply of `post_async` in small pieces."""
+        res = await self.post_async(payload, timeout=timeout)
+        text = res["choices"][0]["message"]["content"]
+        for i in range(0, len(text), 20):
+            yield text[i:i + 20]
+
+
+class HashingEmbeddings:
+    """
+    Tiny deterministic embedding: character unigrams and bigrams hashed into `dim` buckets.
+
+    Texts sharing many characters get similar vectors, which is enough to exercise
+    retrieval without loading a model.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.identity = {"embedding_model": f"hashing-{dim}", "embedding_backend": "hashing",
+                         "embedding_prefix": "none"}
+
+    def embed_query(self, text: str) -> List[float]:
+        text = unicodedata.normalize("NFKC", text).lower()
+        vector = [0.0] * self.dim
+        for gram in list(text) + [text[i:i + 2] for i in range(len(text) - 1)]:
+            if not gram.isspace():
+                vector[zlib.crc32(gram.encode("utf-8")) % self.dim] += 1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+
+def load_sample_articles(path: str = SAMPLE_DATA) -> List[Dict[str, Any]]:
+    """
+    Load the sample news file.
+
+    Args:
+        path (str, optional): JSON array of news records. Defaults to SAMPLE_DATA.
+
+    Returns:
+        List[Dict[str, Any]]: News records
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class OfflineStack:
+    """
+    Handle on the offline providers installed by `install_offline_stack`.
+
+    Attributes:
+        transports (Dict[str, FakeLLMTransport]): Fake transport per provider
+        db: mongomock database holding the articles and graded summaries
+        articles (List[Dict[str, Any]]): The loaded news records
+    """
+
+    def __init__(self, transports, db, articles, directory, restore):
+        self.transports = transports
+        self.db = db
+        self.articles = articles
+        self.directory = directory
+        self._restore = restore
+
+    def llm_calls(self) -> Dict[str, int]:
+        """
+        Return the LLM calls made per provider since the last reset.
+
+        Returns:
+            Dict[str, int]: Calls per provider name
+        """
+        return {name: transport.calls for name, transport in self.transports.items()}
+
+    def reset(self) -> None:
+        """Zero the call counters, drop stored graded summaries and provider latency history, so runs start cold."""
+        from backend.app.llm_clients.provider_router import set_provider_router
+
+        for transport in self.transports.values():
+            transport.reset()
+        self.db["graded_summaries"].delete_many({})
+        set_provider_router(None)
+
+    def close(self) -> None:
+        """Restore the real providers and remove the temporary index."""
+        for restore in self._restore:
+            restore()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def install_offline_stack(data_path: str = SAMPLE_DATA,
+                          llm_median: float = 0.0,
+                          llm_sigma: float = 0.0,
+                          generation_median: Optional[float] = None,
+                          error_rate: float = 0.0,
+                          embedding_dim: int = 256,
+                          seed: int = 0) -> OfflineStack:
+    """
+    Point the API at fake LLM providers, an in-memory article store and a hashing embedding.
+
+    The response cache and the LLM response cache are disabled, and the similarity
+    cascade is switched off, so every query pays for its full scoring pipeline.
+
+    Args:
+        data_path (str, optional): Sample news file to index. Defaults to SAMPLE_DATA.
+        llm_median (float, optional): Median Groq (scoring and summary) latency in seconds. Defaults to 0.
+        llm_sigma (float, optional): Lognormal spread of every LLM latency. Defaults to 0.
+        generation_median (Optional[float], optional): Median OpenAI (generation) latency.
+            Defaults to llm_median.
+        error_rate (float, optional): Probability that an LLM call fails. Defaults to 0.
+        embedding_dim (int, optional): Hashing embedding size. Defaults to 256.
+        seed (int, optional): Seed for latencies, errors and score noise. Defaults to 0.
+
+    Returns:
+        OfflineStack: Handle exposing call counters, `reset` and `close`
+    """
+    # Deferred so that importing this module stays cheap
+    import chromadb
+    import mongomock
+    from backend.app.api import news_router
+    from backend.app.db import mongo_connector
+    from backend.app.db.chroma_connector import NewsRetriever, set_retriever
+    from backend.app.db.summary_store import GradedSummaryStore, set_summary_store
+    from backend.app.llm_clients.cache import LLMCache, get_llm_cache, set_llm_cache
+    from backend.app.llm_clients.provider_router import set_provider_router
+    from backend.app.llm_clients.transport import set_transport
+    from backend.app.services.embedding_backends import embedding_identity
+    from backend.app.services.ingestion_service import NewsCollections, iter_article_chunks, write_article_batch
+    from backend.app.services.response_cache import SemanticResponseCache, set_response_cache
+
+    articles = load_sample_articles(data_path)
+    restore = []
+
+    transports = {
+        "groq": FakeLLMTransport("groq", llm_median, llm_sigma, error_rate, seed),
+        "openai": FakeLLMTransport("openai", llm_median if generation_median is None else generation_median,
+                                   llm_sigma, error_rate, seed + 1),
+    }
+    for name, transport in transports.items():
+        set_transport(name, transport)
+        restore.append(lambda name=name: set_transport(name, None))
+    # Fresh provider health and latency history for the fake providers
+    set_provider_router(None)
+    restore.append(lambda: set_provider_router(None))
+
+    previous_llm_cache = get_llm_cache()
+    set_llm_cache(LLMCache(enabled=False))
+    restore.append(lambda: set_llm_cache(previous_llm_cache))
+    set_response_cache(SemanticResponseCache(enabled=False))
+    restore.append(lambda: set_response_cache(None))
+
+    db = mongomock.MongoClient()["news_db"]
+    for article in articles:
+        db[article["date"].split("-")[0]].insert_one(dict(article))
+    mongo_connector.set_database(db)
+    restore.append(lambda: mongo_connector.set_database(None))
+    set_summary_store(GradedSummaryStore(db["graded_summaries"]))
+    restore.append(lambda: set_summary_store(None))
+
+    directory = tempfile.mkdtemp(prefix="offline_chroma_")
+    embedding = HashingEmbeddings(embedding_dim)
+    client = chromadb.PersistentClient(path=directory)
+    embedding_id = embedding_identity(embedding)
+    chunked = list(iter_article_chunks(enumerate(articles), embedding_id=embedding_id))
+    vectors = embedding.embed_documents([text for article in chunked for text, _ in article.chunks])
+    write_article_batch(NewsCollections(client, "month", embedding_id=embedding_id), chunked, vectors)
+    retriever = NewsRetriever(directory)
+    retriever.client, retriever.embedding, retriever.ready = client, embedding, True
+    set_retriever(retriever)
+    restore.append(lambda: set_retriever(None))
+
+    for attr, replacement in (("load_cascade_calibration", lambda: None),
+                              ("record_similarity_scores", lambda *args, **kwargs: None)):
+        original = getattr(news_router, attr)
+        setattr(news_router, attr, replacement)
+        restore.append(lambda attr=attr, original=original: setattr(news_router, attr, original))
+
+    return OfflineStack(transports, db, articles, directory, restore)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Linearly interpolated percentile.
+
+    Args:
+        values (List[float]): Samples
+        q (float): Percentile between 0 and 100
+
+    Returns:
+        float: The percentile, or 0 for no samples
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = math.floor(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+async def drive_queries(app: Any,
+                        queries: List[str],
+                        mode: str,
+                        concurrency: int = 8,
+                        top_k: int = 5,
+                        path: str = "/api/query") -> Tuple[List[float], int, float]:
+    """
+    Send every query to the API in-process, with at most `concurrency` in flight.
+
+    Args:
+        app (Any): The FastAPI application
+        queries (List[str]): Queries to send, one request each
+        mode (str): Scoring mode query parameter
+        concurrency (int, optional): Requests in flight at once. Defaults to 8.
+        top_k (int, optional): Articles per query. Defaults to 5.
+        path (str, optional): Endpoint to call. Defaults to '/api/query'.
+
+    Returns:
+        Tuple[List[float], int, float]: Per-request latencies in seconds, failed requests,
+        and wall-clock seconds for the whole run
+    """
+    import httpx
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://offline",
+                                 timeout=None) as client:
+        async def one(query):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                res = await client.post(path, params={"mode": mode}, json={"query": query, "top_k": top_k})
+                latencies.append(time.perf_counter() - start)
+                if res.status_code != 200 or res.json().get("generated_article", "").startswith("❌"):
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(query) for query in queries))
+        wall = time.perf_counter() - start
+
+    return latencies, errors, wall
+
+
+def summarize_run(latencies: List[float], errors: int, wall: float, llm_calls: Dict[str, int]) -> Dict[str, float]:
+    """
+    Reduce one run to the numbers tracked for regressions.
+
+    Args:
+        latencies (List[float]): Per-request latencies in seconds
+        errors (int): Failed requests
+        wall (float): Wall-clock seconds for the run
+        llm_calls (Dict[str, int]): LLM calls per provider during the run
+
+    Returns:
+        Dict[str, float]: requests, error_rate, p50/p95/p99 in ms, throughput in requests/s,
+        and LLM calls per query in total and per provider
+    """
+    requests = len(latencies)
+    summary = {
+        "requests": requests,
+        "error_rate": errors / requests if requests else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "throughput_rps": requests / wall if wall else 0.0,
+        "llm_calls_per_query": sum(llm_calls.values()) / requests if requests else 0.0,
+    }
+    for name, calls in llm_calls.items():
+        summary[f"{name}_calls_per_query"] = calls / requests if requests else 0.0
+    return summary
@@ -0,0 +1,25 @@
+"""
+Script to precompute graded summaries for sample news data.
+
+For every article, this script generates the summary for each of the four
+length buckets (scores 20-30, 30-50, 50-70 and 70+) and stores them in the
+`graded_summaries` MongoDB collection. At query time the scorer then looks the
+summary up instead of calling the LLM on the full article. Buckets that are
+already stored are skipped, so the script can be re-run after new ingests.
+
+Example:
+    python -m backend.scripts.precompute_summaries
+"""
+
+from backend.app.services.embedding_service import load_news_data
+from backend.app.services.summary_service import precompute_graded_summaries
+import os
+
+# Get the absolute path to the example_data directory
+current_dir = os.path.dirname(os.path.abspath(__file__))
+example_data_dir = os.path.join(os.path.dirname(current_dir), "example_data")
+
+for file_name in ["news_202405.json"]:
+    print(f"處理中：{file_name}")
+    df = load_news_data(os.path.join(example_data_dir, file_name))
+    precompute_graded_summaries(df.to_dict("records"), max_workers=5)
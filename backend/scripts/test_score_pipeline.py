@@ -10,20 +10,20 @@ This script demonstrates the complete workflow:
 6. Create a comprehensive news report
 
 Example:
-    python test_score_pipeline.py
+    python -m backend.scripts.test_score_pipeline
 """
 
-from backend.app.db.chroma_connector import get_chroma_db, query_chroma
-from backend.app.services.CoT_service import score_articles_with_consistency
+from backend.app.db.chroma_connector import get_retriever
+from backend.app.services.CoT_service import score_articles_with_thread_pool
 from backend.app.services.generation_service import generated_news_with_CoT
 from backend.app.db.mongo_connector import get_full_article
 
-# Initialize the vector database
-db = get_chroma_db()
+# Load the shared retriever (embedding model + vector database) once
+retriever = get_retriever().ensure_ready()
 
 # Define search query and retrieve similar documents
 query = "馬斯克訪華"
-docs = query_chroma(query, k=5)  # Get top 5 most similar articles
+docs = retriever.similarity_search(query, k=5)  # Get top 5 most similar articles
 print(f"找到 {len(docs)} 篇相關文章")
 
 # Retrieve full article content from MongoDB
@@ -34,10 +34,10 @@ print(f"成功獲取 {len(full_articles)} 篇完整文章")
 
 # Score articles and generate summaries
 # This will:
-# 1. Evaluate relevance of each article
+# 1. Evaluate relevance of each article (3 samples each for consistency)
 # 2. Generate summaries based on relevance scores
 # 3. Sort articles by score
-results = score_articles_with_consistency(full_articles, query)
+results = score_articles_with_thread_pool(full_articles, query, n=3)
 print(f"完成評分，共有 {len(results)} 篇文章通過評分標準")
 
 # Display individual article results with titles, scores, and generated summaries
@@ -53,4 +53,4 @@ for r in results:
 print("\n專題生成：")
 report = generated_news_with_CoT(query, results)
 print(report)
-print("=" * 80)  # Separator line for better readability
\ No newline at end of file
+print("=" * 80)  # Separator line for better readability
@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+from backend.app.db.chroma_connector import NewsRetriever, aggregate_chunks_by_article
+
+
+def chunk(news_id, text=""):
+    return SimpleNamespace(page_content=text, metadata={"news_id": news_id, "date": "2024-05-01"})
+
+
+HITS = [
+    (chunk(1, "a"), 0.90), (chunk(1, "b"), 0.85), (chunk(2), 0.88),
+    (chunk(1, "c"), 0.80), (chunk(3), 0.70), (chunk(3), 0.69), (chunk(3), 0.68),
+]
+
+
+def test_max_aggregation_keeps_best_chunk_per_article():
+    ranked = aggregate_chunks_by_article(HITS, k=2)
+
+    assert [int(doc.metadata["news_id"]) for doc, _ in ranked] == [1, 2]
+    assert ranked[0][0].page_content == "a"
+    assert ranked[0][1] == 0.90
+
+
+def test_sum_aggregation_rewards_articles_matching_in_several_chunks():
+    ranked = aggregate_chunks_by_article(HITS, method="sum", top_m=3)
+
+    assert [int(doc.metadata["news_id"]) for doc, _ in ranked] == [1, 3, 2]
+
+
+class FakeDB:
+    def __init__(self, hits):
+        self.hits = hits
+        self.requested = []
+
+    def similarity_search_with_relevance_scores(self, query, k):
+        self.requested.append(k)
+        return self.hits[:k]
+
+
+def test_search_articles_widens_fetch_until_k_distinct_articles():
+    retriever = NewsRetriever()
+    retriever.ready = True
+    retriever.db = FakeDB(HITS)
+
+    ranked = retriever.search_articles("query", k=3, overfetch=1)
+
+    assert len(ranked) == 3
+    assert retriever.db.requested == [3, 6]
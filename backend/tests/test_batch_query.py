@@ -0,0 +1,69 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app.db.chroma_connector import get_retriever
+from backend.app.services.embedding_backends import CachedQueryEmbeddings
+
+
+@pytest.fixture
+def stack():
+    pytest.importorskip("chromadb")
+    pytest.importorskip("mongomock")
+    from backend.scripts.offline_stack import install_offline_stack
+
+    stack = install_offline_stack()
+    yield stack
+    stack.close()
+
+
+class CountingEmbeddings:
+    def __init__(self, inner):
+        self.inner = inner
+        self.document_calls = 0
+        self.query_calls = 0
+
+    def embed_documents(self, texts):
+        self.document_calls += 1
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text):
+        self.query_calls += 1
+        return self.inner.embed_query(text)
+
+
+def test_batch_shares_embedding_fetch_and_duplicate_queries(stack):
+    from backend.app.main import app
+
+    retriever = get_retriever()
+    counting = CountingEmbeddings(retriever.embedding)
+    retriever.embedding = CachedQueryEmbeddings(counting)
+    titles = [article["news_title"] for article in stack.articles]
+    queries = titles[:4] + [f" {titles[0]} "]
+
+    data = TestClient(app).post("/api/query/batch", json={"queries": queries, "top_k": 3}).json()
+
+    assert [result["query"] for result in data["results"]] == queries
+    assert data["results"][4]["references"] == data["results"][0]["references"]
+    assert counting.document_calls == 1
+    assert counting.query_calls == 0
+
+    stats = data["stats"]
+    assert stats["unique_queries"] == 4
+    assert stats["articles_retrieved"] == 15
+    assert stats["articles_fetched"] < stats["articles_retrieved"]
+    assert stats["llm_calls"] == sum(stack.llm_calls().values())
+    assert stats["llm_calls_saved"] == stats["llm_calls_separate"] - stats["llm_calls"] > 0
+    # Duplicate queries and shared summaries aside, each unique query is generated once
+    assert stack.llm_calls()["openai"] == 4
+
+
+def test_batch_reports_failed_queries_in_place(stack):
+    from backend.app.main import app
+
+    # Generation falls back to Groq, so both providers have to fail
+    stack.transports["openai"].error_rate = 1.0
+    stack.transports["groq"].error_rate = 1.0
+    data = TestClient(app).post("/api/query/batch", json={"queries": ["馬斯克訪華", "德國經濟"]}).json()
+
+    assert [result["generated_article"] for result in data["results"]] == ["❌ Generation failed"] * 2
+    assert data["stats"]["queries"] == 2
@@ -0,0 +1,91 @@
+import json
+
+from backend.app.services.cascade_service import (
+    apply_similarity_cascade, fit_cascade_thresholds, record_similarity_scores, start_cascade_log
+)
+
+CALIBRATION = {"reject_below": 0.3, "accept_above": 0.8, "slope": 100.0, "intercept": 0.0, "threshold": 20}
+ARTICLES = {1: {"news_title": "low"}, 2: {"news_title": "middle"}, 3: {"news_title": "high"}, 4: {"news_title": "?"}}
+SIMILARITIES = {1: 0.1, 2: 0.5, 3: 0.9}
+
+
+def test_fit_separates_relevant_from_irrelevant():
+    # Irrelevant below 0.4, relevant above 0.6, a mixed band in between
+    pairs = [(0.1 + i * 0.01, 5) for i in range(30)]
+    pairs += [(0.45, 10), (0.5, 40), (0.55, 15)]
+    pairs += [(0.6 + i * 0.01, 80) for i in range(30)]
+
+    calibration = fit_cascade_thresholds(pairs, min_support=10)
+
+    assert 0.39 <= calibration["reject_below"] <= 0.5
+    assert 0.55 < calibration["accept_above"] <= 0.6
+    assert calibration["slope"] > 0
+
+
+def test_fit_needs_support_on_each_side():
+    calibration = fit_cascade_thresholds([(0.1, 5), (0.9, 90)], min_support=20)
+
+    assert calibration["reject_below"] is None and calibration["accept_above"] is None
+
+
+def test_fit_weights_explored_pairs():
+    # One relevant article among the low ones, logged once for ten unscored neighbours
+    pairs = [(0.1 + i * 0.01, 5) for i in range(30)] + [(0.15, 50, 10.0)] + [(0.6 + i * 0.01, 80) for i in range(30)]
+
+    weighted = fit_cascade_thresholds(pairs, min_support=10, max_recall_loss=0.05)
+    unweighted = fit_cascade_thresholds([pair[:2] for pair in pairs], min_support=10, max_recall_loss=0.05)
+
+    # Unweighted it looks like 1 of 31 relevant articles; weighted it is 10 of 40, too many to lose
+    assert unweighted["reject_below"] > 0.15
+    assert weighted["reject_below"] is None
+
+
+def test_cascade_rejects_below_the_floor_and_scores_the_rest_by_default():
+    to_score, accepted = apply_similarity_cascade(ARTICLES, SIMILARITIES, CALIBRATION)
+
+    assert sorted(to_score) == [2, 3, 4]
+    assert accepted == {}
+
+
+def test_cascade_auto_accept_is_opt_in():
+    to_score, accepted = apply_similarity_cascade(ARTICLES, SIMILARITIES, CALIBRATION, auto_accept=True)
+
+    assert sorted(to_score) == [2, 4]
+    assert accepted == {3: 90.0}
+
+
+def test_cascade_without_calibration_scores_everything():
+    assert apply_similarity_cascade(ARTICLES, SIMILARITIES, None) == (ARTICLES, {})
+
+
+def test_logged_query_records_every_decision(tmp_path):
+    path = str(tmp_path / "cascade_log.jsonl")
+    decisions = start_cascade_log(sample_rate=1.0)
+    to_score, _ = apply_similarity_cascade(ARTICLES, SIMILARITIES, CALIBRATION, decisions, explore_rate=0.0)
+    record_similarity_scores("q", SIMILARITIES, {2: 40.0, 3: 85.0}, decisions, path=path, explore_rate=0.0)
+
+    with open(path, encoding="utf-8") as f:
+        records = {record["news_id"]: record for record in map(json.loads, f)}
+    assert records[1]["decision"] == "rejected" and records[1]["score"] is None
+    assert records[2]["decision"] == "scored" and records[2]["score"] == 40.0
+    assert 4 not in records  # no similarity to log
+
+
+def test_explored_articles_are_scored_and_weighted(tmp_path):
+    path = str(tmp_path / "cascade_log.jsonl")
+    decisions = {}
+    to_score, _ = apply_similarity_cascade(ARTICLES, SIMILARITIES, CALIBRATION, decisions, explore_rate=1.0)
+    record_similarity_scores("q", SIMILARITIES, {1: 30.0}, decisions, path=path, explore_rate=0.25)
+
+    assert 1 in to_score and decisions[1] == "explored"
+    with open(path, encoding="utf-8") as f:
+        records = {record["news_id"]: record for record in map(json.loads, f)}
+    assert records[1]["weight"] == 4.0 and records[1]["score"] == 30.0
+
+
+def test_unsampled_queries_are_not_logged(tmp_path):
+    path = tmp_path / "cascade_log.jsonl"
+
+    assert start_cascade_log(sample_rate=0.0) is None
+    record_similarity_scores("q", SIMILARITIES, {2: 40.0}, None, path=str(path))
+    assert not path.exists()
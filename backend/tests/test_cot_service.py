@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from backend.app.services import CoT_service
+from backend.app.services.CoT_service import score_articles_adaptive, should_stop_sampling
+
+ARTICLES = {
+    news_id: {"news_id": news_id, "news_title": title, "news_summary": title, "news_content": title,
+              "date": "2024-05-01"}
+    for news_id, title in ((1, "relevant"), (2, "borderline"), (3, "unrelated"))
+}
+
+
+@pytest.fixture
+def fake_scoring(monkeypatch):
+    """Replies with scripted scores per article title and records the prompts sent."""
+    prompts = []
+    replies = {"relevant": iter([90]), "borderline": iter([10, 30, 18, 25, 22]), "unrelated": iter([0])}
+
+    def call_llm(task, prompt, use_cache=True):
+        prompts.append(prompt)
+        title = next(title for title in replies if title in prompt)
+        return str(next(replies[title]))
+
+    monkeypatch.setattr(CoT_service, "call_llm", call_llm)
+    monkeypatch.setattr(CoT_service, "get_graded_summary", lambda article, score: f"summary of {article['news_title']}")
+    return prompts
+
+
+def test_decisive_first_sample_stops_early():
+    assert should_stop_sampling([90], threshold=20, n=3, max_samples=5)
+    assert should_stop_sampling([0], threshold=20, n=3, max_samples=5)
+
+
+def test_agreeing_samples_stop_before_the_budget():
+    assert not should_stop_sampling([25], threshold=20, n=3, max_samples=5)
+    assert should_stop_sampling([25, 27], threshold=20, n=3, max_samples=5)
+
+
+def test_borderline_samples_continue_past_n_until_max_samples():
+    scores = [10, 30, 18]
+    # n samples taken, but the mean is within tolerance of the threshold
+    assert not should_stop_sampling(scores, threshold=20, n=3, max_samples=5)
+    assert not should_stop_sampling(scores + [25], threshold=20, n=3, max_samples=5)
+    assert should_stop_sampling(scores + [25, 22], threshold=20, n=3, max_samples=5)
+
+
+def test_disagreeing_samples_stop_at_n_when_the_mean_is_clear():
+    assert should_stop_sampling([20, 40, 30], threshold=20, n=3, max_samples=5)
+
+
+def test_adaptive_scoring_reports_samples_for_every_article(fake_scoring):
+    score_log, samples_log = {}, {}
+
+    results = score_articles_adaptive(ARTICLES, "query", n=3, threshold=20, max_samples=5,
+                                      score_log=score_log, samples_log=samples_log)
+
+    assert samples_log == {1: 1, 2: 5, 3: 1}
+    assert len(fake_scoring) == 7
+    assert [(result["id"], result["samples_used"]) for result in results] == [(1, 1), (2, 5)]
+    assert score_log[3] == 0
+
+
+@pytest.mark.parametrize("reply, expected", [
+    ('```json\n{"1": 85, "2": 30}\n```', {"1": 85, "2": 30}),
+    ('{"scores": [{"news_id": 1, "score": 85}, {"id": "2", "score": "30"}]}', {"1": 85, "2": 30}),
+    ('分數如下：1：85，2=30', {"1": 85, "2": 30}),
+    # Partial reply: the missing id is simply absent
+    ('{"1": 85}', {"1": 85}),
+    # Ids that were not asked for are dropped
+    ('{"1": 85, "2": 30, "999": 100}', {"1": 85, "2": 30}),
+    # Out-of-range scores are clamped, unusable ones dropped
+    ('{"1": 150, "2": -5}', {"1": 100, "2": 0}),
+    ('{"1": "high", "2": null}', {}),
+    # Malformed JSON falls back to the "id: score" pairs in the text
+    ('{"1": 85, "2": 30', {"1": 85, "2": 30}),
+    ('I cannot score these articles.', {}),
+])
+def test_parse_batch_scores(reply, expected):
+    assert CoT_service.parse_batch_scores(reply, [1, 2]) == expected
+
+
+def test_batch_prompt_lists_every_article():
+    prompt = CoT_service.build_batch_score_prompt("query", list(ARTICLES.items()))
+
+    assert all(f"news_id：{news_id}｜" in prompt and article["news_title"] in prompt
+               for news_id, article in ARTICLES.items())
+
+
+def test_ids_missing_from_the_batch_reply_are_scored_one_by_one(monkeypatch):
+    prompts = []
+
+    def call_llm(task, prompt, use_cache=True):
+        prompts.append(prompt)
+        if "JSON" in prompt:
+            # Article 3 is left out and an unknown id is added
+            return '{"1": 90, "2": 40, "7": 100}'
+        assert "unrelated" in prompt
+        return "15"
+
+    monkeypatch.setattr(CoT_service, "call_llm", call_llm)
+    monkeypatch.setattr(CoT_service, "get_graded_summary", lambda article, score: "summary")
+    score_log = {}
+
+    results = CoT_service.score_articles_batched(ARTICLES, "query", threshold=20, batch_size=3, score_log=score_log)
+
+    assert len(prompts) == 2
+    assert score_log == {1: 90, 2: 40, 3: 15}
+    assert [(result["id"], result["score"]) for result in results] == [(1, 90), (2, 40)]
+
+
+def test_async_scoring_averages_samples_and_summarizes_passing_articles(monkeypatch):
+    replies = {"relevant": iter([80, 90, 100]), "borderline": iter([10, 20, 15]), "unrelated": iter(["0", "分數：5", "1"])}
+
+    async def call_llm_async(task, prompt, use_cache=True):
+        assert task == "scoring"
+        title = next(title for title in replies if title in prompt)
+        return str(next(replies[title]))
+
+    async def get_graded_summary_async(article, score):
+        return f"summary of {article['news_title']} at {score}"
+
+    monkeypatch.setattr(CoT_service, "call_llm_async", call_llm_async)
+    monkeypatch.setattr(CoT_service, "get_graded_summary_async", get_graded_summary_async)
+    score_log = {}
+
+    results = asyncio.run(CoT_service.score_articles_async(ARTICLES, "async query", n=3, threshold=20,
+                                                           score_log=score_log))
+
+    assert score_log == {1: 90, 2: 15, 3: 2}
+    assert [(result["id"], result["score"], result["generated_summary"]) for result in results] == [
+        (1, 90, "summary of relevant at 90.0")
+    ]
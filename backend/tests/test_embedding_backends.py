@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+import pytest
+
+from backend.app.services.embedding_backends import (
+    E5PrefixedEmbeddings, OnnxEmbeddings, is_e5_model, mean_pool, set_encode_batch_size
+)
+
+# A small model, e.g. intfloat/multilingual-e5-small or a directory with model.onnx + tokenizer.json
+TEST_MODEL = os.getenv("EMBEDDING_TEST_MODEL")
+
+
+class RecordingEmbeddings:
+    def __init__(self):
+        self.seen = []
+        self.batch_size = 32
+
+    def embed_documents(self, texts):
+        self.seen.extend(texts)
+        return [[1.0] for _ in texts]
+
+    def embed_query(self, text):
+        self.seen.append(text)
+        return [1.0]
+
+
+def test_e5_prefixes_queries_and_passages():
+    inner = RecordingEmbeddings()
+    embedding = E5PrefixedEmbeddings(inner)
+
+    embedding.embed_documents(["新聞段落"])
+    embedding.embed_query("馬斯克訪華")
+
+    assert inner.seen == ["passage: 新聞段落", "query: 馬斯克訪華"]
+
+
+def test_e5_detection():
+    assert is_e5_model("intfloat/multilingual-e5-large")
+    assert is_e5_model("./backend/storage/onnx/intfloat__multilingual-e5-small/")
+    assert not is_e5_model("BAAI/bge-m3")
+
+
+def test_encode_batch_size_reaches_wrapped_backend():
+    inner = RecordingEmbeddings()
+
+    set_encode_batch_size(E5PrefixedEmbeddings(inner), 8)
+
+    assert inner.batch_size == 8
+
+
+def test_mean_pool_ignores_padding_and_normalizes():
+    hidden = np.array([[[1.0, 0.0], [3.0, 0.0], [100.0, 100.0]]])
+    mask = np.array([[1, 1, 0]])
+
+    assert mean_pool(hidden, mask, normalize=False).tolist() == [[2.0, 0.0]]
+    assert mean_pool(hidden, mask).tolist() == [[1.0, 0.0]]
+
+
+@pytest.mark.skipif(not TEST_MODEL, reason="set EMBEDDING_TEST_MODEL to a small locally cached model")
+def test_int8_onnx_stays_close_to_fp32_onnx(tmp_path):
+    texts = ["passage: 中國外交部稱法塔赫和哈馬斯在北京舉行對話", "passage: 台股今天收盤上漲"]
+    fp32 = OnnxEmbeddings(TEST_MODEL, quantize=False, threads=1, cache_dir=str(tmp_path))
+    int8 = OnnxEmbeddings(TEST_MODEL, quantize=True, threads=1, cache_dir=str(tmp_path))
+
+    a = np.array(fp32.embed_documents(texts))
+    b = np.array(int8.embed_documents(texts))
+
+    assert np.allclose(np.linalg.norm(a, axis=1), 1.0, atol=1e-4)
+    assert (a * b).sum(axis=1).min() > 0.95
@@ -0,0 +1,205 @@
+import json
+
+import pytest
+
+from backend.app.db.ingest_manifest import IngestManifest
+from backend.app.services.ingestion_service import (
+    ChunkedArticle, iter_article_chunks, iter_document_batches, iter_news_records, load_checkpoint,
+    checkpoint_path_for, stream_news_file_to_chroma, write_article_batch
+)
+
+
+def make_article(news_id, paragraphs=1):
+    return {
+        "news_id": news_id,
+        "date": "2024-05-01",
+        "news_title": f"標題 {news_id}",
+        "news_content": "。".join(["這是一段足夠長的新聞內容，用來測試串流匯入與分段的行為是否正確" * 3] * paragraphs),
+    }
+
+
+ARTICLES = [make_article(i, paragraphs=i % 3 + 1) for i in range(1, 8)]
+
+
+@pytest.fixture(params=["array", "jsonl"])
+def news_file(request, tmp_path):
+    path = tmp_path / f"news.{'json' if request.param == 'array' else 'jsonl'}"
+    if request.param == "array":
+        path.write_text(json.dumps(ARTICLES, ensure_ascii=False, indent=2), encoding="utf-8")
+    else:
+        path.write_text("".join(json.dumps(a, ensure_ascii=False) + "\n" for a in ARTICLES), encoding="utf-8")
+    return str(path)
+
+
+def test_records_are_parsed_incrementally(news_file):
+    records = list(iter_news_records(news_file, block_size=16))
+
+    assert [record for _, record in records] == ARTICLES
+
+
+def test_resuming_from_an_offset_yields_the_remaining_records(news_file):
+    offsets = [offset for offset, _ in iter_news_records(news_file, block_size=64)]
+
+    resumed = list(iter_news_records(news_file, start_offset=offsets[2], block_size=64))
+
+    assert [record["news_id"] for _, record in resumed] == [4, 5, 6, 7]
+
+
+def test_truncated_array_raises(tmp_path):
+    path = tmp_path / "broken.json"
+    path.write_text(json.dumps(ARTICLES, ensure_ascii=False)[:-40], encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        list(iter_news_records(str(path)))
+
+
+def test_batches_end_on_article_boundaries():
+    articles = [ChunkedArticle(offset, str(offset), "h", chunks) for offset, chunks in
+                [(10, ["a", "b"]), (20, ["c"]), (30, ["d", "e", "f"]), (40, [])]]
+
+    batches = list(iter_document_batches(articles, batch_size=3))
+
+    assert [[a.offset for a in batch] for batch in batches] == [[10, 20], [30], [40]]
+
+
+class FakeEmbedding:
+    def embed_documents(self, texts):
+        return [[float(len(text))] for text in texts]
+
+
+class FakeCollection:
+    def __init__(self, fail_after=None):
+        self.rows = {}
+        self.documents = {}
+        self.vectors = {}
+        self.upserted = 0
+        self.fail_after = fail_after
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        if self.fail_after is not None and len(self.rows) >= self.fail_after:
+            raise RuntimeError("crash")
+        assert len(ids) == len(embeddings) == len(documents) == len(metadatas)
+        # Like Chroma, which raises DuplicateIDError
+        assert len(set(ids)) == len(ids), "Expected IDs to be unique"
+        self.upserted += len(ids)
+        self.rows.update(zip(ids, metadatas))
+        self.documents.update(zip(ids, documents))
+        self.vectors.update(zip(ids, embeddings))
+
+    def delete(self, ids):
+        for chunk_id in ids:
+            del self.rows[chunk_id]
+            del self.documents[chunk_id]
+            del self.vectors[chunk_id]
+
+
+def ingest(news_file, tmp_path, collection, embedding=None, **kwargs):
+    return stream_news_file_to_chroma(
+        news_file, embedding or FakeEmbedding(), batch_size=3, checkpoint_dir=str(tmp_path / "checkpoints"),
+        collection=collection, manifest=IngestManifest(str(tmp_path / "manifest.sqlite3")), **kwargs
+    )
+
+
+def test_crashed_ingestion_resumes_from_checkpoint(news_file, tmp_path):
+    collection = FakeCollection(fail_after=3)
+    with pytest.raises(RuntimeError):
+        ingest(news_file, tmp_path, collection)
+    saved = load_checkpoint(checkpoint_path_for(news_file, str(tmp_path / "checkpoints")))
+
+    collection.fail_after = None
+    result = ingest(news_file, tmp_path, collection)
+
+    assert 0 < saved["records"] < len(ARTICLES)
+    assert result["done"] and result["records"] == len(ARTICLES)
+    assert sorted({m["news_id"] for m in collection.rows.values()}, key=int) == [str(a["news_id"]) for a in ARTICLES]
+    assert collection.upserted == len(collection.rows)
+
+
+def test_reingestion_skips_unchanged_and_replaces_edited_articles(news_file, tmp_path):
+    collection = FakeCollection()
+    first = ingest(news_file, tmp_path, collection)
+    ids_before = set(collection.rows)
+
+    second = ingest(news_file, tmp_path, collection)
+    assert second["skipped"] == len(ARTICLES) and second["chunks"] == 0
+    assert set(collection.rows) == ids_before
+
+    edited = [dict(a) for a in ARTICLES]
+    edited[1]["news_content"] = edited[0]["news_content"][:90]
+    with open(news_file, "w", encoding="utf-8") as f:
+        if news_file.endswith(".jsonl"):
+            f.write("".join(json.dumps(a, ensure_ascii=False) + "\n" for a in edited))
+        else:
+            json.dump(edited, f, ensure_ascii=False)
+    third = ingest(news_file, tmp_path, collection)
+
+    article_2 = [chunk_id for chunk_id, m in collection.rows.items() if m["news_id"] == "2"]
+    assert third["skipped"] == len(ARTICLES) - 1
+    assert third["deleted"] > 0
+    assert len(article_2) == 1 and article_2[0].startswith("2-0-")
+    assert len(collection.rows) == len(ids_before) - third["deleted"] + third["chunks"]
+
+
+def test_switching_the_embedding_model_reingests_everything(news_file, tmp_path):
+    class OtherEmbedding(FakeEmbedding):
+        identity = {"embedding_model": "other-model", "embedding_backend": "onnx-int8", "embedding_prefix": "none"}
+
+    collection = FakeCollection()
+    first = ingest(news_file, tmp_path, collection)
+    second = ingest(news_file, tmp_path, collection, embedding=OtherEmbedding(), resume=False)
+
+    assert second["skipped"] == 0
+    assert second["chunks"] == first["chunks"]
+
+
+def test_an_article_repeated_in_one_batch_is_written_once_from_its_last_copy(tmp_path):
+    old, new = make_article(9, paragraphs=1), make_article(9, paragraphs=3)
+    batch = list(iter_article_chunks(enumerate([old, make_article(10), new])))
+    vectors = FakeEmbedding().embed_documents([text for article in batch for text, _ in article.chunks])
+    collection = FakeCollection()
+    manifest = IngestManifest(str(tmp_path / "manifest.sqlite3"))
+
+    written = write_article_batch(collection, batch, vectors, manifest)
+
+    last_copy = batch[2]
+    article_9 = sorted(chunk_id for chunk_id, m in collection.rows.items() if m["news_id"] == "9")
+    assert len(article_9) == len(last_copy.chunks) and written["written"] == len(collection.rows)
+    assert {collection.documents[chunk_id] for chunk_id in article_9} == {text for text, _ in last_copy.chunks}
+    # Every chunk is stored with the vector of its own text
+    assert all(collection.vectors[chunk_id] == [float(len(collection.documents[chunk_id]))] for chunk_id in collection.rows)
+    assert manifest.get("9")[0] == last_copy.article_hash
+
+
+def test_storing_documents_replaces_edited_articles(tmp_path):
+    chromadb = pytest.importorskip("chromadb")
+    from backend.app.services.embedding_service import store_documents_in_chroma
+    from backend.app.services.ingestion_service import build_text_splitter, split_article
+
+    class Embedding(FakeEmbedding):
+        identity = {"embedding_model": "fake", "embedding_backend": "fake", "embedding_prefix": "none"}
+
+    splitter = build_text_splitter()
+    original, edited = make_article(1, paragraphs=1), make_article(1, paragraphs=1)
+    edited["news_content"] = edited["news_content"].replace("新聞", "報導")
+    store_documents_in_chroma(split_article(original, splitter) + split_article(make_article(2), splitter),
+                              Embedding(), str(tmp_path))
+    store_documents_in_chroma(split_article(edited, splitter), Embedding(), str(tmp_path))
+
+    collection = chromadb.PersistentClient(path=str(tmp_path)).get_collection("news_2024_05")
+    article_1 = collection.get(where={"news_id": "1"})
+    assert article_1["documents"] == [text.page_content for text in split_article(edited, splitter)]
+    assert len(collection.get(where={"news_id": "2"})["ids"]) == 1
+
+
+def test_switching_only_the_embedding_backend_keeps_the_index(news_file, tmp_path):
+    class TorchEmbedding(FakeEmbedding):
+        identity = {"embedding_model": "e5", "embedding_backend": "torch", "embedding_prefix": "e5"}
+
+    class OnnxEmbedding(FakeEmbedding):
+        identity = dict(TorchEmbedding.identity, embedding_backend="onnx-int8")
+
+    collection = FakeCollection()
+    ingest(news_file, tmp_path, collection, embedding=TorchEmbedding())
+    second = ingest(news_file, tmp_path, collection, embedding=OnnxEmbedding(), resume=False)
+
+    assert second["skipped"] == len(ARTICLES) and second["chunks"] == 0
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from backend.app.db.ingest_manifest import IngestManifest
+from backend.app.services.ingestion_pipeline import run_ingestion_pipeline
+
+
+def make_article(news_id):
+    return {
+        "news_id": news_id,
+        "date": "2024-05-01",
+        "news_title": f"標題 {news_id}",
+        "news_content": "。".join(["這是一段足夠長的新聞內容，用來測試管線化匯入在各個階段之間的行為是否正確" * 3] * (news_id % 3 + 1)),
+    }
+
+
+class FakeEmbedding:
+    def __init__(self):
+        self.encode_kwargs = {}
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+class FakeCollection:
+    def __init__(self, fail_on_call=None):
+        self.rows = []
+        self.calls = 0
+        self.fail_on_call = fail_on_call
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.calls += 1
+        if self.calls == self.fail_on_call:
+            raise RuntimeError("write failed")
+        assert len(ids) == len(embeddings) == len(documents) == len(metadatas)
+        self.rows.extend(zip(ids, documents, metadatas))
+
+    def delete(self, ids):
+        self.rows = [row for row in self.rows if row[0] not in ids]
+
+
+@pytest.fixture
+def news_files(tmp_path):
+    paths = []
+    for name, ids in (("a.jsonl", range(1, 11)), ("b.jsonl", range(11, 16))):
+        path = tmp_path / name
+        path.write_text("".join(json.dumps(make_article(i), ensure_ascii=False) + "\n" for i in ids), encoding="utf-8")
+        paths.append(str(path))
+    return paths
+
+
+@pytest.mark.parametrize("chunk_workers", [0, 2])
+def test_pipeline_ingests_every_chunk_and_reports_stages(news_files, tmp_path, chunk_workers):
+    embedding, collection = FakeEmbedding(), FakeCollection()
+
+    report = run_ingestion_pipeline(
+        news_files, embedding, batch_size=4, encode_batch_size=8, chunk_workers=chunk_workers,
+        records_per_task=3, queue_size=1, checkpoint_dir=str(tmp_path / "ckpt"), collection=collection,
+        manifest=IngestManifest(str(tmp_path / "manifest.sqlite3"))
+    )
+
+    assert sorted({int(m["news_id"]) for _, _, m in collection.rows}) == list(range(1, 16))
+    assert embedding.encode_kwargs["batch_size"] == 8
+    assert report["stages"]["chunk"]["items"] == 15
+    assert report["stages"]["embed"]["items"] == report["stages"]["write"]["items"] == len(collection.rows)
+    assert all(checkpoint["done"] for checkpoint in report["files"].values())
+
+
+def test_pipeline_failure_stops_all_stages_and_resumes(news_files, tmp_path):
+    def run(collection):
+        return run_ingestion_pipeline(news_files, FakeEmbedding(), batch_size=4, chunk_workers=0,
+                                      records_per_task=2, checkpoint_dir=str(tmp_path / "ckpt"),
+                                      collection=collection, manifest=IngestManifest(str(tmp_path / "m.sqlite3")))
+
+    failing = FakeCollection(fail_on_call=3)
+    with pytest.raises(RuntimeError):
+        run(failing)
+    resumed = FakeCollection()
+    run(resumed)
+
+    ingested = {int(m["news_id"]) for _, _, m in failing.rows + resumed.rows}
+    assert ingested == set(range(1, 16))
+    assert not {row[0] for row in failing.rows} & {row[0] for row in resumed.rows}
+
+    # A finished run followed by a new pass touches nothing
+    again = FakeCollection()
+    report = run(again)
+    assert again.rows == []
+    assert sum(f["skipped"] for f in report["files"].values()) == 15
@@ -0,0 +1,145 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app.db.job_store import JobStore, QueueFullError, set_job_store
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"), max_queued=2, max_attempts=2)
+    yield store
+    store.close()
+
+
+def test_enqueue_rejects_when_queue_is_full(store):
+    first = store.enqueue({"query": "a"}, {})
+    store.enqueue({"query": "b"}, {})
+    with pytest.raises(QueueFullError):
+        store.enqueue({"query": "c"}, {})
+
+    assert store.get(first)["queue_position"] == 0
+    assert store.claim(lease_seconds=30)["id"] == first
+    # A claimed job frees its place in the queue
+    store.enqueue({"query": "c"}, {})
+
+
+def test_claim_complete_and_fail(store):
+    job_id = store.enqueue({"query": "a"}, {"mode": "async"})
+    job = store.claim(lease_seconds=30)
+
+    assert job["status"] == "running" and job["attempts"] == 1
+    assert store.claim(lease_seconds=30) is None
+
+    store.update_progress(job_id, "scoring", {"completed": 3})
+    assert store.get(job_id)["stage"] == "scoring"
+    store.complete(job_id, {"generated_article": "x"})
+    done = store.get(job_id)
+    assert done["status"] == "done" and done["result"] == {"generated_article": "x"}
+    assert done["progress"] == {"completed": 3}
+
+    other = store.enqueue({"query": "b"}, {})
+    store.claim(lease_seconds=30)
+    store.fail(other, "boom")
+    assert store.get(other)["error"] == "boom"
+    assert store.counts() == {"queued": 0, "running": 0, "done": 1, "failed": 1}
+
+
+def test_expired_lease_is_recovered_until_max_attempts(tmp_path, store):
+    job_id = store.enqueue({"query": "a"}, {})
+    store.claim(lease_seconds=0)
+    time.sleep(0.01)
+
+    # A second process opening the same file sees the crashed worker's job again
+    other = JobStore(store.path, max_attempts=2)
+    retried = other.claim(lease_seconds=0)
+    assert retried["id"] == job_id and retried["attempts"] == 2
+    time.sleep(0.01)
+
+    assert other.claim(lease_seconds=30) is None
+    lost = other.get(job_id)
+    assert lost["status"] == "failed" and "lost" in lost["error"]
+    other.close()
+
+
+def test_release_does_not_count_the_attempt(store):
+    job_id = store.enqueue({"query": "a"}, {})
+    store.claim(lease_seconds=30)
+    store.release(job_id)
+
+    assert store.get(job_id)["status"] == "queued"
+    assert store.claim(lease_seconds=30)["attempts"] == 1
+
+
+def test_job_endpoint_runs_query_in_background(tmp_path, monkeypatch):
+    pytest.importorskip("chromadb")
+    pytest.importorskip("mongomock")
+    from backend.scripts.offline_stack import install_offline_stack
+
+    stack = install_offline_stack(llm_median=0.001)
+    store = JobStore(str(tmp_path / "jobs.sqlite3"), max_queued=1)
+    set_job_store(store)
+    monkeypatch.setenv("JOBS_CONCURRENCY", "1")
+    try:
+        from backend.app.main import app
+
+        with TestClient(app) as client:
+            job_id = client.post("/api/jobs", json={"query": stack.articles[0]["news_title"]}).json()["job_id"]
+            for _ in range(200):
+                job = client.get(f"/api/jobs/{job_id}").json()
+                if job["status"] in ("done", "failed"):
+                    break
+                time.sleep(0.02)
+
+            assert job["status"] == "done"
+            assert job["result"]["references"]
+            assert job["progress"]["completed"] == job["progress"]["total"]
+            assert set(job["progress"]["stages"]) == {"retrieval", "mongo", "cascade", "scoring", "generation"}
+            assert client.get("/api/jobs/unknown").status_code == 404
+
+        # Without the lifespan no worker drains the queue
+        client = TestClient(app)
+        store.enqueue({"query": "filler"}, {})
+        full = client.post("/api/jobs", json={"query": "another"})
+        assert full.status_code == 429 and full.headers["Retry-After"]
+    finally:
+        set_job_store(None)
+        store.close()
+        stack.close()
+
+
+def test_progress_is_written_off_the_event_loop(store):
+    import asyncio
+    import threading
+    from backend.app.services.job_service import JobWorkerPool
+    from backend.app.telemetry import span
+
+    writers = []
+    update_progress = store.update_progress
+
+    def recording_update(*args):
+        writers.append(threading.current_thread())
+        update_progress(*args)
+
+    store.update_progress = recording_update
+    job_id = store.enqueue({"query": "a"}, {})
+
+    async def handler(job):
+        with span("retrieval"):
+            await asyncio.sleep(0.05)
+            running = await asyncio.to_thread(store.get, job_id)
+        return {"stage_while_running": running["stage"]}
+
+    async def run():
+        pool = JobWorkerPool(store, handler, concurrency=1, progress_interval=0.01)
+        await pool.run_job(store.claim(lease_seconds=30))
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(run())
+
+    done = store.get(job_id)
+    assert done["result"] == {"stage_while_running": "retrieval"}
+    assert done["progress"]["stages"]["retrieval"]["status"] == "done"
+    # The span only buffered the progress; the heartbeat wrote it once from a worker thread
+    assert len(writers) == 1 and loop_thread not in writers
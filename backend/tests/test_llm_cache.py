@@ -0,0 +1,91 @@
+import asyncio
+import threading
+
+from backend.app.llm_clients.cache import LLMCache
+
+
+def make_cache(tmp_path, **overrides):
+    return LLMCache(path=str(tmp_path / "llm_cache.sqlite3"), **overrides)
+
+
+def test_key_depends_on_every_field():
+    key = LLMCache.make_key("groq", "llama", None, "prompt")
+
+    assert key == LLMCache.make_key("groq", "llama", None, "prompt")
+    assert key != LLMCache.make_key("openai", "llama", None, "prompt")
+    assert key != LLMCache.make_key("groq", "llama", 0.7, "prompt")
+    assert key != LLMCache.make_key("groq", "llama", None, "prompt!")
+
+
+def test_memory_then_disk_hits(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.set("k", "v")
+
+    assert cache.get("k") == "v"
+    assert cache.get("missing") is None
+
+    # A fresh instance only has the disk tier to go on
+    reopened = make_cache(tmp_path)
+    assert reopened.get("k") == "v"
+    assert reopened.get("k") == "v"
+
+    assert cache.stats()["hits_memory"] == 1
+    assert cache.stats()["misses"] == 1
+    assert reopened.stats()["hits_disk"] == 1
+    assert reopened.stats()["hits_memory"] == 1
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = make_cache(tmp_path, ttl=0)
+    cache.set("k", "v")
+
+    assert cache.get("k") is None
+
+
+def test_memory_tier_is_bounded(tmp_path):
+    cache = make_cache(tmp_path, memory_size=2)
+    for i in range(3):
+        cache.set(f"k{i}", str(i))
+
+    assert cache.stats()["memory_entries"] == 2
+
+
+def test_disabled_cache_never_hits(tmp_path):
+    cache = make_cache(tmp_path, enabled=False)
+    cache.set("k", "v")
+
+    assert cache.get("k") is None
+
+
+def test_disk_hits_batch_their_access_time_updates(tmp_path):
+    writer = make_cache(tmp_path)
+    writer.set("k", "v")
+    writer.set("k2", "v2")
+    cache = make_cache(tmp_path, touch_batch=2)
+
+    def accessed_at():
+        return cache._get_conn().execute("SELECT accessed_at FROM llm_cache WHERE key = 'k'").fetchone()[0]
+
+    before = accessed_at()
+    assert cache.get("k") == "v"
+    assert accessed_at() == before
+    # The second distinct disk hit flushes both access times
+    assert cache.get("k2") == "v2"
+    assert accessed_at() > before
+
+
+def test_async_access_runs_off_the_event_loop(tmp_path):
+    cache = make_cache(tmp_path)
+    loop_thread = []
+
+    async def run():
+        loop_thread.append(threading.get_ident())
+        await cache.set_async("k", "v")
+        return await cache.get_async("k")
+
+    original = cache.get
+    threads = []
+    cache.get = lambda key: threads.append(threading.get_ident()) or original(key)
+
+    assert asyncio.run(run()) == "v"
+    assert threads and threads[0] != loop_thread[0]
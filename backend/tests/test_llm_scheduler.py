@@ -0,0 +1,113 @@
+import asyncio
+import contextvars
+import threading
+import time
+
+import pytest
+
+from backend.app.llm_clients.scheduler import LLMScheduler, set_llm_lane
+from backend.app.telemetry import LLM_IN_FLIGHT, LLM_QUEUE_DEPTH
+
+
+def in_lane(lane, fn, *args):
+    # Every request runs in its own context, so each gets its own lane and fair-share group
+    def run():
+        set_llm_lane(lane)
+        return fn(*args)
+    return lambda: contextvars.copy_context().run(run)
+
+
+def test_global_and_provider_caps():
+    scheduler = LLMScheduler(max_concurrency=3, provider_limits={"groq": 2})
+    peaks = {"all": 0, "groq": 0}
+    lock = threading.Lock()
+
+    def call(provider):
+        with scheduler.slot(provider):
+            with lock:
+                stats = scheduler.stats()
+                peaks["all"] = max(peaks["all"], stats["in_flight"])
+                peaks["groq"] = max(peaks["groq"], stats["in_flight_by_provider"].get("groq", 0))
+            time.sleep(0.02)
+
+    threads = [threading.Thread(target=call, args=("groq" if i % 2 else "openai",)) for i in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peaks == {"all": 3, "groq": 2}
+    assert scheduler.stats() == {"in_flight": 0, "in_flight_by_provider": {"groq": 0, "openai": 0},
+                                 "waiting": {"interactive": 0, "batch": 0}}
+
+
+def test_interactive_lane_goes_first_and_requests_share_fairly():
+    scheduler = LLMScheduler(max_concurrency=1)
+    order = []
+
+    async def call(name):
+        async with scheduler.slot_async("groq"):
+            order.append(name)
+            await asyncio.sleep(0.001)
+
+    def request(lane, name, calls):
+        set_llm_lane(lane)
+        return asyncio.gather(*(call(name) for _ in range(calls)))
+
+    async def run():
+        # Hold the only slot while the other requests queue up
+        await scheduler.acquire_async("groq")
+        waiting = [
+            asyncio.ensure_future(contextvars.copy_context().run(request, "batch", "batch", 2)),
+            asyncio.ensure_future(contextvars.copy_context().run(request, "interactive", "big", 3)),
+            asyncio.ensure_future(contextvars.copy_context().run(request, "interactive", "small", 1)),
+        ]
+        await asyncio.sleep(0.01)
+        assert scheduler.stats()["waiting"] == {"interactive": 4, "batch": 2}
+        assert LLM_QUEUE_DEPTH.value(provider="groq", lane="batch") >= 2
+        scheduler.release("groq")
+        await asyncio.gather(*waiting)
+
+    asyncio.run(run())
+
+    assert order == ["big", "small", "big", "big", "batch", "batch"]
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    scheduler = LLMScheduler(max_concurrency=1)
+
+    async def run():
+        await scheduler.acquire_async("openai")
+        waiter = asyncio.ensure_future(scheduler.acquire_async("openai"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        scheduler.release("openai")
+        return scheduler.stats()
+
+    stats = asyncio.run(run())
+
+    assert stats["in_flight"] == 0 and stats["waiting"]["batch"] == 0
+    assert LLM_IN_FLIGHT.value(provider="openai") == 0
+
+
+def test_threads_and_event_loop_share_one_cap():
+    scheduler = LLMScheduler(max_concurrency=1)
+    scheduler.acquire("groq")
+    released = []
+
+    def release_later():
+        time.sleep(0.02)
+        released.append(True)
+        scheduler.release("groq")
+
+    async def run():
+        threading.Thread(target=release_later).start()
+        await scheduler.acquire_async("groq")
+        assert released
+        scheduler.release("groq")
+
+    asyncio.run(run())
+    in_lane("interactive", scheduler.acquire, "groq")()
+    assert scheduler.stats()["in_flight"] == 1
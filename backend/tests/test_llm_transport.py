@@ -0,0 +1,134 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from backend.app.llm_clients.transport import (
+    LLMTransport, LLMTransportError, ProviderConfig, TokenBucket, parse_retry_after
+)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Replays the queued (status, headers) responses, then answers 200."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        server = self.server
+        server.requests += 1
+        status, headers = server.script.pop(0) if server.script else (200, {})
+        body = {"choices": [{"message": {"content": "42"}}]} if status == 200 else {"error": "stub"}
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(json.dumps(body).encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.script = []
+    server.requests = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+
+
+def make_transport(server, monkeypatch, **overrides):
+    monkeypatch.setenv("STUB_API_KEY", "test-key")
+    config = ProviderConfig(
+        name="stub",
+        display_name="Stub",
+        base_url=f"http://127.0.0.1:{server.server_address[1]}/v1",
+        api_key_env="STUB_API_KEY",
+        backoff_base=0.01,
+        **overrides,
+    )
+    return LLMTransport(config)
+
+
+PAYLOAD = {"model": "stub-model", "messages": [{"role": "user", "content": "hi"}]}
+
+
+def test_retries_429_honoring_retry_after(stub_server, monkeypatch):
+    stub_server.script = [(429, {"Retry-After": "0"}), (503, {})]
+    transport = make_transport(stub_server, monkeypatch)
+
+    res = transport.post(PAYLOAD)
+
+    assert res["choices"][0]["message"]["content"] == "42"
+    assert stub_server.requests == 3
+
+
+def test_client_errors_are_not_retried(stub_server, monkeypatch):
+    stub_server.script = [(400, {})]
+    transport = make_transport(stub_server, monkeypatch)
+
+    with pytest.raises(LLMTransportError) as excinfo:
+        transport.post(PAYLOAD)
+
+    assert excinfo.value.status_code == 400
+    assert stub_server.requests == 1
+
+
+def test_gives_up_after_max_retries(stub_server, monkeypatch):
+    stub_server.script = [(500, {})] * 5
+    transport = make_transport(stub_server, monkeypatch, max_retries=2)
+
+    with pytest.raises(LLMTransportError) as excinfo:
+        transport.post(PAYLOAD)
+
+    assert excinfo.value.status_code == 500
+    assert stub_server.requests == 3
+
+
+def test_async_post_retries(stub_server, monkeypatch):
+    stub_server.script = [(429, {"Retry-After": "0"})]
+    transport = make_transport(stub_server, monkeypatch)
+
+    async def run():
+        return await asyncio.gather(*(transport.post_async(PAYLOAD) for _ in range(5)))
+
+    results = asyncio.run(run())
+
+    assert all(res["choices"][0]["message"]["content"] == "42" for res in results)
+    assert stub_server.requests == 6
+
+
+def test_token_bucket_reports_wait_when_exhausted():
+    bucket = TokenBucket(rate_per_minute=60, capacity=2)
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(1.0, abs=0.05)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("2.5") == 2.5
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("not a date") is None
+
+
+def test_async_clients_are_per_loop_and_closed(stub_server, monkeypatch):
+    transport = make_transport(stub_server, monkeypatch)
+
+    async def call(close):
+        await transport.post_async(PAYLOAD)
+        client = transport._get_async_client()
+        if close:
+            await transport.aclose()
+        return client
+
+    left_open = asyncio.run(call(close=False))
+    closed = asyncio.run(call(close=True))
+
+    # The client of the ended loop was dropped when the next loop opened its own
+    assert closed is not left_open and closed.is_closed
+    assert transport._async_clients == {}
@@ -0,0 +1,53 @@
+import asyncio
+
+import mongomock
+import pytest
+
+from backend.app.db import mongo_connector
+from backend.app.db.mongo_connector import fetch_articles_bulk, get_full_article_async
+
+
+def make_article(news_id, date):
+    return {
+        "news_id": news_id,
+        "date": date,
+        "news_title": f"title {news_id}",
+        "news_summary": f"summary {news_id}",
+        "news_content": f"content {news_id}",
+    }
+
+
+@pytest.fixture
+def db():
+    db = mongomock.MongoClient()["news_db"]
+    db["2023"].insert_many([make_article(1, "2023-12-30"), make_article(2, "2023-12-31")])
+    db["2024"].insert_many([make_article(3, "2024-05-01"), make_article(4, "2024-05-02")])
+    mongo_connector.set_database(db)
+    yield db
+    mongo_connector.set_database(None)
+
+
+def test_bulk_fetch_preserves_retrieval_order_across_years(db):
+    articles, missing = fetch_articles_bulk(
+        ["4", "1", "3", "2"], ["2024-05-02", "2023-12-30", "2024-05-01", "2023-12-31"]
+    )
+
+    assert list(articles) == [4, 1, 3, 2]
+    assert articles[1]["news_title"] == "title 1"
+    assert "_id" not in articles[1]
+    assert missing == []
+
+
+def test_bulk_fetch_reports_missing_ids_and_skips_duplicates(db):
+    articles, missing = fetch_articles_bulk(
+        ["3", "99", "3", "1"], ["2024-05-01", "2024-06-01", "2024-05-01", "2023-12-30"]
+    )
+
+    assert list(articles) == [3, 1]
+    assert missing == [99]
+
+
+def test_async_fetch_falls_back_to_threaded_bulk_fetch(db):
+    articles = asyncio.run(get_full_article_async(["2", "4"], ["2023-12-31", "2024-05-02"]))
+
+    assert list(articles) == [2, 4]
@@ -0,0 +1,149 @@
+import asyncio
+
+import pytest
+
+from backend.scripts.offline_stack import HashingEmbeddings, drive_queries, percentile, summarize_run
+
+
+@pytest.fixture
+def stack():
+    pytest.importorskip("chromadb")
+    pytest.importorskip("mongomock")
+    from backend.scripts.offline_stack import install_offline_stack
+
+    stack = install_offline_stack()
+    yield stack
+    stack.close()
+
+
+def run(stack, mode, queries):
+    from backend.app.main import app
+
+    stack.reset()
+    latencies, errors, wall = asyncio.run(drive_queries(app, queries, mode, concurrency=4, top_k=3))
+    return summarize_run(latencies, errors, wall, stack.llm_calls())
+
+
+@pytest.mark.parametrize("mode", ["sync", "thread"])
+def test_query_pipeline_runs_offline(stack, mode):
+    queries = [f"{article['news_title']} #{i}" for i, article in enumerate(stack.articles[:4])]
+
+    summary = run(stack, mode, queries)
+
+    assert summary["requests"] == 4
+    assert summary["error_rate"] == 0
+    assert summary["openai_calls_per_query"] == 1
+    # One scoring call per retrieved article, plus a summary for each that passes
+    assert 3 <= summary["groq_calls_per_query"] <= 6
+
+
+def test_injected_llm_errors_fail_requests(stack):
+    for transport in stack.transports.values():
+        transport.error_rate = 1.0
+
+    summary = run(stack, "thread", ["馬斯克訪華"])
+
+    assert summary["error_rate"] == 1.0
+
+
+def test_hashing_embedding_prefers_shared_characters():
+    embedding = HashingEmbeddings(dim=64)
+    query, near, far = embedding.embed_documents(["馬斯克訪華", "馬斯克訪問中國", "巴勒斯坦和解"])
+
+    def dot(a, b):
+        return sum(x * y for x, y in zip(a, b))
+
+    assert dot(query, near) > dot(query, far)
+    assert dot(query, query) == pytest.approx(1.0)
+
+
+def test_percentile_interpolates():
+    assert percentile([1, 2, 3, 4], 50) == 2.5
+    assert percentile([5], 99) == 5
+    assert percentile([], 95) == 0
+
+
+def test_adaptive_mode_reports_samples_used(stack):
+    from fastapi.testclient import TestClient
+    from backend.app.main import app
+
+    stack.reset()
+    body = TestClient(app).post("/api/query?mode=adaptive", json={"query": stack.articles[0]["news_title"],
+                                                                  "top_k": 3}).json()
+
+    assert body["samples_used"] and all(1 <= used <= 5 for used in body["samples_used"].values())
+    for reference in body["references"]:
+        assert reference["samples_used"] == body["samples_used"][str(reference["id"])]
+
+
+def test_query_defaults_to_the_thread_mode(stack):
+    from fastapi.testclient import TestClient
+    from backend.app.main import app
+    from backend.app.telemetry import REQUESTS
+
+    stack.reset()
+    before = REQUESTS.value(endpoint="query", mode="thread", outcome="ok")
+    body = TestClient(app).post("/api/query", json={"query": stack.articles[1]["news_title"], "top_k": 3}).json()
+
+    assert body["references"]
+    assert REQUESTS.value(endpoint="query", mode="thread", outcome="ok") == before + 1
+
+
+def test_async_mode_answers_with_scores_from_the_providers(stack):
+    import zlib
+    from fastapi.testclient import TestClient
+    from backend.app.main import app
+    from backend.app.services.CoT_service import build_score_prompt
+
+    stack.reset()
+    query = stack.articles[0]["news_title"]
+    body = TestClient(app).post("/api/query?mode=async", json={"query": query, "top_k": 5}).json()
+
+    # An error anywhere in the pipeline would be answered with the failure placeholder and no references
+    assert not body["generated_article"].startswith("❌") and body["references"]
+    articles = {int(article["news_id"]): article for article in stack.articles}
+    for reference in body["references"]:
+        # The fake provider scores crc32(prompt) % 101, plus at most 5 of noise
+        expected = zlib.crc32(build_score_prompt(query, articles[reference["id"]]).encode()) % 101
+        assert reference["score"] >= 20 and abs(reference["score"] - expected) <= 5
+        assert reference["generated_summary"].startswith("模擬回應")
+    assert stack.transports["openai"].calls == 1
+
+
+def read_events(stack, query):
+    import json
+    from fastapi.testclient import TestClient
+    from backend.app.main import app
+
+    stack.reset()
+    text = TestClient(app).post("/api/query/stream", json={"query": query, "top_k": 3}).text
+    events = []
+    for block in text.strip().split("\n\n"):
+        event, data = block.split("\n", 1)
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def test_stream_sends_retrieval_references_tokens_then_done(stack):
+    events = read_events(stack, stack.articles[0]["news_title"])
+    names = [name for name, _ in events]
+
+    assert names[0] == "retrieval" and names[-1] == "done"
+    # Every reference arrives before the first token, and nothing follows done
+    first_token = names.index("token")
+    assert set(names[1:first_token]) == {"reference"} and set(names[first_token:-1]) == {"token"}
+    retrieval, done = events[0][1], events[-1][1]
+    assert len(retrieval["articles"]) == 3
+    assert done["generated_article"] == "".join(data["text"] for name, data in events if name == "token")
+    assert sorted(ref["id"] for ref in done["references"]) == sorted(data["id"] for name, data in events
+                                                                      if name == "reference")
+
+
+def test_stream_reports_failures_as_an_error_event(stack):
+    for transport in stack.transports.values():
+        transport.error_rate = 1.0
+
+    events = read_events(stack, "馬斯克訪華")
+
+    assert [name for name, _ in events] == ["retrieval", "error"]
+    assert events[-1][1]["generated_article"] == "❌ Generation failed"
@@ -0,0 +1,182 @@
+from datetime import date
+
+import pytest
+
+from backend.app.db.partitions import partition_name, plan_partition_search
+from backend.app.db.chroma_connector import NewsRetriever
+from backend.app.services.ingestion_service import ChunkedArticle, NewsCollections, write_article_batch
+
+PARTITIONS = ["news_2024_03", "news_2024_04", "news_2024_05", "news_collection"]
+
+
+def test_partition_name_from_date():
+    assert partition_name("2024-05-01") == "news_2024_05"
+    assert partition_name("not a date") is None
+
+
+def test_plan_prunes_months_outside_the_range_and_filters_partial_months():
+    plan = dict(plan_partition_search(PARTITIONS, date(2024, 4, 1), date(2024, 5, 2)))
+
+    assert list(plan) == ["news_2024_05", "news_2024_04"]
+    assert plan["news_2024_04"] is None
+    assert plan["news_2024_05"] == {"date": {"$in": ["2024-05-01", "2024-05-02"]}}
+
+
+def test_plan_without_range_searches_every_partition():
+    assert [name for name, _ in plan_partition_search(PARTITIONS)] == ["news_2024_05", "news_2024_04", "news_2024_03"]
+
+
+class FakeEmbedding:
+    """Two-dimensional embedding: texts mentioning 'rain' point one way, others the other."""
+
+    def _embed(self, text):
+        return [1.0, 0.0] if "rain" in text else [0.0, 1.0]
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def article(news_id, day, text):
+    metadata = {"news_id": str(news_id), "date": day, "news_title": text, "chunk_id": 0}
+    return ChunkedArticle(0, str(news_id), "hash", [(text, metadata)], False, day)
+
+
+@pytest.fixture
+def retriever(tmp_path):
+    chromadb = pytest.importorskip("chromadb")
+    pytest.importorskip("langchain_chroma")
+    client = chromadb.PersistentClient(path=str(tmp_path))
+    articles = [
+        article(1, "2024-03-10", "rain in march"),
+        article(2, "2024-04-10", "rain in april"),
+        article(3, "2024-05-01", "rain in may"),
+        article(4, "2024-05-20", "rain late may"),
+        article(5, "2024-05-02", "sunny may"),
+    ]
+    embedding = FakeEmbedding()
+    vectors = embedding.embed_documents([text for a in articles for text, _ in a.chunks])
+    write_article_batch(NewsCollections(client, "month"), articles, vectors)
+
+    retriever = NewsRetriever(str(tmp_path))
+    retriever.client, retriever.embedding, retriever.ready = client, embedding, True
+    return retriever
+
+
+def test_date_range_search_only_returns_chunks_in_range(retriever):
+    hits = retriever.similarity_search_with_relevance_scores(
+        "rain", k=5, start_date=date(2024, 4, 1), end_date=date(2024, 5, 10)
+    )
+
+    assert retriever.partitions() == ["news_2024_03", "news_2024_04", "news_2024_05"]
+    assert sorted(doc.metadata["news_id"] for doc, _ in hits) == ["2", "3", "5"]
+    assert [doc.metadata["news_id"] for doc, _ in hits][-1] == "5"
+
+
+def test_search_without_range_merges_all_partitions(retriever):
+    hits = retriever.similarity_search_with_relevance_scores("rain", k=4)
+
+    assert sorted(doc.metadata["news_id"] for doc, _ in hits) == ["1", "2", "3", "4"]
+    assert hits[0][1] >= hits[-1][1]
+
+
+def test_undated_articles_stay_searchable_next_to_partitions(tmp_path):
+    chromadb = pytest.importorskip("chromadb")
+    pytest.importorskip("langchain_chroma")
+    client = chromadb.PersistentClient(path=str(tmp_path))
+    articles = [article(1, "2024-05-01", "rain in may"), article(2, "", "rain some day")]
+    embedding = FakeEmbedding()
+    vectors = embedding.embed_documents([text for a in articles for text, _ in a.chunks])
+    write_article_batch(NewsCollections(client, "month"), articles, vectors)
+
+    retriever = NewsRetriever(str(tmp_path))
+    retriever.client, retriever.embedding, retriever.ready = client, embedding, True
+    hits = retriever.similarity_search_with_relevance_scores("rain", k=5)
+
+    assert retriever.partitions() == ["news_2024_05"]
+    assert sorted(doc.metadata["news_id"] for doc, _ in hits) == ["1", "2"]
+    assert retriever.status()["documents"] == 2
+    # A date range cannot match an undated article
+    dated = retriever.similarity_search_with_relevance_scores("rain", k=5, start_date=date(2024, 5, 1))
+    assert [doc.metadata["news_id"] for doc, _ in dated] == ["1"]
+
+
+def test_collections_of_another_embedding_are_refused(tmp_path):
+    chromadb = pytest.importorskip("chromadb")
+    pytest.importorskip("langchain_chroma")
+    client = chromadb.PersistentClient(path=str(tmp_path))
+    small = {"embedding_model": "e5-small", "embedding_backend": "sentence_transformers", "embedding_prefix": "e5"}
+    large = dict(small, embedding_model="e5-large")
+    articles = [article(1, "2024-05-01", "rain in may")]
+    write_article_batch(NewsCollections(client, "month", embedding_id=small), articles, [[1.0, 0.0]])
+
+    assert client.get_collection("news_2024_05").metadata["embedding_model"] == "e5-small"
+    # Writing vectors of another model into the same collection is refused
+    with pytest.raises(ValueError, match="another embedding"):
+        NewsCollections(client, "month", embedding_id=large).get("news_2024_05")
+
+    embedding = FakeEmbedding()
+    embedding.identity = large
+    retriever = NewsRetriever(str(tmp_path))
+    retriever.client, retriever.embedding, retriever.ready = client, embedding, True
+    with pytest.raises(ValueError, match="news_2024_05"):
+        retriever.similarity_search_with_relevance_scores("rain", k=5)
+
+
+def test_another_backend_of_the_same_model_is_accepted(tmp_path):
+    chromadb = pytest.importorskip("chromadb")
+    pytest.importorskip("langchain_chroma")
+    client = chromadb.PersistentClient(path=str(tmp_path))
+    torch = {"embedding_model": "e5-large", "embedding_backend": "torch", "embedding_prefix": "e5"}
+    onnx = dict(torch, embedding_backend="onnx-int8")
+    write_article_batch(NewsCollections(client, "month", embedding_id=torch),
+                        [article(1, "2024-05-01", "rain in may")], [[1.0, 0.0]])
+
+    NewsCollections(client, "month", embedding_id=onnx).get("news_2024_05")
+    embedding = FakeEmbedding()
+    embedding.identity = onnx
+    retriever = NewsRetriever(str(tmp_path))
+    retriever.client, retriever.embedding, retriever.ready = client, embedding, True
+    hits = retriever.similarity_search_with_relevance_scores("rain", k=5)
+
+    assert [doc.metadata["news_id"] for doc, _ in hits] == ["1"]
+
+
+class Vectors:
+    """Embedding looked up from a table, so tests control every similarity."""
+
+    def __init__(self, table):
+        self.table = table
+
+    def embed_documents(self, texts):
+        return [self.table[text] for text in texts]
+
+    def embed_query(self, text):
+        return self.table[text]
+
+
+def test_unpartitioned_date_range_finds_k_articles_behind_closer_ones(tmp_path):
+    chromadb = pytest.importorskip("chromadb")
+    pytest.importorskip("langchain_chroma")
+    from langchain_chroma import Chroma
+
+    client = chromadb.PersistentClient(path=str(tmp_path))
+    # Twelve March articles match the query exactly, the two May ones only loosely
+    articles = [article(i, "2024-03-10", f"march {i}") for i in range(12)]
+    articles += [article(100, "2024-05-02", "may a"), article(101, "2024-05-20", "may b")]
+    embedding = Vectors({**{f"march {i}": [1.0, 0.0] for i in range(12)},
+                         "may a": [0.8, 0.6], "may b": [0.6, 0.8], "rain": [1.0, 0.0]})
+    vectors = embedding.embed_documents([text for a in articles for text, _ in a.chunks])
+    write_article_batch(NewsCollections(client, "none"), articles, vectors)
+
+    retriever = NewsRetriever(str(tmp_path))
+    retriever.client, retriever.embedding, retriever.ready = client, embedding, True
+    retriever.db = Chroma(client=client, embedding_function=embedding, collection_name="news_collection")
+
+    assert retriever.partitions() == []
+    for start, end in ((date(2024, 5, 1), None), (date(2024, 5, 1), date(2024, 5, 31)), (None, date(2024, 3, 1))):
+        hits = retriever.similarity_search_with_relevance_scores("rain", k=2, start_date=start, end_date=end)
+        expected = ["100", "101"] if start else []
+        assert [doc.metadata["news_id"] for doc, _ in hits] == expected
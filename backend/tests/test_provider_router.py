@@ -0,0 +1,183 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.app.llm_clients.cache import LLMCache, set_llm_cache
+from backend.app.llm_clients.provider_router import (
+    TASK_SETTINGS, LLMBackend, LLMTarget, ProviderRouter, TaskSettings, parse_route
+)
+
+PRIMARY = LLMTarget("primary", "big")
+BACKUP = LLMTarget("backup", "small")
+
+
+class StubProvider:
+    """Local provider answering '<name>:<prompt>' after `delay` seconds, or failing."""
+
+    def __init__(self, name, delay=0.0, fail=False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = 0
+        self.settings = []
+
+    def call(self, prompt, model_name=None, timeout=None, use_cache=True, **settings):
+        self.calls += 1
+        self.settings.append((use_cache, settings))
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.name} down")
+        return f"{self.name}:{prompt}"
+
+    async def call_async(self, prompt, model_name=None, timeout=None, use_cache=True, **settings):
+        self.calls += 1
+        self.settings.append((use_cache, settings))
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise RuntimeError(f"{self.name} down")
+        return f"{self.name}:{prompt}"
+
+    async def stream_async(self, prompt, model_name=None, timeout=None, use_cache=True, **settings):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError(f"{self.name} down")
+        for piece in (self.name, ":", prompt):
+            yield piece
+
+    def backend(self, cached=False):
+        cache_key = (lambda prompt, model, temperature: f"{self.name}|{model}|{temperature}|{prompt}") if cached else None
+        return LLMBackend(self.call, self.call_async, self.stream_async, cache_key=cache_key)
+
+
+def make_router(primary, backup, **kwargs):
+    return ProviderRouter({"scoring": [PRIMARY, BACKUP]},
+                          backends={"primary": primary.backend(), "backup": backup.backend()}, **kwargs)
+
+
+def test_parse_route():
+    assert parse_route("groq:llama-3.3-70b-versatile, openai:gpt-4o-mini") == [
+        LLMTarget("groq", "llama-3.3-70b-versatile"), LLMTarget("openai", "gpt-4o-mini")
+    ]
+    with pytest.raises(ValueError):
+        ProviderRouter({"scoring": [LLMTarget("nope", "m")]}, backends={})
+
+
+def test_fallback_and_health_tracking():
+    primary, backup = StubProvider("primary", fail=True), StubProvider("backup")
+    router = make_router(primary, backup, failure_threshold=2, cooldown=60)
+
+    assert router.call("scoring", "q") == "backup:q"
+    assert asyncio.run(router.call_async("scoring", "q")) == "backup:q"
+    # Two failures in a row: the primary is now tried last
+    assert router.targets("scoring") == [BACKUP, PRIMARY]
+    assert router.call("scoring", "q") == "backup:q"
+    assert primary.calls == 2
+    assert router.stats()["primary/big"]["healthy"] is False
+
+    backup.fail = True
+    with pytest.raises(RuntimeError, match="down"):
+        router.call("scoring", "q")
+
+
+def test_slow_primary_is_hedged_and_loser_cancelled():
+    primary, backup = StubProvider("primary", delay=0.5), StubProvider("backup", delay=0.01)
+    router = make_router(primary, backup, hedge_min_samples=5)
+    for _ in range(5):
+        router.health(PRIMARY).record_success("scoring", 0.02)
+
+    started = time.perf_counter()
+    reply = asyncio.run(router.call_async("scoring", "q"))
+
+    assert reply == "backup:q"
+    assert time.perf_counter() - started < 0.3
+    assert primary.cancelled == 1
+
+
+def test_no_hedge_without_latency_history():
+    primary, backup = StubProvider("primary", delay=0.05), StubProvider("backup")
+    router = make_router(primary, backup, hedge_min_samples=5)
+
+    assert asyncio.run(router.call_async("scoring", "q")) == "primary:q"
+    assert backup.calls == 0
+    assert router.health(PRIMARY).p95("scoring", min_samples=1) >= 0.05
+
+
+def test_stream_falls_back_before_first_delta():
+    primary, backup = StubProvider("primary", fail=True), StubProvider("backup")
+    router = make_router(primary, backup)
+
+    async def collect():
+        return "".join([delta async for delta in router.stream_async("scoring", "q")])
+
+    assert asyncio.run(collect()) == "backup:q"
+
+
+def test_cache_is_read_once_and_fallback_keeps_task_settings(tmp_path):
+    cache = LLMCache(path=str(tmp_path / "llm_cache.sqlite3"))
+    set_llm_cache(cache)
+    try:
+        primary, backup = StubProvider("primary", fail=True), StubProvider("backup")
+        router = ProviderRouter({"scoring": [PRIMARY, BACKUP]},
+                                backends={"primary": primary.backend(cached=True), "backup": backup.backend(cached=True)},
+                                settings={"scoring": TaskSettings(temperature=0.0, max_tokens=8)}, failure_threshold=1)
+
+        assert router.call("scoring", "q") == "backup:q"
+        assert asyncio.run(router.call_async("scoring", "q")) == "backup:q"
+    finally:
+        set_llm_cache(None)
+
+    # The fallback gets the scoring settings, and backends never touch the cache themselves
+    assert backup.settings == [(False, {"temperature": 0.0, "max_tokens": 8})]
+    assert primary.settings == [(False, {"temperature": 0.0, "max_tokens": 8})]
+    # One lookup per target tried on the miss; the unhealthy primary is then tried after the cached backup
+    assert cache.stats()["misses"] == 2 and cache.stats()["hits_memory"] == 1
+
+
+def test_only_cache_tasks_use_the_cache(tmp_path):
+    cache = LLMCache(path=str(tmp_path / "llm_cache.sqlite3"))
+    set_llm_cache(cache)
+    try:
+        provider = StubProvider("primary")
+        router = ProviderRouter({"scoring": [PRIMARY], "generation": [PRIMARY]},
+                                backends={"primary": provider.backend(cached=True)}, cache_tasks=["scoring"])
+        for _ in range(2):
+            router.call("scoring", "q")
+            asyncio.run(router.call_async("generation", "q"))
+    finally:
+        set_llm_cache(None)
+
+    # Scoring was answered from the cache the second time, generation never was
+    assert provider.calls == 3
+
+
+def test_slow_fallback_is_not_hedged_back_to_the_failed_primary():
+    primary, backup = StubProvider("primary", fail=True), StubProvider("backup", delay=0.1)
+    router = make_router(primary, backup, hedge_min_samples=5)
+    for _ in range(5):
+        router.health(BACKUP).record_success("scoring", 0.01)
+
+    assert asyncio.run(router.call_async("scoring", "q")) == "backup:q"
+    assert primary.calls == 1 and backup.calls == 1
+
+
+def test_unhealthy_next_target_is_not_used_for_hedging():
+    primary, backup = StubProvider("primary", delay=0.1), StubProvider("backup")
+    router = make_router(primary, backup, hedge_min_samples=5, failure_threshold=1)
+    for _ in range(5):
+        router.health(PRIMARY).record_success("scoring", 0.01)
+    router.health(BACKUP).record_failure()
+
+    assert asyncio.run(router.call_async("scoring", "q")) == "primary:q"
+    assert backup.calls == 0
+
+
+def test_scoring_and_summaries_are_not_length_capped():
+    # A capped reasoning reply could end before its final score line
+    assert TASK_SETTINGS["scoring"].kwargs() == {"temperature": 1.0}
+    assert TASK_SETTINGS["summary"].kwargs() == {"temperature": 1.0}
@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app.db import chroma_connector
+from backend.app.db.chroma_connector import NewsRetriever, set_retriever
+from backend.scripts.offline_stack import HashingEmbeddings
+
+
+@pytest.fixture
+def loading(monkeypatch, tmp_path):
+    """A fresh retriever whose embedding model loads only once `release` is set."""
+    pytest.importorskip("chromadb")
+    pytest.importorskip("langchain_chroma")
+    release = threading.Event()
+
+    def initialize_embedding():
+        assert release.wait(5)
+        return HashingEmbeddings(dim=32)
+
+    monkeypatch.setattr(chroma_connector, "initialize_embedding", initialize_embedding)
+    monkeypatch.setenv("JOBS_CONCURRENCY", "0")
+    set_retriever(NewsRetriever(str(tmp_path / "chroma")))
+    yield release
+    release.set()
+    set_retriever(None)
+
+
+def wait_ready(client):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        res = client.get("/ready")
+        if res.status_code == 200:
+            return res
+        time.sleep(0.01)
+    return res
+
+
+def test_ready_is_503_until_the_lifespan_warm_up_finishes(loading):
+    from backend.app.main import app
+
+    with TestClient(app) as client:
+        # The server accepts requests while the model is still loading in the background
+        res = client.get("/ready")
+        assert res.status_code == 503 and res.json()["ready"] is False
+
+        loading.set()
+        res = wait_ready(client)
+
+    assert res.status_code == 200
+    body = res.json()
+    assert body["documents"] == 0 and body["partitions"] == 0 and body["error"] is None
+    assert {"model_load_seconds", "collection_open_seconds", "warmup_seconds"} <= set(body["timings"])
+
+
+def test_failed_warm_up_keeps_the_server_unready(loading, monkeypatch):
+    from backend.app.main import app
+
+    def broken():
+        raise OSError("model files missing")
+
+    monkeypatch.setattr(chroma_connector, "initialize_embedding", broken)
+    with TestClient(app) as client:
+        deadline = time.monotonic() + 5
+        while not client.get("/ready").json()["error"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        res = client.get("/ready")
+
+    assert res.status_code == 503
+    assert "model files missing" in res.json()["error"]
@@ -0,0 +1,117 @@
+import numpy as np
+from fastapi.testclient import TestClient
+
+from backend.app.api import news_router
+from backend.app.main import app
+from backend.app.services.embedding_backends import CachedQueryEmbeddings
+from backend.app.services.response_cache import SemanticResponseCache, set_response_cache
+
+RESPONSE = {"query": "q", "generated_article": "article", "references": []}
+
+
+def test_hit_requires_similarity_above_threshold_and_same_namespace():
+    cache = SemanticResponseCache(threshold=0.9)
+    cache.store([1.0, 0.0], ("top5",), RESPONSE)
+
+    assert cache.lookup([0.99, 0.05], ("top5",))[0] == RESPONSE
+    assert cache.lookup([0.99, 0.05], ("top10",)) is None
+    assert cache.lookup([0.5, 0.5], ("top5",)) is None
+
+
+def test_entries_expire_after_ttl():
+    cache = SemanticResponseCache(ttl=0)
+    cache.store([1.0, 0.0], "ns", RESPONSE)
+
+    assert cache.lookup([1.0, 0.0], "ns") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_memory_budget_evicts_least_recently_used():
+    cache = SemanticResponseCache(threshold=0.99)
+    cache.store([1.0, 0.0, 0.0], "ns", RESPONSE)
+    entry_size = cache.size_bytes
+    cache.max_bytes = 2 * entry_size
+    cache.store([0.0, 1.0, 0.0], "ns", RESPONSE)
+    cache.lookup([1.0, 0.0, 0.0], "ns")
+
+    cache.store([0.0, 0.0, 1.0], "ns", RESPONSE)
+
+    assert cache.lookup([1.0, 0.0, 0.0], "ns") is not None
+    assert cache.lookup([0.0, 1.0, 0.0], "ns") is None
+    assert cache.size_bytes <= cache.max_bytes
+
+
+def at_similarity(vector, similarity, seed=0):
+    """A unit vector with the given cosine similarity to `vector`."""
+    other = np.random.default_rng(seed).normal(size=len(vector))
+    other -= (other @ vector) * vector
+    other /= np.linalg.norm(other)
+    return list(similarity * vector + np.sqrt(1 - similarity ** 2) * other)
+
+
+def test_close_but_different_queries_do_not_match_by_default():
+    # Different questions on one topic (馬斯克訪華 / 馬斯克訪美) can be this close under E5
+    query = np.random.default_rng(1).normal(size=1024)
+    query /= np.linalg.norm(query)
+    cache = SemanticResponseCache()
+    cache.store(list(query), "ns", RESPONSE)
+
+    assert cache.lookup(at_similarity(query, 0.96), "ns") is None
+    response, similarity = cache.lookup(at_similarity(query, 0.99), "ns")
+    assert response == RESPONSE and similarity >= 0.98
+
+
+def test_entry_count_is_bounded():
+    cache = SemanticResponseCache(threshold=0.99, max_entries=2)
+    for vector in ([1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]):
+        cache.store(vector, "ns", RESPONSE)
+
+    assert cache.stats()["entries"] == 2
+    assert cache.lookup([1.0, 0.0, 0.0], "ns") is None
+    assert cache.lookup([0.0, 0.0, 1.0], "ns") is not None
+
+
+def test_query_embeddings_are_cached():
+    class Counting:
+        calls = 0
+
+        def embed_query(self, text):
+            Counting.calls += 1
+            return [float(len(text))]
+
+    embedding = CachedQueryEmbeddings(Counting(), size=1)
+    embedding.embed_query("a")
+    embedding.embed_query("a")
+    embedding.embed_query("bb")
+    embedding.embed_query("a")
+
+    assert Counting.calls == 3
+    assert embedding.hits == 1
+
+
+def test_query_endpoint_reports_cache_status(monkeypatch):
+    class FakeRetriever:
+        def embed_query(self, query):
+            return [1.0, 0.0] if "馬斯克" in query else [0.0, 1.0]
+
+    calls = []
+
+    async def fake_answer(request, mode, batch_size, retrieval):
+        calls.append(request.query)
+        return {**RESPONSE, "query": request.query}
+
+    monkeypatch.setattr(news_router, "get_retriever", lambda: FakeRetriever())
+    monkeypatch.setattr(news_router, "answer_query", fake_answer)
+    set_response_cache(SemanticResponseCache(threshold=0.95))
+    client = TestClient(app)
+
+    first = client.post("/api/query", json={"query": "馬斯克訪華"})
+    second = client.post("/api/query", json={"query": "馬斯克 訪華"})
+    other_k = client.post("/api/query", json={"query": "馬斯克訪華", "top_k": 3})
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json()["query"] == "馬斯克 訪華"
+    assert other_k.headers["X-Cache"] == "MISS"
+    assert calls == ["馬斯克訪華", "馬斯克訪華"]
+    set_response_cache(None)
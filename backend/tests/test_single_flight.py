@@ -0,0 +1,139 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app.api import news_router
+from backend.app.main import app
+from backend.app.services import CoT_service
+from backend.app.services.response_cache import SemanticResponseCache, set_response_cache
+from backend.app.services.single_flight import AsyncSingleFlight, SingleFlight, normalize_query
+
+
+def test_normalize_query():
+    assert normalize_query("  Musk　 訪華 ") == normalize_query("musk 訪華")
+    assert normalize_query("ＡＢＣ") == "abc"
+
+
+def test_threaded_calls_with_same_key_run_once():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(1)
+        return 42
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", compute))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(results) == [(42, False)] + [(42, True)] * 4
+    assert flight.do("k", lambda: 7) == (7, False)
+
+
+def test_async_errors_reach_every_waiter():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def run():
+        return await asyncio.gather(*(flight.do("k", failing) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_async_cancelled_follower_does_not_cancel_leader():
+    flight = AsyncSingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def run():
+        leader = asyncio.ensure_future(flight.do("k", slow))
+        follower = asyncio.ensure_future(flight.do("k", slow))
+        await asyncio.sleep(0)
+        follower.cancel()
+        return await leader
+
+    assert asyncio.run(run()) == ("done", False)
+
+
+def test_concurrent_async_scorings_share_llm_calls(monkeypatch):
+    prompts = []
+
+    async def fake_llm(task, prompt, use_cache=True):
+        prompts.append(prompt)
+        await asyncio.sleep(0.01)
+        return "80"
+
+    async def fake_summary(article, score):
+        return "summary"
+
+    monkeypatch.setattr(CoT_service, "call_llm_async", fake_llm)
+    monkeypatch.setattr(CoT_service, "get_graded_summary_async", fake_summary)
+    articles = {1: {"news_title": "t", "news_summary": "s", "news_content": "c", "date": "2024-05-01"}}
+
+    async def run():
+        return await asyncio.gather(
+            CoT_service.score_articles_async(articles, "Musk visit", n=3),
+            CoT_service.score_articles_async(articles, "musk  visit", n=3),
+        )
+
+    first, second = asyncio.run(run())
+
+    assert len(prompts) == 3
+    assert first[0]["score"] == second[0]["score"] == 80
+
+
+@pytest.fixture
+def no_response_cache():
+    """Disable the semantic response cache, so identical requests reach the single flight."""
+    set_response_cache(SemanticResponseCache(enabled=False))
+    yield
+    set_response_cache(None)
+
+
+def test_query_endpoint_coalesces_identical_requests(monkeypatch, no_response_cache):
+    calls = []
+
+    async def fake_answer(request, mode, batch_size, retrieval):
+        calls.append(request.query)
+        await asyncio.sleep(0.05)
+        return {"query": request.query, "generated_article": "article", "references": []}
+
+    monkeypatch.setattr(news_router, "answer_query", fake_answer)
+    client = TestClient(app)
+
+    responses = [news_router.Response(), news_router.Response()]
+
+    async def run():
+        return await asyncio.gather(
+            news_router.query_news(news_router.NewsQuery(query="馬斯克訪華"), responses[0]),
+            news_router.query_news(news_router.NewsQuery(query="馬斯克訪華 "), responses[1]),
+        )
+
+    results = asyncio.run(run())
+
+    assert calls == ["馬斯克訪華"]
+    assert [result["query"] for result in results] == ["馬斯克訪華", "馬斯克訪華 "]
+    assert responses[1].headers["X-Coalesced"] == "1"
+    assert client.post("/api/query", json={"query": "馬斯克訪華"}).headers.get("X-Coalesced") is None
+    assert len(calls) == 2
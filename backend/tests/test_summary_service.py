@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from backend.app.db.summary_store import GradedSummaryStore, set_summary_store
+from backend.app.services import summary_service
+from backend.app.services.summary_service import (
+    article_content_hash, get_graded_summary, get_graded_summary_async, precompute_graded_summaries, summary_bucket
+)
+
+ARTICLE = {"news_id": 7, "news_title": "title", "news_content": "content"}
+
+
+class UnreachableCollection:
+    """Collection whose every call fails, like Mongo after the server-selection timeout."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def _fail(self, *args, **kwargs):
+        self.calls += 1
+        raise ConnectionError("server selection timeout")
+
+    create_index = find_one = find = update_one = _fail
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    prompts = []
+
+    def call_llm(task, prompt, use_cache=True):
+        prompts.append(prompt)
+        return f"summary {len(prompts)}"
+
+    async def call_llm_async(task, prompt, use_cache=True):
+        return call_llm(task, prompt, use_cache)
+
+    monkeypatch.setattr(summary_service, "call_llm", call_llm)
+    monkeypatch.setattr(summary_service, "call_llm_async", call_llm_async)
+    return prompts
+
+
+@pytest.fixture
+def unreachable_store(monkeypatch):
+    collection = UnreachableCollection()
+    monkeypatch.setattr(summary_service, "_store_down_until", 0.0)
+    set_summary_store(GradedSummaryStore(collection))
+    yield collection
+    set_summary_store(None)
+
+
+def test_scores_outside_the_buckets_get_the_nearest_one():
+    assert summary_bucket(5) == 20
+    assert summary_bucket(25) == 20
+    assert summary_bucket(100) == 70
+    assert summary_bucket(150) == 70
+
+
+def test_stored_summary_is_reused():
+    mongomock = pytest.importorskip("mongomock")
+    store = GradedSummaryStore(mongomock.MongoClient()["news_db"]["graded_summaries"])
+    store.put(7, 70, "stored", article_content_hash(ARTICLE))
+
+    assert get_graded_summary(ARTICLE, 85, store=store) == "stored"
+
+
+def test_summary_of_an_edited_article_is_regenerated(fake_llm):
+    mongomock = pytest.importorskip("mongomock")
+    store = GradedSummaryStore(mongomock.MongoClient()["news_db"]["graded_summaries"])
+    store.put(7, 70, "stale", article_content_hash(ARTICLE))
+    edited = dict(ARTICLE, news_content="corrected content")
+
+    assert get_graded_summary(edited, 85, store=store) == "summary 1"
+    assert get_graded_summary(edited, 85, store=store) == "summary 1"
+    assert "corrected content" in fake_llm[0] and len(fake_llm) == 1
+
+    # The precompute job regenerates the other buckets too, but not the one just replaced
+    assert precompute_graded_summaries([edited], store=store) == 3
+
+
+def test_unreachable_store_falls_back_and_is_skipped_afterwards(fake_llm, unreachable_store):
+    # Building the store does not touch the server
+    assert unreachable_store.calls == 0
+
+    assert get_graded_summary(ARTICLE, 85) == "summary 1"
+    calls = unreachable_store.calls
+    assert asyncio.run(get_graded_summary_async(ARTICLE, 40)) == "summary 2"
+
+    # The first lookup failed, so later requests no longer wait on the store
+    assert calls == 1 and unreachable_store.calls == 1
+    assert len(fake_llm) == 2
@@ -0,0 +1,113 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app.telemetry import (
+    LLM_CALL_SECONDS, Counter, Histogram, MetricsRegistry, bind_context, current_trace, llm_call, span, start_trace
+)
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    calls = registry.register(Counter("demo_calls_total", "Calls.", ["provider"]))
+    latency = registry.register(Histogram("demo_seconds", "Latency.", ["provider"], buckets=(0.1, 1)))
+    calls.inc(provider="groq")
+    calls.inc(2, provider="groq")
+    latency.observe(0.5, provider="groq")
+
+    text = registry.render()
+
+    assert "# TYPE demo_calls_total counter" in text
+    assert 'demo_calls_total{provider="groq"} 3' in text
+    assert 'demo_seconds_bucket{provider="groq",le="0.1"} 0' in text
+    assert 'demo_seconds_bucket{provider="groq",le="1"} 1' in text
+    assert 'demo_seconds_bucket{provider="groq",le="+Inf"} 1' in text
+    assert 'demo_seconds_count{provider="groq"} 1' in text
+
+
+def test_spans_and_llm_calls_from_worker_threads_reach_the_trace():
+    def work():
+        with span("scoring"):
+            with llm_call("groq", "m") as call:
+                call.record_usage({"usage": {"prompt_tokens": 10, "completion_tokens": 2}})
+
+    def run_request():
+        trace = start_trace()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(bind_context(lambda _: work()), range(3)))
+        return trace.as_dict()
+
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(run_request()))
+    thread.start()
+    thread.join()
+
+    assert set(result["stages_ms"]) == {"scoring"}
+    assert result["llm"]["groq/m"]["calls"] == 3
+    assert result["llm"]["groq/m"]["prompt_tokens"] == 30
+    assert current_trace() is None
+
+
+def test_failed_llm_calls_are_counted_as_errors():
+    def run_request():
+        trace = start_trace()
+        with pytest.raises(RuntimeError):
+            with llm_call("openai", "m"):
+                raise RuntimeError("boom")
+        return trace.as_dict()
+
+    assert contextvars.copy_context().run(run_request)["llm"]["openai/m"]["errors"] == 1
+
+
+@pytest.fixture
+def stack():
+    pytest.importorskip("chromadb")
+    pytest.importorskip("mongomock")
+    from backend.scripts.offline_stack import install_offline_stack
+
+    stack = install_offline_stack()
+    yield stack
+    stack.close()
+
+
+def test_query_timings_and_metrics_endpoint(stack):
+    from backend.app.main import app
+
+    client = TestClient(app)
+    data = client.post("/api/query?mode=thread&timings=true", json={"query": "馬斯克訪華", "top_k": 3}).json()
+
+    timings = data["timings"]
+    assert {"retrieval", "embedding", "chroma", "mongo", "scoring", "generation"} <= set(timings["stages_ms"])
+    assert timings["llm"]["groq/llama-3.3-70b-versatile"]["calls"] >= 3
+    assert timings["llm"]["openai/gpt-4o-mini"]["completion_tokens"] > 0
+
+    metrics = client.get("/metrics").text
+    assert 'scorerag_stage_seconds_count{stage="generation"}' in metrics
+    assert 'scorerag_llm_tokens_total{provider="groq",model="llama-3.3-70b-versatile",kind="prompt"}' in metrics
+    assert 'scorerag_requests_total{endpoint="query",mode="thread",outcome="ok"}' in metrics
+
+
+def test_abandoned_streams_are_counted_as_cancelled_not_errors():
+    async def stream():
+        with llm_call("openai", "stream"):
+            for piece in ("a", "b", "c"):
+                yield piece
+
+    async def consume_one():
+        chunks = stream()
+        await chunks.__anext__()
+        # The client disconnects after the first piece
+        await chunks.aclose()
+
+    def run_request():
+        trace = start_trace()
+        asyncio.run(consume_one())
+        return trace.as_dict()
+
+    entry = contextvars.copy_context().run(run_request)["llm"]["openai/stream"]
+    assert entry["errors"] == 0 and entry["cancelled"] == 1
+    assert LLM_CALL_SECONDS.count(provider="openai", model="stream", outcome="cancelled") == 1